@@ -1,8 +1,11 @@
 
+import time
+INICIO_SCRIPT = time.perf_counter()  # antes das importações: a partida inclui o tempo delas
+
 import streamlit as st
-import pandas as pd
 import numpy as np
 import math 
+import functools
 
 # Constantes de massa molar (g/mol)
 MM = {
@@ -358,6 +361,12 @@ def calcular_processo(params, composicao_oleo):
     sais = calcular_sais_necessarios(params, results)
     results['sais_necessarios'] = sais
 
+    # Downstream opcional: recuperações das unidades e reciclos de etanol, licor e HCl
+    if params.get('usar_downstream', False):
+        from downstream import calcular_downstream
+        from lote import resultados_escalares
+        results['downstream'] = resultados_escalares(calcular_downstream(params, results))
+
     # Adicionar informações de dimensionamento (similar ao cálculo inverso)
     # results['informacoes_dimensionamento'] = {
     #     'volume_insumos': results['fermentador']['volume_insumos'],  # Volume de insumos (L)
@@ -550,596 +559,1808 @@ def calcular_biorreatores_inverso(massa_soforolipideo_alvo, params_inv, composic
     
     return params_inv
 
-def main():
-    st.title("Calculadora de Soforolipídeos")
+def secao_exportacao(chave, params, composicao_oleo, results):
+    # Download dos resultados numéricos; o arquivo só é gerado quando solicitado
+    import exportacao
+
+    rotulos = {'xlsx': 'Excel (.xlsx)', 'csv': 'CSV (.zip)', 'parquet': 'Parquet (.zip)'}
+    st.subheader("Exportar Resultados")
+    col_formato, col_botao = st.columns(2)
+    with col_formato:
+        formato = st.selectbox("Formato", list(exportacao.FORMATOS), format_func=rotulos.get, key=f'fmt_{chave}')
+    with col_botao:
+        if st.button("Gerar arquivo", key=f'gerar_{chave}'):
+            dados = exportacao.exportar_resultado(params, composicao_oleo, results, formato)
+            st.session_state[f'arquivo_{chave}'] = (formato, dados)
+
+    arquivo = st.session_state.get(f'arquivo_{chave}')
+    if arquivo is not None:
+        formato_arquivo, dados = arquivo
+        extensao, mime = exportacao.FORMATOS[formato_arquivo]
+        st.download_button(
+            f"Baixar {rotulos[formato_arquivo]}",
+            data=dados,
+            file_name=f"soforolipideos_{chave}.{extensao}",
+            mime=mime,
+            key=f'baixar_{chave}'
+        )
 
-    st.markdown("""
-    ### Disclaimers Iniciais
-    **Estequiometria:**
-    - **Biomassa:** 0.2 C₆H₁₂O₆ + 0.1 CH₄N₂O + 0.15 O₂ → 1 CH₁.₈O₀.₅N₀.₂ + 0.3 CO₂ + 0.5 H₂O
-    - **Soforolipídeo:** 4 C₆H₁₂O₆ + 1 C₁₈H₃₄O₂ + 10.5 O₂ → 10 CO₂ + 14 H₂O + 1 C₃₂H₅₄O₁₃
-    - Para cada 100 kg de óleo adicionado, apenas aproximadamente 36,7 kg são efetivamente convertidos em soforolipídeos.
-    - Hidrólise completa da sacarose: 1 mol de sacarose → 1 mol de glicose + 1 mol de frutose.
-    - Composição de sais minerais fixa: {} g/L total.
-    """.format(TOTAL_SAIS))
+def secao_auditoria(results, saida=st):
+    # Mostra o quanto os valores reportados se afastam de um balanço de massa fechado
+    from auditoria import auditar_balanco
+    from lote import achatar_resultados
+
+    resumo = auditar_balanco(achatar_resultados(results))
+    resumo['violado'] = resumo['violacoes'] > 0
+    with saida.expander("Auditoria do Balanço de Massa"):
+        saida.dataframe(resumo[['unidade', 'violado', 'desvio_max', 'desvio_rel_max']], use_container_width=True)
+
+def registrar_tempo(nome, ms, exibir=True):
+    # Guarda o tempo de execução de cada painel para acompanhar a latência por interação
+    tempos = st.session_state.setdefault('tempos_execucao', [])
+    tempos.append({'painel': nome, 'ms': ms})
+    del tempos[:-200]  # mantém apenas as execuções mais recentes
+    if exibir and st.session_state.get('mostrar_tempos', False):
+        st.caption(f"⏱️ {nome}: {ms:,.1f} ms")
+
+def registrar_partida(ms):
+    # Partida: da primeira linha do script ao fim da primeira execução da sessão, com as importações
+    # se o processo acabou de iniciar. Primeira interação: a execução seguinte (completa ou de um
+    # fragmento), com duração ms
+    etapa = st.session_state.get('partida')
+    if etapa is None:
+        from partida import processo_novo
+        nome = 'Partida (processo novo)' if processo_novo() else 'Partida (sessão nova)'
+        registrar_tempo(nome, (time.perf_counter() - INICIO_SCRIPT) * 1000, exibir=False)
+        st.session_state['partida'] = 'aguardando'
+    elif etapa == 'aguardando':
+        registrar_tempo('Primeira interação', ms, exibir=False)
+        st.session_state['partida'] = 'medida'
+
+def cronometrado(nome):
+    # Decorador: mede cada execução da função (aplicação completa ou fragmento); a mais externa
+    # de cada execução do script alimenta a medição da partida
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            externa = not st.session_state.get('cronometrando', False)
+            st.session_state['cronometrando'] = True
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                ms = (time.perf_counter() - inicio) * 1000
+                registrar_tempo(nome, ms)
+                if externa:
+                    st.session_state['cronometrando'] = False
+                    registrar_partida(ms)
+        return medida
+    return decorador
+
+def painel_desempenho():
+    with st.sidebar:
+        if st.checkbox("Mostrar tempos de execução", key='mostrar_tempos'):
+            tempos = st.session_state.get('tempos_execucao', [])
+            if tempos:
+                import pandas as pd
+
+                resumo = pd.DataFrame(tempos).groupby('painel')['ms'].describe(percentiles=[0.5, 0.95])
+                resumo = resumo[['count', '50%', '95%', 'max']].rename(columns={
+                    'count': 'Execuções', '50%': 'Mediana (ms)', '95%': 'P95 (ms)', 'max': 'Máximo (ms)'
+                })
+                st.dataframe(resumo, use_container_width=True)
+
+def publicar(chave, valor, grupo):
+    # Publica os valores de um painel de entrada e registra o instante da última alteração
+    if st.session_state.get(chave) != valor:
+        st.session_state[chave] = valor
+        st.session_state[f'alteracao_{grupo}'] = time.time()
+
+# Entradas publicadas de que dependem os resultados de cada grupo
+ENTRADAS_GRUPO = {
+    'direto': ('params_direto', 'composicao_direto'),
+    'inverso': ('meta_inverso', 'params_inverso', 'composicao_inverso', 'catalogo_inverso'),
+}
 
-    tab1, tab2 = st.tabs(["Cálculo Direto", "Cálculo Inverso"])
+def entradas_publicadas(grupo):
+    return tuple(st.session_state.get(chave) for chave in ENTRADAS_GRUPO[grupo])
 
+def avisar_desatualizado(local, grupo):
+    # Os resultados do Calcular ficam na tela enquanto só os fragmentos de entrada são
+    # reexecutados; se as entradas mudaram desde o clique, eles não correspondem mais a elas
+    calculado = st.session_state.get(f'calculado_{grupo}')
+    if calculado is not None and calculado != entradas_publicadas(grupo):
+        local.warning("⚠️ As entradas mudaram desde o último cálculo: os resultados abaixo estão desatualizados. "
+                      "Clique em Calcular para atualizá-los.")
+    else:
+        local.empty()
+
+# Os painéis abaixo são fragmentos: alterar um widget reexecuta apenas o fragmento
+# em que ele está. Cada fragmento publica seus valores em st.session_state para os
+# painéis que dependem dele.
+
+def estimativa_oleo(params, composicao_oleo):
+    # Cálculo da massa de óleo ideal
+    glicose_total_estimada = hidrolise_sacarose(params['massa_sacarose_total'] * 1000)
+    glicose_soforo_estimada = glicose_total_estimada * (1 - params['prop_glicose_biomassa'])
+    mol_glicose_soforo = glicose_soforo_estimada / (MM['glicose'] / 1000)
+    mol_oleo_necessario = mol_glicose_soforo / 4
+    massa_oleo_ideal = mol_oleo_necessario * (MM['acidoOleico'] / 1000)
+
+    # st.info(f"🔍 Estimativa: Para atender à glicose disponível, são necessários aproximadamente {massa_oleo_ideal:,.2f} kg de ácido oleico.\n"
+    #         f"- Óleo total recomendado: {oleo_total_estimado:,.2f} kg")
+
+    percentual_efetividade_estimado = composicao_oleo[0]/100 + (composicao_oleo[1]/100)*(composicao_oleo[5]/100) + (composicao_oleo[3]/100)*(composicao_oleo[6]/100)
+    oleo_total_estimado = massa_oleo_ideal / percentual_efetividade_estimado if percentual_efetividade_estimado > 0 else float('inf')
+    return massa_oleo_ideal, percentual_efetividade_estimado, oleo_total_estimado
+
+def exibir_estimativa_oleo(local):
+    # Depende das entradas e da composição do óleo do cálculo direto
+    from partida import consultar_instantaneo
+
+    params = st.session_state.get('params_direto')
+    composicao_oleo = st.session_state.get('composicao_direto')
+    if params is None or composicao_oleo is None:
+        return
+
+    # O cenário padrão vem do instantâneo pré-calculado
+    estimativa = consultar_instantaneo('direto', (params, composicao_oleo), 'estimativa')
+    if estimativa is None:
+        estimativa = estimativa_oleo(params, composicao_oleo)
+    massa_oleo_ideal, percentual_efetividade_estimado, oleo_total_estimado = estimativa
+    if percentual_efetividade_estimado <= 0:
+        local.warning("⚠️ O óleo informado não tem ácidos graxos metabolizáveis; não há quantidade de óleo que atenda à glicose.")
+        return
+    local.info(
+        f"🔍 Estimativa baseada na composição do óleo:\n"
+        f"- Ácidos graxos metabolizáveis necessários: {massa_oleo_ideal:,.2f} kg\n"
+        f"- Eficiência metabólica do óleo: {percentual_efetividade_estimado*100:,.1f}%\n"
+        f"- Óleo total recomendado: {oleo_total_estimado:,.2f} kg"
+    )
 
-    with tab1:
-        st.header("Parâmetros - Cálculo Direto")
+def exibir_resposta_instantanea(local, sufixo):
+    # Principais resultados interpolados da tabela pré-calculada (interpolacao.py), com o limite de
+    # erro de cada um; fora da tabela, pelo modelo exato. Depende das entradas já publicadas
+    if not st.session_state.get(f'ri{sufixo}'):
+        return
+    import pandas as pd
+    from interpolacao import ROTULOS_SAIDAS, responder_direto, responder_inverso
+    from partida import consultar_instantaneo
+
+    inicio = time.perf_counter()
+    try:
+        if sufixo == '1':
+            params = st.session_state.get('params_direto')
+            composicao_oleo = st.session_state.get('composicao_direto')
+            if params is None or composicao_oleo is None:
+                return
+            resposta = consultar_instantaneo('direto', (params, composicao_oleo), 'resposta')
+            if resposta is None:
+                resposta = responder_direto(params, composicao_oleo)
+            else:
+                resposta.update(origem='instantaneo', tempo_us=(time.perf_counter() - inicio) * 1e6)
+        else:
+            params_inv = st.session_state.get('params_inverso')
+            composicao_oleo_inv = st.session_state.get('composicao_inverso')
+            if params_inv is None or composicao_oleo_inv is None or params_inv['rend_soforolipideo'] == 0:
+                return
+            entradas = (st.session_state['meta_inverso'], params_inv, composicao_oleo_inv, st.session_state['catalogo_inverso'])
+            resposta = consultar_instantaneo('inverso', entradas, 'resposta')
+            if resposta is None:
+                resposta = responder_inverso(*entradas[:3], catalogo_selecionado(entradas[3]))
+            else:
+                resposta.update(origem='instantaneo', tempo_us=(time.perf_counter() - inicio) * 1e6)
+    except ValueError as erro:
+        local.error(f"⚠️ {erro}")
+        return
+
+    tabela = pd.DataFrame({'Valor': resposta['valores'], '± Limite de Erro': resposta['erros']})
+    tabela.index = [ROTULOS_SAIDAS[nome] for nome in tabela.index]
+    if resposta['origem'] == 'tabela':
+        origem = "Interpolado da tabela pré-calculada"
+    elif resposta['origem'] == 'instantaneo':
+        origem = "Cenário padrão pré-calculado no deploy (modelo exato)"
+    else:
+        origem = "Modelo exato (entradas fora da tabela pré-calculada ou tabela não construída)"
+    with local.container():
+        st.subheader("Resposta Instantânea")
+        st.dataframe(
+            tabela.style.format(precision=2, decimal=',', thousands='.')
+            .format('{:.2g}', subset=['± Limite de Erro'], decimal=',')
+        )
+        st.caption(f"{origem} em {resposta['tempo_us']:,.0f} µs, sem a variação aleatória do cálculo completo.")
+
+# Campo de params do cálculo direto -> (chave do widget, fator de conversão para a unidade exibida)
+CHAVES_DIRETO = {
+    'volume_frasco': ('vf1', 1), 'volume_seed': ('vs1', 1), 'volume_fermentador': ('vferm1', 1),
+    'porcentagem_aeracao': ('pa1', 1), 'porcentagem_agua': ('pam1', 100),
+    'massa_sacarose_total': ('ms1', 1), 'massa_ureia_total': ('mu1', 1), 'massa_oleo_total': ('mo1', 1),
+    'prop_glicose_biomassa': ('pgb1', 100), 'hcl_per_l': ('hpl1', 1), 'rend_biomassa': ('rb1', 1),
+    'rend_soforolipideo': ('rs1', 1), 'ferment_time': ('ft1', 1), 'prop_inoculo_frasco': ('pif1', 1),
+    'seed_time': ('st1', 1), 'prop_inoculo_seed': ('pis1', 1), 'ethanol_per_kg': ('epk1', 1),
+    'usar_downstream': ('ud1', 1), 'rec_separacao': ('drs1', 100), 'remocao_oleo': ('dro1', 100),
+    'rec_extracao': ('dre1', 100), 'rec_etanol': ('dret1', 100), 'perda_acidificacao': ('dpa1', 100),
+    'reciclo_licor': ('drl1', 100), 'hcl_livre': ('dhl1', 100), 'rec_secagem': ('drsec1', 100),
+    'umidade_final': ('duf1', 100),
+    'coef_troca': ('ct1', 1), 'delta_t': ('dtr1', 1), 'area_serpentina': ('asp1', 1),
+    'razao_altura_diametro': ('rhd1', 1), 'potencia_agitacao': ('pag1', 1),
+}
+CHAVES_OLEO_DIRETO = ('ao1', 'al1', 'ap1', 'aln1', 'ae1', 'ml1', 'mln1')
+
+def carregar_no_direto(params, composicao_oleo):
+    # Agenda o preenchimento das entradas do cálculo direto; aplicado na próxima execução,
+    # antes de os widgets serem criados
+    st.session_state['carga_direto'] = (dict(params), list(composicao_oleo))
+
+def aplicar_carga_direto():
+    # Os valores carregados viram o valor inicial dos widgets, cujo estado é descartado para que
+    # sejam recriados com eles
+    carga = st.session_state.pop('carga_direto', None)
+    if carga is None:
+        return
+    params, composicao_oleo = carga
+    # Insumos em massa total, como estão na receita
+    valores = {chave: 1 for chave in ('us1', 'uu1', 'uo1')}
+    for nome, (chave, fator) in CHAVES_DIRETO.items():
+        if nome in params:
+            valores[chave] = float(params[nome]) * fator
+    valores['pa1'] = min(max(valores.get('pa1', 20.0), 15.0), 40.0)
+    valores['pam1'] = min(max(valores.get('pam1', 60.0), 20.0), 90.0)
+    valores.update((chave, float(valor)) for chave, valor in zip(CHAVES_OLEO_DIRETO, composicao_oleo))
+    for chave in valores:
+        st.session_state.pop(chave, None)
+    st.session_state['valores_direto'] = valores
+
+def valor_inicial(chave, padrao):
+    return st.session_state.get('valores_direto', {}).get(chave, padrao)
+
+@st.fragment
+@cronometrado('Entradas (direto)')
+def painel_entradas_direto(estimativa, instantanea, aviso):
+    aplicar_carga_direto()
+    col_unidades = st.columns(3)
+    with col_unidades[0]:
+        unidade_sacarose = st.selectbox("Unidade Sacarose", ["Concentração (g/L)", "Quantidade Total (kg)"],
+                                        index=valor_inicial('us1', 0), key='us1')
+    with col_unidades[1]:
+        unidade_ureia = st.selectbox("Unidade Ureia", ["Concentração (g/L)", "Quantidade Total (kg)"],
+                                        index=valor_inicial('uu1', 0), key='uu1')
+    with col_unidades[2]:
+        unidade_oleo = st.selectbox("Unidade Óleo", ["Concentração (g/L)", "Quantidade Total (kg)"],
+                                        index=valor_inicial('uo1', 0), key='uo1')
+
+    # Adicionar o parâmetro de porcentagem de aeração
+    espaco_aeracao = st.number_input(
+        'Espaço para Aeração (%)', 
+        value=valor_inicial('pa1', 20.0), 
+        min_value=15.0, 
+        max_value=40.0, 
+        format="%.1f",
+        help="Percentual reservado para aeração (mín: 15%).",
+        key='pa1'
+    )
 
-        col_unidades = st.columns(3)
-        with col_unidades[0]:
-            unidade_sacarose = st.selectbox("Unidade Sacarose", ["Concentração (g/L)", "Quantidade Total (kg)"], key='us1')
-        with col_unidades[1]:
-            unidade_ureia = st.selectbox("Unidade Ureia", ["Concentração (g/L)", "Quantidade Total (kg)"], key='uu1')
-        with col_unidades[2]:
-            unidade_oleo = st.selectbox("Unidade Óleo", ["Concentração (g/L)", "Quantidade Total (kg)"], key='uo1')
-
-        # Adicionar o parâmetro de porcentagem de aeração
-        espaco_aeracao = st.number_input(
-            'Espaço para Aeração (%)', 
-            value=20.0, 
-            min_value=15.0, 
-            max_value=40.0, 
-            format="%.1f",
-            help="Percentual reservado para aeração (mín: 15%).",
-            key='pa1'
+    porcentagem_agua = st.number_input(
+        'Porcentagem de Água no Meio (%)', 
+        value=valor_inicial('pam1', 60.0), 
+        min_value=20.0, 
+        max_value=90.0, 
+        format="%.1f",
+        help="Percentual do meio que será composto por água. O restante será ocupado pelos insumos.",
+        key='pam1'
+    )
+
+    # Organizar em 3 colunas com 5 linhas cada
+    col1, col2, col3 = st.columns(3)
+    params = {}
+
+    # Coluna 1
+    with col1:
+        # unidade_sacarose = st.selectbox("Unidade Sacarose", ["Concentração (g/L)", "Quantidade Total (kg)"], key='us1'),
+        params['volume_frasco'] = st.number_input('Volume Frasco (L)', value=valor_inicial('vf1', 1.0), format="%.2f", key='vf1')
+        params['porcentagem_aeracao'] = espaco_aeracao
+        params['porcentagem_agua'] = porcentagem_agua / 100
+        if unidade_sacarose == "Concentração (g/L)":
+            conc_sacarose = st.number_input('Concentração Sacarose (g/L)', value=100.0, format="%.2f", key='cs1')
+        else:
+            params['massa_sacarose_total'] = st.number_input('Massa Sacarose (kg)', value=valor_inicial('ms1', 500.0), format="%.2f", key='ms1')
+        if unidade_ureia == "Concentração (g/L)":
+            conc_ureia = st.number_input('Concentração Ureia (g/L)', value=5.0, format="%.2f", key='cu1')
+        else:
+            params['massa_ureia_total'] = st.number_input('Massa Ureia (kg)', value=valor_inicial('mu1', 25.0), format="%.2f", key='mu1')
+        params['prop_glicose_biomassa'] = st.number_input('Prop. Glicose p/ Biomassa (%)', value=valor_inicial('pgb1', 20.0), format="%.2f", key='pgb1') / 100
+        params['hcl_per_l'] = st.number_input('HCl por L de Óleo (L/L)', value=valor_inicial('hpl1', 2.0), format="%.2f", key='hpl1')
+    # Coluna 2
+    with col2:
+        # unidade_ureia = st.selectbox("Unidade Ureia", ["Concentração (g/L)", "Quantidade Total (kg)"], key='uu1'),
+        params['volume_seed'] = st.number_input('Volume Seed (L)', value=valor_inicial('vs1', 500.0), format="%.2f", key='vs1')
+        params['rend_biomassa'] = st.number_input('Rend. Biomassa (g/g)', value=valor_inicial('rb1', valor_calibrado('rend_biomassa', 0.678, 3)), format="%.3f",
+                                                  help="quanto de célula viva (biomassa) é gerado pra cada grama de glicose consumida. Ex: 0,678 g/g = a cada 100 g de glicose gera 67,8 g de biomassa.",
+                                                  key='rb1')
+        params['rend_soforolipideo'] = st.number_input('Rend. Soforolipídeo (g/g)', value=valor_inicial('rs1', valor_calibrado('rend_soforolipideo', 0.722, 3)), format="%.3f",
+                                                       help="quanto de soforolipídeo é gerado para cada grama de glicose",
+                                                       key='rs1')
+        params['ferment_time'] = st.number_input('Tempo Fermentação (h)', value=valor_inicial('ft1', 168.0), format="%.2f", key='ft1')
+        params['prop_inoculo_frasco'] = st.number_input('Prop. Inóculo Frasco→Seed', value=valor_inicial('pif1', 0.01), format="%.2f", key='pif1')
+
+    # Coluna 3
+    with col3:
+        # unidade_oleo = st.selectbox("Unidade Óleo", ["Concentração (g/L)", "Quantidade Total (kg)"], key='uo1'),
+        params['volume_fermentador'] = st.number_input('Volume Fermentador (L)', value=valor_inicial('vferm1', 5000.0), format="%.2f", key='vferm1')
+        if unidade_oleo == "Concentração (g/L)":
+            conc_oleo = st.number_input('Concentração Óleo (g/L)', value=40.0, format="%.2f", key='co1')
+        else:
+            params['massa_oleo_total'] = st.number_input('Massa Óleo (kg)', value=valor_inicial('mo1', 200.0), format="%.2f", key='mo1')
+        params['seed_time'] = st.number_input('Tempo Incubação Seed (h)', value=valor_inicial('st1', 24.0), format="%.2f", key='st1')
+        params['prop_inoculo_seed'] = st.number_input('Prop. Inóculo Seed→Ferm.', value=valor_inicial('pis1', 0.1), format="%.2f", key='pis1')
+        params['ethanol_per_kg'] = st.number_input('Etanol por kg Soforolip. (L)', value=valor_inicial('epk1', 2.0), format="%.2f", key='epk1')
+
+    entradas_downstream(params)
+    entradas_resfriamento(params, '1', valor_inicial)
+
+    # Cálculos após definir todos os parâmetros
+    total_volume = params['volume_frasco'] + params['volume_seed'] + params['volume_fermentador']
+    if unidade_sacarose == "Concentração (g/L)":
+        params['massa_sacarose_total'] = conc_sacarose * total_volume / 1000
+    if unidade_ureia == "Concentração (g/L)":
+        params['massa_ureia_total'] = conc_ureia * total_volume / 1000
+    if unidade_oleo == "Concentração (g/L)":
+        params['massa_oleo_total'] = conc_oleo * params['volume_fermentador'] / 1000
+
+    publicar('params_direto', params, 'direto')
+    exibir_estimativa_oleo(estimativa)
+    exibir_resposta_instantanea(instantanea, '1')
+    avisar_desatualizado(aviso, 'direto')
+
+def entradas_downstream(params):
+    from downstream import PARAMETROS_DOWNSTREAM
+
+    with st.expander("Downstream"):
+        params['usar_downstream'] = st.checkbox(
+            "Calcular separação, extração, acidificação e secagem",
+            value=bool(valor_inicial('ud1', False)),
+            help="Etanol e HCl passam a ser a reposição, descontados os reciclos; o custo por kg usa o soforolipídeo recuperado.",
+            key='ud1'
+        )
+        colunas = st.columns(3)
+        for i, (nome, (padrao, rotulo)) in enumerate(PARAMETROS_DOWNSTREAM.items()):
+            chave = CHAVES_DIRETO[nome][0]
+            with colunas[i % 3]:
+                params[nome] = st.number_input(
+                    f'{rotulo} (%)', value=valor_inicial(chave, padrao * 100), min_value=0.0,
+                    max_value=99.0 if nome == 'umidade_final' else 100.0, format="%.1f",
+                    disabled=not params['usar_downstream'], key=chave
+                ) / 100
+
+def entradas_resfriamento(params, sufixo, inicial=lambda chave, padrao: padrao):
+    # Mesmos campos nos dois modos; as chaves do direto (CHAVES_DIRETO) terminam em '1'
+    from termico import PARAMETROS_TERMICOS
+
+    with st.expander("Resfriamento"):
+        colunas = st.columns(3)
+        for i, (nome, (padrao, rotulo)) in enumerate(PARAMETROS_TERMICOS.items()):
+            chave = CHAVES_DIRETO[nome][0][:-1] + sufixo
+            with colunas[i % 3]:
+                params[nome] = st.number_input(
+                    rotulo, value=inicial(chave, padrao), min_value=0.1 if nome == 'razao_altura_diametro' else 0.0,
+                    format="%.2f", key=chave
+                )
+        if sufixo == '2':
+            params['ampliar_resfriamento'] = st.checkbox(
+                "Ampliar os vasos que não removem o pico de calor",
+                value=True,
+                help="Sem marcar, o dimensionamento que não puder ser resfriado é rejeitado.",
+                key='ar2'
+            )
+
+@st.fragment
+@cronometrado('Óleo (direto)')
+def painel_oleo_direto(estimativa, instantanea, aviso):
+    with st.expander("Composição do Óleo"):
+        composicao_oleo = [
+            st.number_input('Ácido Oleico (%)', value=valor_inicial('ao1', 25.0), format="%.2f", key='ao1'),
+            st.number_input('Ácido Linoleico (%)', value=valor_inicial('al1', 55.0), format="%.2f", key='al1'),
+            st.number_input('Ácido Palmítico (%)', value=valor_inicial('ap1', 10.0), format="%.2f", key='ap1'),
+            st.number_input('Ácido Linolênico (%)', value=valor_inicial('aln1', 7.0), format="%.2f", key='aln1'),
+            st.number_input('Ácido Esteárico (%)', value=valor_inicial('ae1', 3.0), format="%.2f", key='ae1'),
+            st.number_input('Metabolização Linoleico (%)', value=valor_inicial('ml1', valor_calibrado('mLinoleic', 20.0, 2)), format="%.2f", key='ml1'),
+            st.number_input('Metabolização Linolênico (%)', value=valor_inicial('mln1', valor_calibrado('mLinolenic', 10.0, 2)), format="%.2f", key='mln1')
+        ]
+    publicar('composicao_direto', composicao_oleo, 'direto')
+    exibir_estimativa_oleo(estimativa)
+    exibir_resposta_instantanea(instantanea, '1')
+    avisar_desatualizado(aviso, 'direto')
+
+def painel_alertas_direto(params, composicao_oleo, results, saida):
+    saida.header("Resultados")
+    if results['frasco']['volume_excedido']:
+        saida.warning("Atenção: Volume total de insumos excede o volume do frasco!")
+    if results['seed']['volume_excedido']:
+        saida.warning("Atenção: Volume total de insumos excede o volume do seed!")
+    if results['fermentador']['volume_excedido']:
+        saida.warning("Atenção: Volume total de insumos excede o volume do fermentador!")
+    if not results['fermentador']['aeracao_suficiente']:
+        saida.warning(
+            f"⚠️ Espaço para aeração insuficiente no fermentador!\n"
+            f"- Percentual disponível: {results['fermentador']['percentual_aeracao']:.1f}%\n"
+            f"- Mínimo recomendado: 15.0%"
+        )
+    # Nova versão
+    elif results['fermentador']['percentual_aeracao'] > params.get('aeracao_desejada', params['porcentagem_aeracao']) + 5:
+        aeracao_desejada = params.get('aeracao_desejada', params['porcentagem_aeracao'])
+        saida.info(
+            f"ℹ️ Há espaço disponível no fermentador:\n"
+            f"- Aeração desejada: {aeracao_desejada:.1f}%\n"
+            f"- Aeração disponível: {results['fermentador']['percentual_aeracao']:.1f}%\n"
+            f"Você poderia aumentar a quantidade de meio se desejar."
+        )
+    if results['fermentador']['limitante']:
+        saida.warning(
+            f"⚠️ Óleo metabolizável é limitante!\n"
+            f"- Óleo total fornecido: {params['massa_oleo_total']:,.2f} kg\n"
+            f"- Óleo metabolizável (efetivo): {results['fermentador']['oleo_efetivo']:,.2f} kg "
+            f"({results['fermentador']['percentual_efetividade']:,.1f}% do óleo total)\n"
+            f"- Necessário para reação: {results['fermentador']['oleo_necessario']:,.2f} kg\n"
+            f"- Percentual atendido: {results['fermentador']['percentual_oleo']:,.1f}%"
+        )
+
+def painel_resumo_direto(params, composicao_oleo, results, saida):
+    import pandas as pd
+
+    saida.subheader("Resumo Comparativo")
+
+    # Inversão de eixos - etapas nas colunas, parâmetros nas linhas
+    df = pd.DataFrame({
+        'Parâmetro': [
+            'Volume (L)',
+            'Sacarose Consumida (kg)',
+            'Ureia Consumida (kg)',
+            'Açúcares Fermentáveis (kg)',
+            'Biomassa Produzida (kg)',
+            'Soforolipídeo Produzido (kg)',
+            'Concentração de Soforolipídeo (g/L)',
+            'Produtividade (g/L/h)',
+            'Óleo Total (kg)',
+            'Óleo Metabolizável (kg)',
+            'Óleo Consumido (kg)',
+            'Óleo Residual (kg)',
+            'Etanol (L)',
+            'HCl (L)'
+        ],
+        'Frasco': [
+            f"{results['frasco']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['soforolipideo_produzido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00"
+        ],
+        'Seed': [
+            f"{results['seed']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['soforolipideo_produzido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00"
+        ],
+        'Fermentador': [
+            f"{results['fermentador']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['soforolipideo_produzido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['conc_soforolipideo']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['produtividade']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{params['massa_oleo_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['oleo_efetivo']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['oleo_consumido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['oleo_residual']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['ethanol']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['hcl']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ]
+    })
+
+    # Configure o DataFrame para mostrar o parâmetro como índice para melhor visualização
+    df = df.set_index('Parâmetro')
+    saida.dataframe(df, use_container_width=True, height=400)
+
+def painel_informacoes_direto(params, composicao_oleo, results, saida):
+    # st.info(f"Informações adicionais:\n"
+    # f"- Água mínima necessária para reações: {results['agua_minima_reacao']:.2f} kg\n"
+    # f"- Espaço disponível para aeração: {results['percentual_aeracao']:.1f}%\n"
+    # f"- Espaço mínimo recomendado: 15.0%")
+
+    saida.info(f"Informações adicionais:\n"
+    f"- Água gerada durante as reações: {results['agua_gerada']:,.2f} kg\n"
+    f"- Espaço para aeração no fermentador: {results['fermentador']['percentual_aeracao']:,.1f}%\n"
+    f"- Espaço mínimo de aeração recomendado: 15.0%\n"
+    f"- Percentual de meio no fermentador: {100 - results['fermentador']['percentual_aeracao']:,.1f}%")
+
+    # Adicionar informações de dimensionamento
+    porcentagem_agua = params.get('porcentagem_agua', 0.60) * 100
+    porcentagem_insumos = 100 - porcentagem_agua
+    saida.info(f"Informações sobre dimensionamento:\n"
+    f"- Insumos calculados ocupam {results['fermentador']['volume_insumos']:,.2f}L ({porcentagem_insumos:.1f}% do meio)\n"
+    f"- Água adicionada: {results['fermentador']['volume_agua']:,.2f}L ({porcentagem_agua:.1f}% do meio)\n"
+    f"- Volume total do meio: {results['fermentador']['volume_meio']:,.2f}L "
+    f"({100 - results['fermentador']['percentual_aeracao']:,.1f}% do reator)\n"
+    f"- Espaço para aeração: {results['fermentador']['percentual_aeracao']:,.1f}% do reator")
+
+def painel_agua_sais(params, composicao_oleo, results, saida):
+    import pandas as pd
+
+    # Adiciona a tabela de água e sais necessários
+    saida.subheader("Água e Sais Minerais Necessários")
+    insumos_df = pd.DataFrame({
+        'Parâmetro': ['Água (L)', 'Sais Minerais (kg)'],
+        'Frasco': [
+            f"{results['agua_necessaria']['frasco']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['sais_necessarios']['frasco']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ],
+        'Seed': [
+            f"{results['agua_necessaria']['seed']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['sais_necessarios']['seed']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ],
+        'Fermentador': [
+            f"{results['agua_necessaria']['fermentador']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['sais_necessarios']['fermentador']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ],
+        'Total': [
+            f"{results['agua_necessaria']['total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['sais_necessarios']['total']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ]
+    })
+    insumos_df = insumos_df.set_index('Parâmetro')
+    saida.dataframe(insumos_df, use_container_width=True)
+
+def painel_auditoria(params, composicao_oleo, results, saida):
+    secao_auditoria(results, saida)
+
+def painel_custos(params, composicao_oleo, results, saida):
+    import pandas as pd
+    from custos import ROTULOS_CUSTOS, custo_lote
+
+    custos = custo_lote(params, results)
+    total = float(custos['total'])
+    df = pd.DataFrame({
+        'Item': list(ROTULOS_CUSTOS.values()),
+        'Custo (R$)': [float(custos[item]) for item in ROTULOS_CUSTOS],
+    }).set_index('Item')
+    df['Participação (%)'] = df['Custo (R$)'] / total * 100 if total else 0.0
+
+    saida.subheader("Custos por Batelada")
+    saida.dataframe(df.style.format(precision=2, decimal=',', thousands='.'), use_container_width=True)
+    por_kg = float(custos['por_kg'])
+    saida.info(
+        f"Custo total da batelada: R$ {total:,.2f}\n"
+        f"- Custo por kg de soforolipídeo: "
+        + (f"R$ {por_kg:,.2f}/kg" if por_kg == por_kg else "sem produção")
+    )
+
+def painel_resfriamento(params, composicao_oleo, results, saida):
+    import pandas as pd
+    from termico import avaliar_resfriamento
+
+    cargas = avaliar_resfriamento(params, results)
+    etapas = {'frasco': 'Frasco', 'seed': 'Seed', 'fermentador': 'Fermentador'}
+    df = pd.DataFrame({
+        'Calor Total (MJ)': [float(cargas[e]['calor_total']) for e in etapas],
+        'Carga Média (kW)': [float(cargas[e]['carga_media']) for e in etapas],
+        'Carga de Pico (kW)': [float(cargas[e]['carga_pico']) for e in etapas],
+        'Remoção (kW)': [float(cargas[e]['capacidade_remocao']) for e in etapas],
+        'Folga (%)': [float(cargas[e]['folga']) for e in etapas],
+    }, index=pd.Index(etapas.values(), name='Etapa')).replace(np.inf, np.nan)
+    saida.subheader("Carga Térmica")
+    saida.dataframe(df.style.format(precision=2, decimal=',', thousands='.', na_rep='—'), use_container_width=True)
+    saida.caption("O frasco fica na incubadora, sem limite de remoção.")
+    for etapa, rotulo in etapas.items():
+        if not cargas[etapa]['resfriamento_suficiente']:
+            saida.warning(
+                f"⚠️ {rotulo} sem resfriamento suficiente: pico de {float(cargas[etapa]['carga_pico']):,.1f} kW "
+                f"para {float(cargas[etapa]['capacidade_remocao']):,.1f} kW de remoção."
+            )
+        if f'volume_original_{etapa}' in params:
+            saida.info(
+                f"ℹ️ {rotulo} ampliado de {params[f'volume_original_{etapa}']:,.0f} L para "
+                f"{params[f'volume_{etapa}']:,.0f} L para remover o pico de calor."
+            )
+
+def painel_downstream(params, composicao_oleo, results, saida):
+    import pandas as pd
+
+    if 'downstream' not in results:
+        return
+    ds = results['downstream']
+    saida.subheader("Downstream")
+    df = pd.DataFrame({
+        'Unidade': ['Separação', 'Extração', 'Acidificação', 'Secagem'],
+        'Entrada (kg)': [
+            results['fermentador']['soforolipideo_produzido'], ds['soforolipideo_extracao'],
+            ds['soforolipideo_extraido'], ds['soforolipideo_precipitado'],
+        ],
+        'Saída (kg)': [
+            ds['soforolipideo_separado'], ds['soforolipideo_extraido'],
+            ds['soforolipideo_precipitado'], ds['soforolipideo_final'],
+        ],
+        'Perda (kg)': [ds['perda_separacao'], ds['perda_extracao'], ds['perda_purga'], ds['perda_secagem']],
+    }).set_index('Unidade')
+    saida.dataframe(df.style.format(precision=2, decimal=',', thousands='.'), use_container_width=True)
+    reagentes = pd.DataFrame({
+        'Reagente': ['Etanol (L)', 'HCl (L)'],
+        'Demanda': [ds['etanol_demanda'], ds['hcl_demanda']],
+        'Reciclado': [ds['etanol_recuperado'], ds['hcl_reciclado']],
+        'Reposição': [ds['etanol_reposicao'], ds['hcl_reposicao']],
+    }).set_index('Reagente')
+    saida.dataframe(reagentes.style.format(precision=2, decimal=',', thousands='.'), use_container_width=True)
+    mensagem = (
+        f"Produto seco: {ds['produto_seco']:,.2f} kg (pureza {ds['pureza'] * 100:,.1f}%)\n"
+        f"- Soforolipídeo recuperado: {ds['soforolipideo_final']:,.2f} kg "
+        f"({ds['rendimento'] * 100:,.1f}% do produzido)\n"
+        f"- Soforolipídeo recirculado com o licor ácido: {ds['soforolipideo_reciclado']:,.2f} kg"
+    )
+    if ds['convergido']:
+        saida.info(mensagem)
+    else:
+        saida.warning(mensagem + f"\n- Reciclos sem convergência após {ds['iteracoes']} iterações")
+
+# Painéis de resultado, na ordem de exibição
+PAINEIS_DIRETO = (
+    ('alertas', painel_alertas_direto),
+    ('resumo', painel_resumo_direto),
+    ('informacoes', painel_informacoes_direto),
+    ('agua_sais', painel_agua_sais),
+    ('resfriamento', painel_resfriamento),
+    ('downstream', painel_downstream),
+    ('custos', painel_custos),
+    ('auditoria', painel_auditoria),
+)
+
+def estimativa_meta_inverso(params_inv, composicao_oleo_inv):
+    massa_soforolipideo_alvo = params_inv['massa_soforolipideo_alvo']
+    # Glicose necessária para atingir a meta
+    glicose_necessaria = massa_soforolipideo_alvo / params_inv['rend_soforolipideo']  # kg
+
+    # Mols de glicose
+    mols_glicose = glicose_necessaria / (MM['glicose'] / 1000)  # mol
+
+    # Mols de ácido oleico necessários
+    mols_oleico_necessario = mols_glicose / 4
+
+    # Massa de ácido oleico necessária
+    massa_oleico_necessaria = mols_oleico_necessario * (MM['acidoOleico'] / 1000)  # kg
+
+    # Composição do óleo e fatores de metabolização
+    pOleic = composicao_oleo_inv[0]
+    pLinoleic = composicao_oleo_inv[1]
+    pLinolenic = composicao_oleo_inv[3]
+    mLinoleic = composicao_oleo_inv[5]
+    mLinolenic = composicao_oleo_inv[6]
+
+    # Efetividade total do óleo com base na composição
+    efetividade = (
+        (pOleic / 100)
+        + (pLinoleic / 100) * (mLinoleic / 100)
+        + (pLinolenic / 100) * (mLinolenic / 100)
+    )
+
+    # Massa de óleo total necessária para fornecer o ácido oleico requerido
+    massa_oleo_total_necessaria = massa_oleico_necessaria / efetividade  # kg
+
+    # Sacarose equivalente
+    sacarose_equivalente = glicose_necessaria * MM['sacarose'] / MM['glicose'] / 2  # kg
+
+    return {
+        'glicose_necessaria': glicose_necessaria,
+        'massa_oleico_necessaria': massa_oleico_necessaria,
+        'efetividade': efetividade,
+        'massa_oleo_total_necessaria': massa_oleo_total_necessaria,
+        'sacarose_equivalente': sacarose_equivalente
+    }
+
+def valor_calibrado(nome, padrao, casas):
+    # Valor inicial dos campos: parâmetro calibrado com o histórico (calibracao.py), se existir
+    from calibracao import carregar_calibracao
+    return round(float(carregar_calibracao().get(nome, padrao)), casas)
+
+def catalogo_selecionado(usar_catalogo):
+    if not usar_catalogo:
+        return None
+    from catalogo import carregar_catalogo
+    return carregar_catalogo()
+
+def calcular_resultados_inverso(massa_soforolipideo_alvo, params_inv, composicao_oleo_inv, processo=calcular_processo, catalogo=None):
+    # Calcula tamanhos dos biorreatores
+    params_inv = calcular_biorreatores_inverso(massa_soforolipideo_alvo, params_inv, composicao_oleo_inv)
+    params_inv['massa_soforolipideo_alvo'] = massa_soforolipideo_alvo
+
+    # Calcular resultados completos
+    params_inv['massa_oleo_total'] = estimativa_meta_inverso(params_inv, composicao_oleo_inv)['massa_oleo_total_necessaria']
+    if catalogo is not None:
+        # Volumes trocados pelos vasos do catálogo (já recalculados e revalidados)
+        from catalogo import ajustar_ao_catalogo
+        params_inv, results = ajustar_ao_catalogo(params_inv, composicao_oleo_inv, catalogo, processo)
+    else:
+        results = processo(params_inv, composicao_oleo_inv)
+    # Vasos que não removem o pico de calor são ampliados (ou o dimensionamento é rejeitado)
+    from termico import ajustar_resfriamento
+    params_inv, results = ajustar_resfriamento(params_inv, composicao_oleo_inv, results, processo, catalogo)
+    # Com os vasos trocados (catálogo ou resfriamento), o meio e a aeração do fermentador são os do
+    # modelo nos vasos finais; a aeração pedida continua em aeracao_desejada
+    for campo in ('volume_insumos', 'volume_agua', 'volume_meio'):
+        params_inv[campo] = float(results['fermentador'][campo])
+    params_inv['porcentagem_aeracao'] = float(results['fermentador']['percentual_aeracao'])
+    return params_inv, results
+
+def painel_dimensionamento_inverso(params, composicao_oleo, results, saida):
+    params_inv = params
+    porcentagem_agua = params_inv.get('porcentagem_agua', 0.60) * 100
+    porcentagem_insumos = 100 - porcentagem_agua
+    saida.info(
+        f"Informações sobre dimensionamento:\n"
+        f"- Insumos calculados ocupam {params_inv['volume_insumos']:.2f}L ({porcentagem_insumos:.1f}% do meio)\n"
+        f"- Água adicionada: {params_inv['volume_agua']:.2f}L ({porcentagem_agua:.1f}% do meio)\n"
+        f"- Volume total do meio: {params_inv['volume_meio']:.2f}L ({100-params_inv['porcentagem_aeracao']:.1f}% do reator)\n"
+        f"- Espaço para aeração: {params_inv['porcentagem_aeracao']:.1f}% do reator\n"
+        f"- Água gerada durante as reações: {params_inv['agua_gerada']:.2f}L"
+    )
+
+def painel_biorreatores_inverso(params, composicao_oleo, results, saida):
+    import pandas as pd
+
+    params_inv = params
+    # Exibe os tamanhos calculados dos biorreatores
+    saida.header("Biorreatores dimensionados para atingir a meta:")
+    biorreatores_df = pd.DataFrame({
+        'Biorreator': ['Frasco', 'Seed', 'Fermentador'],
+        'Volume Calculado (L)': [
+            f"{params_inv['volume_frasco']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{params_inv['volume_seed']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{params_inv['volume_fermentador']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ]
+    })
+    if 'sku_fermentador' in params_inv:
+        # Vasos escolhidos no catálogo de fornecedores
+        biorreatores_df = biorreatores_df.rename(columns={'Volume Calculado (L)': 'Volume Nominal (L)'})
+        biorreatores_df['Volume Útil (L)'] = [
+            f"{params_inv[f'volume_util_{etapa}']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            for etapa in ('frasco', 'seed', 'fermentador')
+        ]
+        biorreatores_df['Modelo'] = [params_inv[f'sku_{etapa}'] for etapa in ('frasco', 'seed', 'fermentador')]
+    saida.dataframe(biorreatores_df, use_container_width=True)
+
+    saida.success(f"Concentração resultante de soforolipídeos: {params_inv['concentracao_resultante']:.2f} g/L")
+
+def painel_meta_inverso(params, composicao_oleo, results, saida):
+    import pandas as pd
+
+    params_inv = params
+    meta = estimativa_meta_inverso(params_inv, composicao_oleo)
+    glicose_necessaria = meta['glicose_necessaria']
+    massa_oleico_necessaria = meta['massa_oleico_necessaria']
+    efetividade = meta['efetividade']
+    massa_oleo_total_necessaria = meta['massa_oleo_total_necessaria']
+    sacarose_equivalente = meta['sacarose_equivalente']
+
+    # Mostrar resultados em tabela resumo
+    saida.subheader("Resultado estimado para atingir a meta:")
+    resumo_df = pd.DataFrame({
+        'Descrição': [
+            'Glicose necessária (kg)',
+            'Sacarose total necessária (kg)',
+            'Ureia total necessária (kg)',
+            'Ácido oleico necessário (kg)',
+            'Efetividade do óleo (%)',
+            'Óleo total necessário (kg)',
+            'Sacarose equivalente (kg)'
+        ],
+        'Valor': [
+            f"{glicose_necessaria:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{params_inv['massa_sacarose_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{params_inv['massa_ureia_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{massa_oleico_necessaria:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{efetividade * 100:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{massa_oleo_total_necessaria:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{sacarose_equivalente:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        ]
+    })
+    saida.dataframe(resumo_df, use_container_width=True)
+
+def painel_alertas_inverso(params, composicao_oleo, results, saida):
+    saida.header("Resultados Detalhados")
+    if results['frasco']['volume_excedido']:
+        saida.warning("Atenção: Volume total de insumos excede o volume do frasco!")
+    if results['seed']['volume_excedido']:
+        saida.warning("Atenção: Volume total de insumos excede o volume do seed!")
+    if results['fermentador']['volume_excedido']:
+        saida.warning("Atenção: Volume total de insumos excede o volume do fermentador!")
+    if not results['fermentador']['aeracao_suficiente']:
+        saida.warning(
+            f"⚠️ Espaço para aeração insuficiente no fermentador!\n"
+            f"- Percentual disponível: {results['fermentador']['percentual_aeracao']:.1f}%\n"
+            f"- Mínimo recomendado: 15.0%"
         )
 
+def painel_resumo_inverso(params, composicao_oleo, results, saida):
+    import pandas as pd
+
+    params_inv = params
+    saida.subheader("Resumo Comparativo")
+
+    # Inversão de eixos - etapas nas colunas, parâmetros nas linhas
+    df = pd.DataFrame({
+        'Parâmetro': [
+            'Volume (L)',
+            'Sacarose Consumida (kg)',
+            'Ureia Consumida (kg)',
+            'Açúcares Fermentáveis (kg)',
+            'Biomassa Produzida (kg)',
+            'Óleo Total (kg)',
+            'Óleo Metabolizável (kg)',
+            'Óleo Consumido (kg)',
+            'Óleo Residual (kg)',
+            'Etanol (L)',
+            'HCl (L)',
+            'Volume Insumos (L)',
+            'Volume Água (L)',
+            'Espaço para Aeração (%)'
+        ],
+        'Frasco': [
+            f"{results['frasco']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['volume_insumos']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['volume_agua']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['frasco']['percentual_aeracao']:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00"
+        ],
+        'Seed': [
+            f"{results['seed']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['volume_insumos']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['volume_agua']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['seed']['percentual_aeracao']:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00",
+            "0,00"
+        ],
+        'Fermentador': [
+            f"{results['fermentador']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['volume_insumos']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['volume_agua']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['percentual_aeracao']:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{params_inv['massa_oleo_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['oleo_efetivo']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['oleo_consumido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['oleo_residual']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['ethanol']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+            f"{results['fermentador']['hcl']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+        ]
+    })
+
+    # Configure o DataFrame para mostrar o parâmetro como índice para melhor visualização
+    df = df.set_index('Parâmetro')
+    saida.dataframe(df, use_container_width=True, height=400)
+
+PAINEIS_INVERSO = (
+    ('dimensionamento', painel_dimensionamento_inverso),
+    ('biorreatores', painel_biorreatores_inverso),
+    ('meta', painel_meta_inverso),
+    ('alertas', painel_alertas_inverso),
+    ('resumo', painel_resumo_inverso),
+    ('agua_sais', painel_agua_sais),
+    ('resfriamento', painel_resfriamento),
+    ('custos', painel_custos),
+    ('auditoria', painel_auditoria),
+)
+
+def exibir_paineis(paineis, params, composicao_oleo, results):
+    for _, painel in paineis:
+        painel(params, composicao_oleo, results, st)
+
+class GravadorStreamlit:
+    # Registra as chamadas st.<elemento>(...) de um painel para comparar o conteúdo
+    # com a última exibição e só então desenhá-lo (modo ao vivo)
+    def __init__(self):
+        self.elementos = []
+        self._pilha = [self.elementos]
+
+    def __getattr__(self, nome):
+        def gravar(*args, **kwargs):
+            filhos = []
+            self._pilha[-1].append((nome, args, kwargs, filhos))
+            return _BlocoGravado(self._pilha, filhos)
+        return gravar
+
+class _BlocoGravado:
+    # Contexto `with saida.expander(...)`: as chamadas internas ficam aninhadas no bloco
+    def __init__(self, pilha, filhos):
+        self._pilha = pilha
+        self._filhos = filhos
+
+    def __enter__(self):
+        self._pilha.append(self._filhos)
+        return self
+
+    def __exit__(self, *exc):
+        self._pilha.pop()
+        return False
+
+def assinatura_elementos(elementos):
+    import pandas as pd
+    from pandas.io.formats.style import Styler
+
+    def valor(v):
+        # Tabelas pelo conteúdo: o repr de um Styler traz o endereço do objeto e o html um id aleatório,
+        # que mudariam a cada gravação
+        if isinstance(v, pd.DataFrame):
+            return v.to_json()
+        if isinstance(v, Styler):
+            return v.to_html(table_uuid='assinatura')
+        return repr(v)
+    return tuple(
+        (nome, tuple(valor(a) for a in args), tuple(sorted((k, valor(v)) for k, v in kwargs.items())), assinatura_elementos(filhos))
+        for nome, args, kwargs, filhos in elementos
+    )
+
+def reproduzir_elementos(elementos):
+    for nome, args, kwargs, filhos in elementos:
+        alvo = getattr(st, nome)(*args, **kwargs)
+        if filhos:
+            with alvo:
+                reproduzir_elementos(filhos)
+
+def atualizar_paineis(grupo, locais, paineis, params, composicao_oleo, results):
+    # Redesenha apenas os painéis cujo conteúdo mudou desde a última exibição
+    exibidos = st.session_state.setdefault(f'paineis_{grupo}', {})
+    atualizados = 0
+    for nome, painel in paineis:
+        gravador = GravadorStreamlit()
+        painel(params, composicao_oleo, results, gravador)
+        assinatura = assinatura_elementos(gravador.elementos)
+        if exibidos.get(nome) != assinatura:
+            with locais[nome].container():
+                reproduzir_elementos(gravador.elementos)
+            exibidos[nome] = assinatura
+            atualizados += 1
+    return atualizados
+
+# Modo ao vivo: os resultados acompanham as entradas sem o botão Calcular.
+# O fragmento verifica as entradas a cada INTERVALO_AO_VIVO segundos e só recalcula
+# depois que elas ficam ESPERA_AO_VIVO segundos sem mudar (debounce).
+INTERVALO_AO_VIVO = 0.25  # s
+ESPERA_AO_VIVO = 0.3  # s
+ORCAMENTO_AO_VIVO_MS = 50.0
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def calcular_processo_deterministico(params, composicao_oleo):
+    # Mesmo modelo de calcular_processo, sem a variação aleatória; resultados em cache
+    from lote import calcular_processo_lote, resultados_escalares
+    return resultados_escalares(calcular_processo_lote(params, composicao_oleo))
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def calcular_inverso_deterministico(massa_soforolipideo_alvo, params_inv, composicao_oleo_inv, usar_catalogo=False):
+    return calcular_resultados_inverso(
+        massa_soforolipideo_alvo, dict(params_inv), list(composicao_oleo_inv),
+        processo=calcular_processo_deterministico, catalogo=catalogo_selecionado(usar_catalogo)
+    )
+
+def preparar_ao_vivo(grupo, paineis):
+    # Um espaço fixo por painel: o fragmento ao vivo escreve só nos que mudaram
+    st.session_state[f'estado_ao_vivo_{grupo}'] = {}
+    st.session_state[f'paineis_{grupo}'] = {}
+    status = st.empty()
+    locais = {nome: st.empty() for nome, _ in paineis}
+    return status, locais
+
+def atualizar_ao_vivo(grupo, entradas, calcular, paineis, status, locais):
+    estado = st.session_state.setdefault(f'estado_ao_vivo_{grupo}', {})
+    if entradas == estado.get('entradas'):
+        return
+    # A primeira exibição (painéis vazios) não espera; as seguintes aguardam as entradas estabilizarem
+    alteracao = st.session_state.get(f'alteracao_{grupo}', 0.0)
+    if 'entradas' in estado and time.time() - alteracao < ESPERA_AO_VIVO:
+        return
+
+    inicio = time.perf_counter()
+    params, composicao_oleo, results = calcular(*entradas)
+    atualizados = atualizar_paineis(grupo, locais, paineis, params, composicao_oleo, results)
+    ms = (time.perf_counter() - inicio) * 1000
+    estado['entradas'] = entradas
+
+    st.session_state[f'resultado_{grupo}'] = (dict(params), list(composicao_oleo), results)
+    st.session_state.pop(f'arquivo_{grupo}', None)
+    registrar_tempo(f'Ao vivo ({grupo})', ms, exibir=False)
+    if ms > ORCAMENTO_AO_VIVO_MS:
+        status.warning(
+            f"⚠️ Modo ao vivo atrasado: atualização levou {ms:,.1f} ms "
+            f"(meta: {ORCAMENTO_AO_VIVO_MS:.0f} ms)."
+        )
+    else:
+        status.caption(f"🟢 Ao vivo: {atualizados} painel(is) atualizado(s) em {ms:,.1f} ms")
+
+# O cenário padrão vem do instantâneo pré-calculado no deploy (partida.py)
+def calcular_direto_ao_vivo(params, composicao_oleo):
+    from partida import consultar_instantaneo
+
+    results = consultar_instantaneo('direto', (params, composicao_oleo), 'resultados')
+    if results is None:
+        results = calcular_processo_deterministico(params, composicao_oleo)
+    return params, composicao_oleo, results
+
+def calcular_inverso_ao_vivo(massa_soforolipideo_alvo, params_inv, composicao_oleo_inv, usar_catalogo):
+    from partida import consultar_instantaneo
+
+    entradas = (massa_soforolipideo_alvo, params_inv, composicao_oleo_inv, usar_catalogo)
+    resultado = consultar_instantaneo('inverso', entradas, 'resultados')
+    if resultado is None:
+        resultado = calcular_inverso_deterministico(*entradas)
+    params_inv, results = resultado
+    return params_inv, composicao_oleo_inv, results
+
+@st.fragment(run_every=INTERVALO_AO_VIVO)
+def painel_ao_vivo_direto(status, locais):
+    params = st.session_state.get('params_direto')
+    composicao_oleo = st.session_state.get('composicao_direto')
+    if params is None or composicao_oleo is None:
+        return
+    atualizar_ao_vivo('direto', (params, composicao_oleo), calcular_direto_ao_vivo, PAINEIS_DIRETO, status, locais)
+
+@st.fragment(run_every=INTERVALO_AO_VIVO)
+def painel_ao_vivo_inverso(status, locais):
+    params_inv = st.session_state.get('params_inverso')
+    composicao_oleo_inv = st.session_state.get('composicao_inverso')
+    if params_inv is None or composicao_oleo_inv is None:
+        return
+    if params_inv['rend_soforolipideo'] == 0:
+        status.error("⚠️ O rendimento de soforolipídeo não pode ser zero.")
+        return
+    entradas = (st.session_state['meta_inverso'], params_inv, composicao_oleo_inv, st.session_state['catalogo_inverso'])
+    try:
+        atualizar_ao_vivo('inverso', entradas, calcular_inverso_ao_vivo, PAINEIS_INVERSO, status, locais)
+    except ValueError as erro:
+        status.error(f"⚠️ {erro}")
+
+@st.fragment
+@cronometrado('Resultados (direto)')
+def painel_resultados_direto(aviso):
+    # Os painéis só são desenhados no clique; sem ele, a reexecução do fragmento os apaga
+    st.session_state.pop('calculado_direto', None)
+    aviso.empty()
+    if st.button("Calcular", key='calc1'):
+        params = dict(st.session_state['params_direto'])
+        composicao_oleo = list(st.session_state['composicao_direto'])
+        # percentual_efetividade_estimado = composicao_oleo[0]/100 + (composicao_oleo[1]/100)*(composicao_oleo[5]/100) + (composicao_oleo[3]/100)*(composicao_oleo[6]/100)
+        # oleo_total_estimado = massa_oleo_ideal / percentual_efetividade_estimado
+        # st.info(
+        #     f"🔍 Estimativa baseada na composição do óleo:\n"
+        #     f"- Ácidos graxos metabolizáveis necessários: {massa_oleo_ideal:,.2f} kg\n"
+        #     f"- Eficiência metabólica do óleo: {percentual_efetividade_estimado*100:,.1f}%\n"
+        #     f"- Óleo total recomendado: {oleo_total_estimado:,.2f} kg"
+        # )
+        results = calcular_processo(params, composicao_oleo)
+        # Guarda o último cálculo para a exportação, que sobrevive às próximas interações
+        st.session_state['resultado_direto'] = (dict(params), list(composicao_oleo), results)
+        st.session_state.pop('arquivo_direto', None)
+        exibir_paineis(PAINEIS_DIRETO, params, composicao_oleo, results)
+        st.session_state['calculado_direto'] = entradas_publicadas('direto')
+
+    if 'resultado_direto' in st.session_state:
+        secao_exportacao('direto', *st.session_state['resultado_direto'])
+
+@st.fragment
+@cronometrado('Resultados (inverso)')
+def painel_resultados_inverso(aviso):
+    st.session_state.pop('calculado_inverso', None)
+    aviso.empty()
+    if st.button("Calcular Inverso", key='calc2'):
+        massa_soforolipideo_alvo = st.session_state['meta_inverso']
+        params_inv = dict(st.session_state['params_inverso'])
+        composicao_oleo_inv = list(st.session_state['composicao_inverso'])
+        catalogo = catalogo_selecionado(st.session_state['catalogo_inverso'])
+        if params_inv['rend_soforolipideo'] == 0:
+            st.error("⚠️ O rendimento de soforolipídeo não pode ser zero.")
+        else:
+            try:
+                params_inv, results = calcular_resultados_inverso(
+                    massa_soforolipideo_alvo, params_inv, composicao_oleo_inv, catalogo=catalogo
+                )
+            except ValueError as erro:
+                st.error(f"⚠️ {erro}")
+                return
+            st.session_state['resultado_inverso'] = (dict(params_inv), list(composicao_oleo_inv), results)
+            st.session_state.pop('arquivo_inverso', None)
+            exibir_paineis(PAINEIS_INVERSO, params_inv, composicao_oleo_inv, results)
+            st.session_state['calculado_inverso'] = entradas_publicadas('inverso')
+
+    if 'resultado_inverso' in st.session_state:
+        secao_exportacao('inverso', *st.session_state['resultado_inverso'])
+
+@st.fragment
+@cronometrado('Entradas (inverso)')
+def painel_entradas_inverso(instantanea, aviso):
+    # Organizar em 3 colunas com 4 linhas cada
+    col1, col2, col3 = st.columns(3)
+    params_inv = {}
+
+
+    # Coluna 1
+    with col1:
+        massa_soforolipideo_alvo = st.number_input("Meta Soforolipídeo (kg)", value=305.0, format="%.2f", key='sd2')
+        # ocupacao_maxima = st.number_input("Ocupação máxima por insumos (%)", 
+        #                       value=80.0, min_value=10.0, max_value=95.0, 
+        #                       format="%.1f", 
+        #                       help="Percentual máximo do volume do meio ocupado pelos insumos sólidos. O restante será água.", 
+        #                       key='om2')
+        # params_inv['ocupacao_maxima'] = ocupacao_maxima
+        espaco_aeracao = st.number_input("Espaço para aeração (%)", 
+                             value=15.0, min_value=5.0, max_value=50.0, 
+                             format="%.1f", 
+                             help="Percentual do volume do fermentador reservado para aeração (headspace)", 
+                             key='ea2')
         porcentagem_agua = st.number_input(
             'Porcentagem de Água no Meio (%)', 
             value=60.0, 
-            min_value=20.0, 
+            min_value=15.0, 
             max_value=90.0, 
             format="%.1f",
             help="Percentual do meio que será composto por água. O restante será ocupado pelos insumos.",
-            key='pam1'
+            key='pam2'
         )
+        params_inv['porcentagem_agua'] = porcentagem_agua / 100
+        params_inv['espaco_aeracao'] = espaco_aeracao
+        params_inv['ethanol_per_kg'] = st.number_input('Etanol por kg Soforolip. (L)', value=2.0, format="%.2f", key='epk2')
+        params_inv['hcl_per_l'] = st.number_input('HCl por L de Óleo (L/L)', value=2.0, format="%.2f", key='hpl2')
 
-        # Organizar em 3 colunas com 5 linhas cada
-        col1, col2, col3 = st.columns(3)
-        params = {}
 
-        # Coluna 1
-        with col1:
-            # unidade_sacarose = st.selectbox("Unidade Sacarose", ["Concentração (g/L)", "Quantidade Total (kg)"], key='us1'),
-            params['volume_frasco'] = st.number_input('Volume Frasco (L)', value=1.0, format="%.2f", key='vf1')
-            params['porcentagem_aeracao'] = espaco_aeracao
-            params['porcentagem_agua'] = porcentagem_agua / 100
-            if unidade_sacarose == "Concentração (g/L)":
-                conc_sacarose = st.number_input('Concentração Sacarose (g/L)', value=100.0, format="%.2f", key='cs1')
-            else:
-                params['massa_sacarose_total'] = st.number_input('Massa Sacarose (kg)', value=500.0, format="%.2f", key='ms1')
-            if unidade_ureia == "Concentração (g/L)":
-                conc_ureia = st.number_input('Concentração Ureia (g/L)', value=5.0, format="%.2f", key='cu1')
-            else:
-                params['massa_ureia_total'] = st.number_input('Massa Ureia (kg)', value=25.0, format="%.2f", key='mu1')
-            params['prop_glicose_biomassa'] = st.number_input('Prop. Glicose p/ Biomassa (%)', value=20.0, format="%.2f", key='pgb1') / 100
-            params['hcl_per_l'] = st.number_input('HCl por L de Óleo (L/L)', value=2.0, format="%.2f", key='hpl1')
-        # Coluna 2
-        with col2:
-            # unidade_ureia = st.selectbox("Unidade Ureia", ["Concentração (g/L)", "Quantidade Total (kg)"], key='uu1'),
-            params['volume_seed'] = st.number_input('Volume Seed (L)', value=500.0, format="%.2f", key='vs1')
-            params['rend_biomassa'] = st.number_input('Rend. Biomassa (g/g)', value=0.678, format="%.3f",
+    # Coluna 2
+    with col2:
+        params_inv['prop_glicose_biomassa'] = st.number_input('Prop. Glicose p/ Biomassa (%)', value=20.0, format="%.2f", key='pgb2') / 100
+        params_inv['rend_biomassa'] = st.number_input('Rend. Biomassa (g/g)', value=valor_calibrado('rend_biomassa', 0.678, 3), format="%.3f", 
                                                       help="quanto de célula viva (biomassa) é gerado pra cada grama de glicose consumida. Ex: 0,678 g/g = a cada 100 g de glicose gera 67,8 g de biomassa.",
-                                                      key='rb1')
-            params['rend_soforolipideo'] = st.number_input('Rend. Soforolipídeo (g/g)', value=0.722, format="%.3f",
+                                                      key='rb2')
+        params_inv['rend_soforolipideo'] = st.number_input('Rend. Soforolipídeo (g/g)', value=valor_calibrado('rend_soforolipideo', 0.722, 3), format="%.3f",
                                                            help="quanto de soforolipídeo é gerado para cada grama de glicose",
-                                                           key='rs1')
-            params['ferment_time'] = st.number_input('Tempo Fermentação (h)', value=168.0, format="%.2f", key='ft1')
-            params['prop_inoculo_frasco'] = st.number_input('Prop. Inóculo Frasco→Seed', value=0.01, format="%.2f", key='pif1')
+                                                           key='rs2')
+        params_inv['ferment_time'] = st.number_input('Tempo Fermentação (h)', value=168.0, format="%.2f", key='ft2')
 
-        # Coluna 3
-        with col3:
-            # unidade_oleo = st.selectbox("Unidade Óleo", ["Concentração (g/L)", "Quantidade Total (kg)"], key='uo1'),
-            params['volume_fermentador'] = st.number_input('Volume Fermentador (L)', value=5000.0, format="%.2f", key='vferm1')
-            if unidade_oleo == "Concentração (g/L)":
-                conc_oleo = st.number_input('Concentração Óleo (g/L)', value=40.0, format="%.2f", key='co1')
-            else:
-                params['massa_oleo_total'] = st.number_input('Massa Óleo (kg)', value=200.0, format="%.2f", key='mo1')
-            params['seed_time'] = st.number_input('Tempo Incubação Seed (h)', value=24.0, format="%.2f", key='st1')
-            params['prop_inoculo_seed'] = st.number_input('Prop. Inóculo Seed→Ferm.', value=0.1, format="%.2f", key='pis1')
-            params['ethanol_per_kg'] = st.number_input('Etanol por kg Soforolip. (L)', value=2.0, format="%.2f", key='epk1')
+    # Coluna 3
+    with col3:
+        params_inv['seed_time'] = st.number_input('Tempo Incubação Seed (h)', value=24.0, format="%.2f", key='st2')
+        
+        # Proporções de inóculo (usadas para calcular volume dos biorreatores)
+        prop_inoculo_frasco_perc = st.number_input('Prop. Inóculo Frasco→Seed (%)', 
+                                                value=1.0, min_value=0.1, max_value=20.0, format="%.1f", 
+                                                help="Percentual do volume do Seed que será inoculado a partir do frasco", 
+                                                key='pif2')
+        params_inv['prop_inoculo_frasco'] = prop_inoculo_frasco_perc / 100
+        
+        prop_inoculo_seed_perc = st.number_input('Prop. Inóculo Seed→Ferm. (%)', 
+                                            value=10.0, min_value=1.0, max_value=30.0, format="%.1f", 
+                                            help="Percentual do volume do Fermentador que será inoculado a partir do seed", 
+                                            key='pis2')
+        params_inv['prop_inoculo_seed'] = prop_inoculo_seed_perc / 100
+        
+        # Fator de segurança para dimensionamento
+        fator_seguranca = st.number_input('Fator de Segurança (%)', 
+                                        value=10.0, min_value=0.0, max_value=200.0, format="%.1f", 
+                                        help="Percentual adicional de volume para garantir inóculo suficiente", 
+                                        key='fs2')
+        params_inv['fator_seguranca'] = fator_seguranca
+
+    entradas_resfriamento(params_inv, '2')
+
+    usar_catalogo = st.checkbox(
+        "Ajustar aos vasos do catálogo de fornecedores",
+        key='cat2',
+        help="Substitui os volumes calculados pelo menor vaso do catálogo que comporta o meio com a aeração mínima."
+    )
 
-        # Cálculos após definir todos os parâmetros
-        total_volume = params['volume_frasco'] + params['volume_seed'] + params['volume_fermentador']
-        if unidade_sacarose == "Concentração (g/L)":
-            params['massa_sacarose_total'] = conc_sacarose * total_volume / 1000
-        if unidade_ureia == "Concentração (g/L)":
-            params['massa_ureia_total'] = conc_ureia * total_volume / 1000
-        if unidade_oleo == "Concentração (g/L)":
-            params['massa_oleo_total'] = conc_oleo * params['volume_fermentador'] / 1000
-
-        # Cálculo e exibição da massa de óleo ideal
-        glicose_total_estimada = hidrolise_sacarose(params['massa_sacarose_total'] * 1000)
-        glicose_soforo_estimada = glicose_total_estimada * (1 - params['prop_glicose_biomassa'])
-        mol_glicose_soforo = glicose_soforo_estimada / (MM['glicose'] / 1000)
-        mol_oleo_necessario = mol_glicose_soforo / 4
-        massa_oleo_ideal = mol_oleo_necessario * (MM['acidoOleico'] / 1000)
-
-        # st.info(f"🔍 Estimativa: Para atender à glicose disponível, são necessários aproximadamente {massa_oleo_ideal:,.2f} kg de ácido oleico.\n"
-        #         f"- Óleo total recomendado: {oleo_total_estimado:,.2f} kg")
-
-        with st.expander("Composição do Óleo"):
-            composicao_oleo = [
-                st.number_input('Ácido Oleico (%)', value=25.0, format="%.2f", key='ao1'),
-                st.number_input('Ácido Linoleico (%)', value=55.0, format="%.2f", key='al1'),
-                st.number_input('Ácido Palmítico (%)', value=10.0, format="%.2f", key='ap1'),
-                st.number_input('Ácido Linolênico (%)', value=7.0, format="%.2f", key='aln1'),
-                st.number_input('Ácido Esteárico (%)', value=3.0, format="%.2f", key='ae1'),
-                st.number_input('Metabolização Linoleico (%)', value=20.0, format="%.2f", key='ml1'),
-                st.number_input('Metabolização Linolênico (%)', value=10.0, format="%.2f", key='mln1')
-            ]
-        percentual_efetividade_estimado = composicao_oleo[0]/100 + (composicao_oleo[1]/100)*(composicao_oleo[5]/100) + (composicao_oleo[3]/100)*(composicao_oleo[6]/100)
-        oleo_total_estimado = massa_oleo_ideal / percentual_efetividade_estimado
-        st.info(
-            f"🔍 Estimativa baseada na composição do óleo:\n"
-            f"- Ácidos graxos metabolizáveis necessários: {massa_oleo_ideal:,.2f} kg\n"
-            f"- Eficiência metabólica do óleo: {percentual_efetividade_estimado*100:,.1f}%\n"
-            f"- Óleo total recomendado: {oleo_total_estimado:,.2f} kg"
+    publicar('meta_inverso', massa_soforolipideo_alvo, 'inverso')
+    publicar('catalogo_inverso', usar_catalogo, 'inverso')
+    publicar('params_inverso', params_inv, 'inverso')
+    exibir_resposta_instantanea(instantanea, '2')
+    avisar_desatualizado(aviso, 'inverso')
+
+@st.fragment
+@cronometrado('Óleo (inverso)')
+def painel_oleo_inverso(instantanea, aviso):
+    with st.expander("Composição do Óleo", expanded=False):
+        composicao_oleo_inv = [
+            st.number_input('Ácido Oleico (%)', value=25.0, format="%.2f", key='ao2'),
+            st.number_input('Ácido Linoleico (%)', value=55.0, format="%.2f", key='al2'),
+            st.number_input('Ácido Palmítico (%)', value=10.0, format="%.2f", key='ap2'),
+            st.number_input('Ácido Linolênico (%)', value=7.0, format="%.2f", key='aln2'),
+            st.number_input('Ácido Esteárico (%)', value=3.0, format="%.2f", key='ae2'),
+            st.number_input('Metabolização Linoleico (%)', value=valor_calibrado('mLinoleic', 20.0, 2), format="%.2f", key='ml2'),
+            st.number_input('Metabolização Linolênico (%)', value=valor_calibrado('mLinolenic', 10.0, 2), format="%.2f", key='mln2')
+        ]
+    publicar('composicao_inverso', composicao_oleo_inv, 'inverso')
+    exibir_resposta_instantanea(instantanea, '2')
+    avisar_desatualizado(aviso, 'inverso')
+
+def ler_volumes(texto):
+    # "1; 2,5; 10" -> [1.0, 2.5, 10.0] (vírgula decimal, separador ';')
+    return [float(v.strip().replace(',', '.')) for v in texto.split(';') if v.strip()]
+
+@st.fragment
+@cronometrado('Capacidade (direto)')
+def painel_capacidade():
+    from capacidade import capacidade_maxima, combinacoes_frota, etapa_limitante
+
+    with st.expander("Capacidade Máxima dos Reatores"):
+        st.caption(
+            "Maior produção de soforolipídeo por batelada com os volumes informados, mantendo a aeração "
+            "mínima e a proporção de água. Ureia na proporção atual; óleo no necessário para não ser limitante."
         )
-
-        if st.button("Calcular", key='calc1'):
-            # percentual_efetividade_estimado = composicao_oleo[0]/100 + (composicao_oleo[1]/100)*(composicao_oleo[5]/100) + (composicao_oleo[3]/100)*(composicao_oleo[6]/100)
-            # oleo_total_estimado = massa_oleo_ideal / percentual_efetividade_estimado
-            # st.info(
-            #     f"🔍 Estimativa baseada na composição do óleo:\n"
-            #     f"- Ácidos graxos metabolizáveis necessários: {massa_oleo_ideal:,.2f} kg\n"
-            #     f"- Eficiência metabólica do óleo: {percentual_efetividade_estimado*100:,.1f}%\n"
-            #     f"- Óleo total recomendado: {oleo_total_estimado:,.2f} kg"
-            # )
-            results = calcular_processo(params, composicao_oleo)
-            st.header("Resultados")
-            if results['frasco']['volume_excedido']:
-                st.warning("Atenção: Volume total de insumos excede o volume do frasco!")
-            if results['seed']['volume_excedido']:
-                st.warning("Atenção: Volume total de insumos excede o volume do seed!")
-            if results['fermentador']['volume_excedido']:
-                st.warning("Atenção: Volume total de insumos excede o volume do fermentador!")
-            if not results['fermentador']['aeracao_suficiente']:
-                st.warning(
-                    f"⚠️ Espaço para aeração insuficiente no fermentador!\n"
-                    f"- Percentual disponível: {results['fermentador']['percentual_aeracao']:.1f}%\n"
-                    f"- Mínimo recomendado: 15.0%"
-                )
-            # Nova versão
-            elif results['fermentador']['percentual_aeracao'] > params.get('aeracao_desejada', params['porcentagem_aeracao']) + 5:
-                aeracao_desejada = params.get('aeracao_desejada', params['porcentagem_aeracao'])
-                st.info(
-                    f"ℹ️ Há espaço disponível no fermentador:\n"
-                    f"- Aeração desejada: {aeracao_desejada:.1f}%\n"
-                    f"- Aeração disponível: {results['fermentador']['percentual_aeracao']:.1f}%\n"
-                    f"Você poderia aumentar a quantidade de meio se desejar."
-                )
-            if results['fermentador']['limitante']:
-                st.warning(
-                    f"⚠️ Óleo metabolizável é limitante!\n"
-                    f"- Óleo total fornecido: {params['massa_oleo_total']:,.2f} kg\n"
-                    f"- Óleo metabolizável (efetivo): {results['fermentador']['oleo_efetivo']:,.2f} kg "
-                    f"({results['fermentador']['percentual_efetividade']:,.1f}% do óleo total)\n"
-                    f"- Necessário para reação: {results['fermentador']['oleo_necessario']:,.2f} kg\n"
-                    f"- Percentual atendido: {results['fermentador']['percentual_oleo']:,.1f}%"
-                )
-
-            st.subheader("Resumo Comparativo")
-
-            # Inversão de eixos - etapas nas colunas, parâmetros nas linhas
-            df = pd.DataFrame({
-                'Parâmetro': [
-                    'Volume (L)',
-                    'Sacarose Consumida (kg)',
-                    'Ureia Consumida (kg)',
-                    'Açúcares Fermentáveis (kg)',
-                    'Biomassa Produzida (kg)',
-                    'Soforolipídeo Produzido (kg)',
-                    'Concentração de Soforolipídeo (g/L)',
-                    'Produtividade (g/L/h)',
-                    'Óleo Total (kg)',
-                    'Óleo Metabolizável (kg)',
-                    'Óleo Consumido (kg)',
-                    'Óleo Residual (kg)',
-                    'Etanol (L)',
-                    'HCl (L)'
-                ],
-                'Frasco': [
-                    f"{results['frasco']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['frasco']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['frasco']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['frasco']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['frasco']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['frasco']['soforolipideo_produzido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00"
-                ],
-                'Seed': [
-                    f"{results['seed']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['seed']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['seed']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['seed']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['seed']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['seed']['soforolipideo_produzido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00",
-                    "0,00"
-                ],
-                'Fermentador': [
-                    f"{results['fermentador']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['soforolipideo_produzido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['conc_soforolipideo']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['produtividade']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{params['massa_oleo_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['oleo_efetivo']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['oleo_consumido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['oleo_residual']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['ethanol']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['fermentador']['hcl']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                ]
-            })
-
-            # Configure o DataFrame para mostrar o parâmetro como índice para melhor visualização
-            df = df.set_index('Parâmetro')
-            st.dataframe(df, use_container_width=True, height=400)
-
-            # st.info(f"Informações adicionais:\n"
-            # f"- Água mínima necessária para reações: {results['agua_minima_reacao']:.2f} kg\n"
-            # f"- Espaço disponível para aeração: {results['percentual_aeracao']:.1f}%\n"
-            # f"- Espaço mínimo recomendado: 15.0%")
-
-            st.info(f"Informações adicionais:\n"
-            f"- Água gerada durante as reações: {results['agua_gerada']:,.2f} kg\n"
-            f"- Espaço para aeração no fermentador: {results['fermentador']['percentual_aeracao']:,.1f}%\n"
-            f"- Espaço mínimo de aeração recomendado: 15.0%\n"
-            f"- Percentual de meio no fermentador: {100 - results['fermentador']['percentual_aeracao']:,.1f}%")
-
-            # Adicionar informações de dimensionamento
-            porcentagem_agua = params.get('porcentagem_agua', 0.60) * 100
-            porcentagem_insumos = 100 - porcentagem_agua
-            st.info(f"Informações sobre dimensionamento:\n"
-            f"- Insumos calculados ocupam {results['fermentador']['volume_insumos']:,.2f}L ({porcentagem_insumos:.1f}% do meio)\n"
-            f"- Água adicionada: {results['fermentador']['volume_agua']:,.2f}L ({porcentagem_agua:.1f}% do meio)\n"
-            f"- Volume total do meio: {results['fermentador']['volume_meio']:,.2f}L "
-            f"({100 - results['fermentador']['percentual_aeracao']:,.1f}% do reator)\n"
-            f"- Espaço para aeração: {results['fermentador']['percentual_aeracao']:,.1f}% do reator")
-
-            # Adiciona a tabela de água e sais necessários
-            st.subheader("Água e Sais Minerais Necessários")
-            insumos_df = pd.DataFrame({
-                'Parâmetro': ['Água (L)', 'Sais Minerais (kg)'],
-                'Frasco': [
-                    f"{results['agua_necessaria']['frasco']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['sais_necessarios']['frasco']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                ],
-                'Seed': [
-                    f"{results['agua_necessaria']['seed']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['sais_necessarios']['seed']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                ],
-                'Fermentador': [
-                    f"{results['agua_necessaria']['fermentador']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['sais_necessarios']['fermentador']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                ],
-                'Total': [
-                    f"{results['agua_necessaria']['total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                    f"{results['sais_necessarios']['total']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                ]
-            })
-            insumos_df = insumos_df.set_index('Parâmetro')
-            st.dataframe(insumos_df, use_container_width=True)
-
-    with tab2:
-        st.header("Cálculo Inverso: Quantidade de insumos necessários para a meta de produção")
-
-        # Organizar em 3 colunas com 4 linhas cada
         col1, col2, col3 = st.columns(3)
-        params_inv = {}
+        with col1:
+            frascos = st.text_input("Frascos (L)", value="1; 2; 5", key='frota_frascos')
+        with col2:
+            seeds = st.text_input("Seeds (L)", value="250; 500; 1000", key='frota_seeds')
+        with col3:
+            fermentadores = st.text_input("Fermentadores (L)", value="2500; 5000; 10000", key='frota_fermentadores')
+        if not st.button("Calcular capacidade", key='capacidade1'):
+            return
+        try:
+            frota = combinacoes_frota(ler_volumes(frascos), ler_volumes(seeds), ler_volumes(fermentadores))
+        except ValueError:
+            st.error("⚠️ Informe os volumes como números separados por ';'.")
+            return
+        if min(len(v) for v in frota.values()) == 0 or any((v <= 0).any() for v in frota.values()):
+            st.error("⚠️ Informe ao menos um volume positivo para cada etapa.")
+            return
+
+        import pandas as pd
+
+        try:
+            receita, results = capacidade_maxima(frota, st.session_state['params_direto'],
+                                                 st.session_state['composicao_direto'])
+        except ValueError as erro:
+            st.error(f"⚠️ {erro}")
+            return
+        df = pd.DataFrame({
+            'Frasco (L)': frota['volume_frasco'],
+            'Seed (L)': frota['volume_seed'],
+            'Fermentador (L)': frota['volume_fermentador'],
+            'Soforolipídeo Máx. (kg)': results['fermentador']['soforolipideo_produzido'],
+            'Concentração (g/L)': results['fermentador']['conc_soforolipideo'],
+            'Sacarose (kg)': receita['massa_sacarose_total'],
+            'Ureia (kg)': receita['massa_ureia_total'],
+            'Óleo (kg)': receita['massa_oleo_total'],
+            'Etapa Limitante': etapa_limitante(results),
+        }).sort_values('Soforolipídeo Máx. (kg)', ascending=False, ignore_index=True)
+        st.dataframe(df.style.format(precision=2, decimal=',', thousands='.'), use_container_width=True)
+
+@st.fragment
+@cronometrado('Bateladas repetidas (direto)')
+def painel_ciclos():
+    from ciclos import PARAMETROS_CICLOS, calcular_ciclos
+
+    with st.expander("Bateladas Repetidas (Retirada e Reposição)"):
+        st.caption(
+            "O primeiro ciclo é o lote atual (sem variação aleatória). Ao fim de cada ciclo a fração indicada do "
+            "caldo é colhida e reposta; a biomassa, o óleo residual, o açúcar não consumido e o soforolipídeo do "
+            "caldo que fica passam ao ciclo seguinte. No último ciclo o caldo inteiro é colhido."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            n_ciclos = st.number_input(PARAMETROS_CICLOS['n_ciclos'][1], min_value=1, max_value=500,
+                                       value=PARAMETROS_CICLOS['n_ciclos'][0], step=1, key='numero_ciclos')
+        with col2:
+            fracao = st.number_input(f"{PARAMETROS_CICLOS['fracao_retirada'][1]} (%)", min_value=1.0, max_value=100.0,
+                                     value=PARAMETROS_CICLOS['fracao_retirada'][0] * 100, format="%.1f",
+                                     key='retirada_ciclos') / 100
+        proporcional = st.checkbox(
+            "Repor com a receita inicial, proporcional à retirada", value=True,
+            help="Sem marcar, informe a sacarose, a ureia e o óleo adicionados a cada reposição.",
+            key='reposicao_proporcional'
+        )
+        params = dict(st.session_state['params_direto'], n_ciclos=n_ciclos, fracao_retirada=fracao)
+        if not proporcional:
+            colunas = st.columns(3)
+            rotulos = {'sacarose_reposicao': ('Sacarose por Reposição (kg)', 250.0),
+                       'ureia_reposicao': ('Ureia por Reposição (kg)', 12.5),
+                       'oleo_reposicao': ('Óleo por Reposição (kg)', 100.0)}
+            for coluna, (nome, (rotulo, padrao)) in zip(colunas, rotulos.items()):
+                with coluna:
+                    params[nome] = st.number_input(rotulo, min_value=0.0, value=padrao, format="%.2f", key=nome)
+        if not st.button("Simular ciclos", key='ciclos1'):
+            return
+
+        import pandas as pd
+
+        try:
+            resultado = calcular_ciclos(params, st.session_state['composicao_direto'])
+        except ValueError as erro:
+            st.error(f"⚠️ {erro}")
+            return
+        ciclos = resultado['ciclos']
+        campanha = resultado['campanha']
+        df = pd.DataFrame({
+            'Soforolipídeo Produzido (kg)': ciclos['soforolipideo_produzido'],
+            'Soforolipídeo Colhido (kg)': ciclos['soforolipideo_colhido'],
+            'Soforolipídeo Acumulado (kg)': ciclos['soforolipideo_acumulado'],
+            'Biomassa (kg)': ciclos['biomassa_total'],
+            'Açúcar Residual (kg)': ciclos['acucar_residual'],
+            'Óleo Residual (kg)': ciclos['oleo_residual'],
+            'Óleo Atendido (%)': ciclos['percentual_oleo'],
+            'Óleo Limitante': ciclos['limitante'],
+            'Aeração (%)': ciclos['percentual_aeracao'],
+            'Produtividade Acumulada (g/L·h)': ciclos['produtividade_acumulada'],
+        }, index=pd.RangeIndex(1, n_ciclos + 1, name='Ciclo'))
+
+        resumo = (
+            f"Soforolipídeo colhido na campanha: {float(campanha['soforolipideo_total']):,.2f} kg "
+            f"em {n_ciclos} ciclo(s) ({float(campanha['produtividade']):,.3f} g/L·h)\n"
+            f"- Ciclos com óleo limitante: {int(campanha['ciclos_limitados'])}\n"
+            f"- Menor espaço para aeração: {float(campanha['aeracao_minima']):,.1f}%"
+        )
+        if campanha['viavel']:
+            st.info(resumo)
+        else:
+            st.warning("⚠️ O meio ultrapassa o volume útil ou a aeração mínima em algum ciclo.\n" + resumo)
+        st.line_chart(df[['Soforolipídeo Acumulado (kg)', 'Óleo Residual (kg)', 'Açúcar Residual (kg)']])
+        st.dataframe(df.style.format(precision=2, decimal=',', thousands='.'), use_container_width=True)
+
+@st.fragment
+@cronometrado('Sensibilidade (direto)')
+def painel_sensibilidade():
+    # Construída só quando aberta: a tabela de faixas e os módulos da análise carregam o pandas
+    if not st.toggle("Análise de Sensibilidade Global (Sobol)", key='abrir_sensibilidade'):
+        return
+    import pandas as pd
+    from cenarios import INDICADORES
+    from downstream import PARAMETROS_DOWNSTREAM
+    from sensibilidade import MAX_ENTRADAS, SAIDAS_PADRAO, analisar_sensibilidade, faixas_padrao
+
+    with st.container(border=True):
+        st.caption(
+            "Índices de Sobol de primeira ordem (S1, efeito isolado da entrada) e totais (ST, incluindo as "
+            "interações) sobre as faixas abaixo, em unidades do modelo (proporções em fração). "
+            "As entradas não marcadas ficam nos valores atuais."
+        )
+        params = st.session_state['params_direto']
+        composicao_oleo = st.session_state['composicao_direto']
+        faixas = faixas_padrao(params, composicao_oleo)
+        # As frações do downstream começam desmarcadas, e nunca mais que MAX_ENTRADAS entradas marcadas
+        variar = [nome not in PARAMETROS_DOWNSTREAM for nome in faixas]
+        variar = [marcada and sum(variar[:i + 1]) <= MAX_ENTRADAS for i, marcada in enumerate(variar)]
+        tabela = st.data_editor(
+            pd.DataFrame({
+                'Variar': variar,
+                'Mínimo': [minimo for minimo, _ in faixas.values()],
+                'Máximo': [maximo for _, maximo in faixas.values()],
+            }, index=pd.Index(list(faixas), name='Entrada')),
+            use_container_width=True,
+            key='faixas_sensibilidade'
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            n = st.select_slider("Amostras base (n)", options=[2 ** k for k in range(10, 17)], value=2 ** 13,
+                                 key='amostras_sensibilidade')
+        with col2:
+            saidas = st.multiselect("Saídas", SAIDAS_PADRAO, default=SAIDAS_PADRAO, format_func=INDICADORES.get,
+                                    key='saidas_sensibilidade')
+        if not st.button("Calcular sensibilidade", key='sensibilidade1'):
+            return
+
+        selecionadas = tabela[tabela['Variar']]
+        if selecionadas.empty or not saidas:
+            st.error("⚠️ Selecione ao menos uma entrada e uma saída.")
+            return
+        if len(selecionadas) > MAX_ENTRADAS:
+            st.error(f"⚠️ Selecione no máximo {MAX_ENTRADAS} entradas.")
+            return
+        if (selecionadas['Máximo'] < selecionadas['Mínimo']).any():
+            st.error("⚠️ O máximo de cada faixa deve ser maior ou igual ao mínimo.")
+            return
+
+        faixas = dict(zip(selecionadas.index, zip(selecionadas['Mínimo'], selecionadas['Máximo'])))
+        # No servidor, num só processo: o cálculo vetorizado já é rápido e um pool por clique
+        # disputaria a máquina com as outras sessões (o pool fica para a linha de comando)
+        tabelas = analisar_sensibilidade(params, composicao_oleo, faixas, n, saidas, processos=1)
+        avaliacoes = f"{n * (len(faixas) + 2):,}".replace(',', '.')
+        st.caption(f"{avaliacoes} avaliações do modelo; intervalos de 95% por bootstrap.")
+        for saida, df in tabelas.items():
+            st.subheader(INDICADORES[saida])
+            st.bar_chart(df[['S1', 'ST']])
+            st.dataframe(df.sort_values('ST', ascending=False).style.format(precision=3, decimal=','),
+                         use_container_width=True)
+
+@st.fragment
+@cronometrado('Pareto')
+def painel_pareto():
+    import altair as alt
+    import pandas as pd
+    from pareto import CONSUMOS, DECISAO_PADRAO, OBJETIVOS, fronteira_pareto, receita_da_fronteira
+    from sensibilidade import faixas_padrao
+
+    st.caption(
+        "Candidatos gerados por uma sequência de Sobol nas faixas marcadas (demais entradas nos valores do "
+        "Cálculo Direto), avaliados pelo modelo sem variação aleatória. Só entram receitas viáveis (meio cabe "
+        "no volume com a aeração mínima). Clique num ponto para carregá-lo no Cálculo Direto."
+    )
+    params = st.session_state['params_direto']
+    composicao_oleo = st.session_state['composicao_direto']
+    faixas = faixas_padrao(params, composicao_oleo, variacao=0.5)
+    tabela = st.data_editor(
+        pd.DataFrame({
+            'Variar': [nome in DECISAO_PADRAO for nome in faixas],
+            'Mínimo': [minimo for minimo, _ in faixas.values()],
+            'Máximo': [maximo for _, maximo in faixas.values()],
+        }, index=pd.Index(list(faixas), name='Entrada')),
+        use_container_width=True,
+        key='faixas_pareto'
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        n = st.select_slider("Candidatos", options=[10_000, 100_000, 1_000_000, 2_000_000, 5_000_000], value=100_000,
+                             format_func=lambda v: f"{v:,}".replace(',', '.'), key='candidatos_pareto')
+    with col2:
+        objetivos = st.multiselect("Objetivos", list(OBJETIVOS), default=list(OBJETIVOS),
+                                   format_func=lambda o: OBJETIVOS[o][0], key='objetivos_pareto')
+
+    if st.button("Calcular fronteira", key='pareto1'):
+        selecionadas = tabela[tabela['Variar']]
+        if selecionadas.empty or len(objetivos) < 2:
+            st.error("⚠️ Selecione ao menos uma entrada e dois objetivos.")
+        elif (selecionadas['Máximo'] < selecionadas['Mínimo']).any():
+            st.error("⚠️ O máximo de cada faixa deve ser maior ou igual ao mínimo.")
+        else:
+            faixas = dict(zip(selecionadas.index, zip(selecionadas['Mínimo'], selecionadas['Máximo'])))
+            fronteira, total_viaveis = fronteira_pareto(params, composicao_oleo, faixas, n, tuple(objetivos))
+            st.session_state['pareto'] = {
+                'fronteira': fronteira, 'entradas': list(faixas), 'objetivos': objetivos,
+                'params': dict(params), 'composicao': list(composicao_oleo),
+                'candidatos': n, 'viaveis': total_viaveis, 'carregado': None,
+            }
+
+    resultado = st.session_state.get('pareto')
+    if resultado is None:
+        return
+    fronteira = resultado['fronteira']
+    contagens = [f"{v:,}".replace(',', '.') for v in (resultado['candidatos'], resultado['viaveis'], len(fronteira))]
+    st.caption("{} candidatos, {} viáveis, {} na fronteira.".format(*contagens))
+    if fronteira.empty:
+        st.warning("Nenhum candidato viável nas faixas informadas.")
+        return
+
+    objetivos = resultado['objetivos']
+    col_x, col_y, col_cor = st.columns(3)
+    with col_x:
+        eixo_x = st.selectbox("Eixo X", objetivos, index=0, format_func=lambda o: OBJETIVOS[o][0], key='eixo_x_pareto')
+    with col_y:
+        eixo_y = st.selectbox("Eixo Y", objetivos, index=1, format_func=lambda o: OBJETIVOS[o][0], key='eixo_y_pareto')
+    with col_cor:
+        cor = st.selectbox("Cor", objetivos, index=len(objetivos) - 1, format_func=lambda o: OBJETIVOS[o][0],
+                           key='cor_pareto')
+
+    selecao = alt.selection_point(name='ponto', fields=['indice'])
+    grafico = alt.Chart(fronteira.assign(indice=fronteira.index)).mark_circle(size=70).encode(
+        x=alt.X(eixo_x, title=OBJETIVOS[eixo_x][0], scale=alt.Scale(zero=False)),
+        y=alt.Y(eixo_y, title=OBJETIVOS[eixo_y][0], scale=alt.Scale(zero=False)),
+        color=alt.Color(cor, title=OBJETIVOS[cor][0]),
+        opacity=alt.condition(selecao, alt.value(1.0), alt.value(0.4)),
+        tooltip=['indice', *resultado['entradas'], *objetivos],
+    ).add_params(selecao)
+    evento = st.altair_chart(grafico, on_select='rerun', use_container_width=True, key='grafico_pareto')
+
+    pontos = evento.selection.get('ponto', []) if evento else []
+    if pontos and pontos[0].get('indice') != resultado['carregado']:
+        resultado['carregado'] = pontos[0]['indice']
+        linha = fronteira.loc[resultado['carregado'], resultado['entradas']]
+        carregar_no_direto(*receita_da_fronteira(resultado['params'], resultado['composicao'], linha))
+        st.rerun()
+    if resultado['carregado'] is not None:
+        st.success(f"Ponto {resultado['carregado']} carregado no Cálculo Direto.")
+
+    rotulos = {**{o: r for o, (r, _) in OBJETIVOS.items()}, **CONSUMOS}
+    st.dataframe(fronteira.rename(columns=rotulos).style.format(precision=2, decimal=',', thousands='.'),
+                 use_container_width=True)
+
+@st.fragment
+@cronometrado('Mistura de óleos (inverso)')
+def painel_mistura_oleos():
+    import pandas as pd
+    from mistura import carregar_oleos, mistura_por_efetividade, mistura_por_meta
+
+    with st.expander("Mistura de Óleos de Custo Mínimo"):
+        st.caption(
+            "Proporções de menor custo entre os óleos marcados, respeitando a disponibilidade, para atingir "
+            "a efetividade desejada ou fornecer o oleico necessário para a meta do cálculo inverso. "
+            "Metabolização do linoleico e do linolênico conforme a composição do óleo acima."
+        )
+        oleos = carregar_oleos()
+        rotulos_perfil = ['Oleico (%)', 'Linoleico (%)', 'Palmítico (%)', 'Linolênico (%)', 'Esteárico (%)']
+        tabela = st.data_editor(
+            pd.DataFrame(
+                [[True, *dados['perfil'], dados['preco'], dados['disponibilidade']] for dados in oleos.values()],
+                columns=['Usar', *rotulos_perfil, 'Preço (R$/kg)', 'Disponível (kg)'],
+                index=pd.Index(list(oleos), name='Óleo'),
+            ),
+            use_container_width=True,
+            key='oleos_mistura'
+        )
+        modo = st.radio("Restrição", ["Meta de soforolipídeo", "Efetividade alvo"], horizontal=True, key='modo_mistura')
+        if modo == "Efetividade alvo":
+            efetividade_alvo = st.number_input("Efetividade alvo (%)", value=50.0, min_value=0.0, max_value=100.0,
+                                               format="%.1f", key='efetividade_mistura')
+            # Massa positiva: a disponibilidade de cada óleo limita a proporção dele nessa massa
+            massa_oleo = st.number_input("Massa de óleo da batelada (kg)", value=500.0, min_value=0.1, format="%.1f",
+                                         key='massa_mistura')
+        if not st.button("Calcular mistura", key='mistura1'):
+            return
+
+        usados = tabela[tabela['Usar']]
+        if not 1 <= len(usados) <= 8:
+            st.error("⚠️ Marque de 1 a 8 óleos.")
+            return
+        if modo == "Efetividade alvo" and not massa_oleo > 0:
+            st.error("⚠️ Informe uma massa de óleo positiva.")
+            return
+        selecionados = {
+            nome: {
+                'perfil': tuple(linha[rotulos_perfil]),
+                'preco': linha['Preço (R$/kg)'],
+                'disponibilidade': linha['Disponível (kg)'] if linha['Disponível (kg)'] > 0 else np.inf,
+            }
+            for nome, linha in usados.iterrows()
+        }
+        composicao_oleo = st.session_state['composicao_inverso']
+        mLinoleic, mLinolenic = composicao_oleo[5], composicao_oleo[6]
+        if modo == "Efetividade alvo":
+            resultado = mistura_por_efetividade(efetividade_alvo / 100, mLinoleic, mLinolenic, massa_oleo,
+                                                oleos=selecionados)
+            massas = resultado['fracoes'] * massa_oleo
+            custo = resultado['preco_kg'] * massa_oleo
+        else:
+            params_inv = st.session_state['params_inverso']
+            resultado = mistura_por_meta(st.session_state['meta_inverso'], params_inv['rend_soforolipideo'],
+                                         mLinoleic, mLinolenic, oleos=selecionados)
+            massas = resultado['massas']
+            custo = resultado['custo']
+        if np.isnan(custo):
+            st.error("⚠️ Nenhuma mistura dos óleos marcados atende à restrição com a disponibilidade informada.")
+            return
+
+        total = massas.sum()
+        st.dataframe(
+            pd.DataFrame({'Massa (kg)': massas, 'Proporção (%)': massas / total * 100,
+                          'Custo (R$)': massas * usados['Preço (R$/kg)'].to_numpy()},
+                         index=usados.index).style.format(precision=2, decimal=',', thousands='.'),
+            use_container_width=True
+        )
+        perfil = ", ".join(
+            f"{rotulo.split(' ')[0]} {valor:.1f}%" for rotulo, valor in zip(rotulos_perfil, resultado['perfil'])
+        )
+        st.info(
+            f"Mistura: {total:,.2f} kg de óleo, R$ {custo:,.2f} (R$ {custo / total:,.2f}/kg)\n\n"
+            f"Composição resultante: {perfil}"
+        )
 
+def secao_salvar_cenario():
+    # Guarda as entradas atuais do cálculo direto no espaço de trabalho de cenários
+    cenarios = st.session_state.setdefault('cenarios', {})
+    col_nome, col_botao = st.columns([3, 1])
+    with col_nome:
+        nome = st.text_input("Nome do cenário", value=f"Cenário {len(cenarios) + 1}", key='nome_cenario')
+    with col_botao:
+        st.write("")
+        salvar = st.button("Salvar cenário", key='salvar_cenario')
+    if salvar:
+        nome = nome.strip()
+        if not nome:
+            st.error("⚠️ Informe um nome para o cenário.")
+        else:
+            cenarios[nome] = (dict(st.session_state['params_direto']), list(st.session_state['composicao_direto']))
+            st.session_state['versao_cenarios'] = st.session_state.get('versao_cenarios', 0) + 1
+            st.success(f"Cenário '{nome}' salvo. Veja a aba Cenários.")
+
+@st.fragment
+@cronometrado('Cenários')
+def painel_cenarios():
+    from cenarios import avaliar_cenarios, cenarios_da_tabela, comparar_cenarios, tabela_entradas
+
+    cenarios = st.session_state.setdefault('cenarios', {})
+    if not cenarios:
+        st.info("Nenhum cenário salvo. Use 'Salvar cenário' no Cálculo Direto.")
+        return
+
+    # A versão muda a cada inclusão/exclusão, para o editor não reaplicar edições em linhas erradas
+    versao = st.session_state.get('versao_cenarios', 0)
+
+    st.subheader("Entradas")
+    tabela = st.data_editor(tabela_entradas(cenarios), use_container_width=True, key=f'editor_cenarios_{versao}')
+    try:
+        cenarios.update(cenarios_da_tabela(tabela))
+    except ValueError as erro:
+        st.error(f"⚠️ {erro}")
+        return
+
+    col_sel, col_nome, col_clonar, col_excluir = st.columns([2, 2, 1, 1])
+    with col_sel:
+        selecionado = st.selectbox("Cenário", list(cenarios), key='cenario_selecionado')
+    with col_nome:
+        nome_clone = st.text_input("Nome do clone", value=f"{selecionado} (cópia)", key='nome_clone')
+    with col_clonar:
+        st.write("")
+        clonar = st.button("Clonar", key='clonar_cenario')
+    with col_excluir:
+        st.write("")
+        excluir = st.button("Excluir", key='excluir_cenario')
+    if clonar and nome_clone.strip():
+        params, composicao_oleo = cenarios[selecionado]
+        cenarios[nome_clone.strip()] = (dict(params), list(composicao_oleo))
+    if excluir:
+        del cenarios[selecionado]
+    if clonar or excluir:
+        st.session_state['versao_cenarios'] = versao + 1
+        st.rerun()
+
+    base = st.selectbox("Cenário base", list(cenarios), key='cenario_base')
+    resultados = avaliar_cenarios(cenarios, st.session_state.setdefault('cache_cenarios', {}))
+    valores, delta, delta_pct = comparar_cenarios(resultados, base)
+
+    formato = dict(precision=2, decimal=',', thousands='.', na_rep='–')
+    st.subheader("Comparação")
+    st.dataframe(valores.style.format(**formato), use_container_width=True)
+    st.subheader(f"Diferença em relação a '{base}'")
+    tipo = st.radio("Diferença", ["Absoluta", "Percentual (%)"], horizontal=True, key='tipo_delta', label_visibility='collapsed')
+    st.dataframe((delta if tipo == "Absoluta" else delta_pct).style.format(**formato), use_container_width=True)
+
+AJUDA_INSTANTANEA = (
+    "Mostra os principais resultados a cada alteração, interpolados da tabela pré-calculada "
+    "(gerada com python interpolacao.py) com o limite de erro; fora da tabela, pelo modelo exato."
+)
+
+# Seções do app: só a ativa é construída
+SECOES = ("Cálculo Direto", "Cálculo Inverso", "Cenários", "Fronteira de Pareto")
+# Widgets construídos em toda execução e os que não aceitam valor pela Session State API
+# (botões, editores de tabela, downloads e gráficos)
+NAO_PRESERVADOS = {
+    'secao', 'mostrar_tempos', 'calc1', 'calc2', 'capacidade1', 'ciclos1', 'sensibilidade1', 'pareto1', 'mistura1',
+    'salvar_cenario', 'clonar_cenario', 'excluir_cenario', 'faixas_sensibilidade', 'faixas_pareto',
+    'oleos_mistura', 'grafico_pareto',
+}
+PREFIXOS_NAO_PRESERVADOS = ('gerar_', 'baixar_', 'editor_cenarios_')
+
+def preservar_secoes(secao):
+    # Os widgets das seções ocultas não são recriados e o Streamlit descartaria o estado deles ao
+    # fim da execução; reatribuí-lo pela Session State API o mantém até a seção voltar. Ao trocar de
+    # seção, as chaves da anterior passam a ser preservadas; as da ativa deixam de ser, pois os
+    # widgets dela são recriados com esses valores
+    preservadas = st.session_state.setdefault('chaves_preservadas', {})
+    anterior = st.session_state.get('secao_anterior')
+    if anterior is not None and anterior != secao:
+        ja_preservadas = set().union(*preservadas.values())
+        preservadas[anterior] = {
+            chave for chave in st.session_state
+            if chave not in ja_preservadas and chave not in NAO_PRESERVADOS
+            and not chave.startswith(PREFIXOS_NAO_PRESERVADOS)
+        }
+    preservadas.pop(secao, None)
+    st.session_state['secao_anterior'] = secao
+    for chaves in preservadas.values():
+        for chave in chaves:
+            if chave in st.session_state:
+                st.session_state[chave] = st.session_state[chave]
+
+@cronometrado('Aplicação')
+def main():
+    st.title("Calculadora de Soforolipídeos")
 
-        # Coluna 1
-        with col1:
-            massa_soforolipideo_alvo = st.number_input("Meta Soforolipídeo (kg)", value=305.0, format="%.2f", key='sd2')
-            # ocupacao_maxima = st.number_input("Ocupação máxima por insumos (%)", 
-            #                       value=80.0, min_value=10.0, max_value=95.0, 
-            #                       format="%.1f", 
-            #                       help="Percentual máximo do volume do meio ocupado pelos insumos sólidos. O restante será água.", 
-            #                       key='om2')
-            # params_inv['ocupacao_maxima'] = ocupacao_maxima
-            espaco_aeracao = st.number_input("Espaço para aeração (%)", 
-                                 value=15.0, min_value=5.0, max_value=50.0, 
-                                 format="%.1f", 
-                                 help="Percentual do volume do fermentador reservado para aeração (headspace)", 
-                                 key='ea2')
-            porcentagem_agua = st.number_input(
-                'Porcentagem de Água no Meio (%)', 
-                value=60.0, 
-                min_value=15.0, 
-                max_value=90.0, 
-                format="%.1f",
-                help="Percentual do meio que será composto por água. O restante será ocupado pelos insumos.",
-                key='pam2'
-            )
-            params_inv['porcentagem_agua'] = porcentagem_agua / 100
-            params_inv['espaco_aeracao'] = espaco_aeracao
-            params_inv['ethanol_per_kg'] = st.number_input('Etanol por kg Soforolip. (L)', value=2.0, format="%.2f", key='epk2')
-            params_inv['hcl_per_l'] = st.number_input('HCl por L de Óleo (L/L)', value=2.0, format="%.2f", key='hpl2')
+    st.markdown("""
+    ### Disclaimers Iniciais
+    **Estequiometria:**
+    - **Biomassa:** 0.2 C₆H₁₂O₆ + 0.1 CH₄N₂O + 0.15 O₂ → 1 CH₁.₈O₀.₅N₀.₂ + 0.3 CO₂ + 0.5 H₂O
+    - **Soforolipídeo:** 4 C₆H₁₂O₆ + 1 C₁₈H₃₄O₂ + 10.5 O₂ → 10 CO₂ + 14 H₂O + 1 C₃₂H₅₄O₁₃
+    - Para cada 100 kg de óleo adicionado, apenas aproximadamente 36,7 kg são efetivamente convertidos em soforolipídeos.
+    - Hidrólise completa da sacarose: 1 mol de sacarose → 1 mol de glicose + 1 mol de frutose.
+    - Composição de sais minerais fixa: {} g/L total.
+    """.format(TOTAL_SAIS))
 
+    secao = st.radio("Seção", SECOES, horizontal=True, key='secao', label_visibility='collapsed')
+    preservar_secoes(secao)
+    # Numa execução completa os resultados do Calcular não são redesenhados
+    for grupo in ENTRADAS_GRUPO:
+        st.session_state.pop(f'calculado_{grupo}', None)
 
-        # Coluna 2
-        with col2:
-            params_inv['prop_glicose_biomassa'] = st.number_input('Prop. Glicose p/ Biomassa (%)', value=20.0, format="%.2f", key='pgb2') / 100
-            params_inv['rend_biomassa'] = st.number_input('Rend. Biomassa (g/g)', value=0.678, format="%.3f", 
-                                                          help="quanto de célula viva (biomassa) é gerado pra cada grama de glicose consumida. Ex: 0,678 g/g = a cada 100 g de glicose gera 67,8 g de biomassa.",
-                                                          key='rb2')
-            params_inv['rend_soforolipideo'] = st.number_input('Rend. Soforolipídeo (g/g)', value=0.722, format="%.3f",
-                                                               help="quanto de soforolipídeo é gerado para cada grama de glicose",
-                                                               key='rs2')
-            params_inv['ferment_time'] = st.number_input('Tempo Fermentação (h)', value=168.0, format="%.2f", key='ft2')
-
-        # Coluna 3
-        with col3:
-            params_inv['seed_time'] = st.number_input('Tempo Incubação Seed (h)', value=24.0, format="%.2f", key='st2')
-            
-            # Proporções de inóculo (usadas para calcular volume dos biorreatores)
-            prop_inoculo_frasco_perc = st.number_input('Prop. Inóculo Frasco→Seed (%)', 
-                                                    value=1.0, min_value=0.1, max_value=20.0, format="%.1f", 
-                                                    help="Percentual do volume do Seed que será inoculado a partir do frasco", 
-                                                    key='pif2')
-            params_inv['prop_inoculo_frasco'] = prop_inoculo_frasco_perc / 100
-            
-            prop_inoculo_seed_perc = st.number_input('Prop. Inóculo Seed→Ferm. (%)', 
-                                                value=10.0, min_value=1.0, max_value=30.0, format="%.1f", 
-                                                help="Percentual do volume do Fermentador que será inoculado a partir do seed", 
-                                                key='pis2')
-            params_inv['prop_inoculo_seed'] = prop_inoculo_seed_perc / 100
-            
-            # Fator de segurança para dimensionamento
-            fator_seguranca = st.number_input('Fator de Segurança (%)', 
-                                            value=10.0, min_value=0.0, max_value=200.0, format="%.1f", 
-                                            help="Percentual adicional de volume para garantir inóculo suficiente", 
-                                            key='fs2')
-            params_inv['fator_seguranca'] = fator_seguranca
-            
-        with st.expander("Composição do Óleo", expanded=False):
-            composicao_oleo_inv = [
-                st.number_input('Ácido Oleico (%)', value=25.0, format="%.2f", key='ao2'),
-                st.number_input('Ácido Linoleico (%)', value=55.0, format="%.2f", key='al2'),
-                st.number_input('Ácido Palmítico (%)', value=10.0, format="%.2f", key='ap2'),
-                st.number_input('Ácido Linolênico (%)', value=7.0, format="%.2f", key='aln2'),
-                st.number_input('Ácido Esteárico (%)', value=3.0, format="%.2f", key='ae2'),
-                st.number_input('Metabolização Linoleico (%)', value=20.0, format="%.2f", key='ml2'),
-                st.number_input('Metabolização Linolênico (%)', value=10.0, format="%.2f", key='mln2')
-            ]
-
-        if st.button("Calcular Inverso", key='calc2'):
-            if params_inv['rend_soforolipideo'] == 0:
-                st.error("⚠️ O rendimento de soforolipídeo não pode ser zero.")
-            else:
-                # Calcula tamanhos dos biorreatores
-                params_inv = calcular_biorreatores_inverso(massa_soforolipideo_alvo, params_inv, composicao_oleo_inv)
-
-                porcentagem_agua = params_inv.get('porcentagem_agua', 0.60) * 100
-                porcentagem_insumos = 100 - porcentagem_agua
-                st.info(
-                    f"Informações sobre dimensionamento:\n"
-                    f"- Insumos calculados ocupam {params_inv['volume_insumos']:.2f}L ({porcentagem_insumos:.1f}% do meio)\n"
-                    f"- Água adicionada: {params_inv['volume_agua']:.2f}L ({porcentagem_agua:.1f}% do meio)\n"
-                    f"- Volume total do meio: {params_inv['volume_meio']:.2f}L ({100-params_inv['porcentagem_aeracao']:.1f}% do reator)\n"
-                    f"- Espaço para aeração: {params_inv['porcentagem_aeracao']:.1f}% do reator\n"
-                    f"- Água gerada durante as reações: {params_inv['agua_gerada']:.2f}L"
-                )
+    if secao == "Cálculo Direto":
+        st.header("Parâmetros - Cálculo Direto")
+        ao_vivo_direto = st.toggle(
+            "Modo ao vivo",
+            key='ao_vivo1',
+            help="Atualiza os resultados automaticamente a cada alteração (cálculo sem a variação aleatória)."
+        )
+        st.toggle("Resposta instantânea", key='ri1', help=AJUDA_INSTANTANEA)
+        area_entradas = st.container()
+        area_oleo = st.container()
+        estimativa = st.empty()
+        instantanea = st.empty()
+        aviso = st.empty()
+        with area_entradas:
+            painel_entradas_direto(estimativa, instantanea, aviso)
+        with area_oleo:
+            painel_oleo_direto(estimativa, instantanea, aviso)
+        secao_salvar_cenario()
+        if ao_vivo_direto:
+            painel_ao_vivo_direto(*preparar_ao_vivo('direto', PAINEIS_DIRETO))
+            if 'resultado_direto' in st.session_state:
+                secao_exportacao('direto', *st.session_state['resultado_direto'])
+        else:
+            painel_resultados_direto(aviso)
+        painel_capacidade()
+        painel_ciclos()
+        painel_sensibilidade()
+
+    elif secao == "Cálculo Inverso":
+        st.header("Cálculo Inverso: Quantidade de insumos necessários para a meta de produção")
+        ao_vivo_inverso = st.toggle(
+            "Modo ao vivo",
+            key='ao_vivo2',
+            help="Atualiza os resultados automaticamente a cada alteração (cálculo sem a variação aleatória)."
+        )
+        st.toggle("Resposta instantânea", key='ri2', help=AJUDA_INSTANTANEA)
+        area_entradas = st.container()
+        area_oleo = st.container()
+        instantanea = st.empty()
+        aviso = st.empty()
+        with area_entradas:
+            painel_entradas_inverso(instantanea, aviso)
+        with area_oleo:
+            painel_oleo_inverso(instantanea, aviso)
+        painel_mistura_oleos()
+        if ao_vivo_inverso:
+            painel_ao_vivo_inverso(*preparar_ao_vivo('inverso', PAINEIS_INVERSO))
+            if 'resultado_inverso' in st.session_state:
+                secao_exportacao('inverso', *st.session_state['resultado_inverso'])
+        else:
+            painel_resultados_inverso(aviso)
+
+    elif secao == "Cenários":
+        st.header("Cenários")
+        painel_cenarios()
 
-                # Exibe os tamanhos calculados dos biorreatores
-                st.header("Biorreatores dimensionados para atingir a meta:")
-                biorreatores_df = pd.DataFrame({
-                    'Biorreator': ['Frasco', 'Seed', 'Fermentador'],
-                    'Volume Calculado (L)': [
-                        f"{params_inv['volume_frasco']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{params_inv['volume_seed']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{params_inv['volume_fermentador']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    ]
-                })
-                st.dataframe(biorreatores_df, use_container_width=True)
-
-                st.success(f"Concentração resultante de soforolipídeos: {params_inv['concentracao_resultante']:.2f} g/L")
-                
-                # Glicose necessária para atingir a meta
-                glicose_necessaria = massa_soforolipideo_alvo / params_inv['rend_soforolipideo']  # kg
-                
-                # Mols de glicose
-                mols_glicose = glicose_necessaria / (MM['glicose'] / 1000)  # mol
-                
-                # Mols de ácido oleico necessários
-                mols_oleico_necessario = mols_glicose / 4
-                
-                # Massa de ácido oleico necessária
-                massa_oleico_necessaria = mols_oleico_necessario * (MM['acidoOleico'] / 1000)  # kg
-                
-                # Composição do óleo e fatores de metabolização
-                pOleic = composicao_oleo_inv[0]
-                pLinoleic = composicao_oleo_inv[1]
-                pLinolenic = composicao_oleo_inv[3]
-                mLinoleic = composicao_oleo_inv[5]
-                mLinolenic = composicao_oleo_inv[6]
-                
-                # Efetividade total do óleo com base na composição
-                efetividade = (
-                    (pOleic / 100)
-                    + (pLinoleic / 100) * (mLinoleic / 100)
-                    + (pLinolenic / 100) * (mLinolenic / 100)
-                )
-                
-                # Massa de óleo total necessária para fornecer o ácido oleico requerido
-                massa_oleo_total_necessaria = massa_oleico_necessaria / efetividade  # kg
-                
-                # Sacarose equivalente
-                sacarose_equivalente = glicose_necessaria * MM['sacarose'] / MM['glicose'] / 2  # kg
-                
-                # Mostrar resultados em tabela resumo
-                st.subheader("Resultado estimado para atingir a meta:")
-                resumo_df = pd.DataFrame({
-                    'Descrição': [
-                        'Glicose necessária (kg)',
-                        'Sacarose total necessária (kg)',
-                        'Ureia total necessária (kg)',
-                        'Ácido oleico necessário (kg)',
-                        'Efetividade do óleo (%)',
-                        'Óleo total necessário (kg)',
-                        'Sacarose equivalente (kg)'
-                    ],
-                    'Valor': [
-                        f"{glicose_necessaria:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{params_inv['massa_sacarose_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{params_inv['massa_ureia_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{massa_oleico_necessaria:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{efetividade * 100:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{massa_oleo_total_necessaria:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{sacarose_equivalente:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    ]
-                })
-                st.dataframe(resumo_df, use_container_width=True)
-                
-                # Calcular resultados completos
-                params_inv['massa_oleo_total'] = massa_oleo_total_necessaria
-                results = calcular_processo(params_inv, composicao_oleo_inv)
-                
-                st.header("Resultados Detalhados")
-                if results['frasco']['volume_excedido']:
-                    st.warning("Atenção: Volume total de insumos excede o volume do frasco!")
-                if results['seed']['volume_excedido']:
-                    st.warning("Atenção: Volume total de insumos excede o volume do seed!")
-                if results['fermentador']['volume_excedido']:
-                    st.warning("Atenção: Volume total de insumos excede o volume do fermentador!")
-                if not results['fermentador']['aeracao_suficiente']:
-                    st.warning(
-                        f"⚠️ Espaço para aeração insuficiente no fermentador!\n"
-                        f"- Percentual disponível: {results['fermentador']['percentual_aeracao']:.1f}%\n"
-                        f"- Mínimo recomendado: 15.0%"
-                    )
-
-                st.subheader("Resumo Comparativo")
-
-                # Inversão de eixos - etapas nas colunas, parâmetros nas linhas
-                df = pd.DataFrame({
-                    'Parâmetro': [
-                        'Volume (L)',
-                        'Sacarose Consumida (kg)',
-                        'Ureia Consumida (kg)',
-                        'Açúcares Fermentáveis (kg)',
-                        'Biomassa Produzida (kg)',
-                        'Óleo Total (kg)',
-                        'Óleo Metabolizável (kg)',
-                        'Óleo Consumido (kg)',
-                        'Óleo Residual (kg)',
-                        'Etanol (L)',
-                        'HCl (L)',
-                        'Volume Insumos (L)',
-                        'Volume Água (L)',
-                        'Espaço para Aeração (%)'
-                    ],
-                    'Frasco': [
-                        f"{results['frasco']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['volume_insumos']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['volume_agua']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['frasco']['percentual_aeracao']:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        "0,00",
-                        "0,00",
-                        "0,00",
-                        "0,00",
-                        "0,00",
-                        "0,00"
-                    ],
-                    'Seed': [
-                        f"{results['seed']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['volume_insumos']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['volume_agua']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['seed']['percentual_aeracao']:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        "0,00",
-                        "0,00",
-                        "0,00",
-                        "0,00",
-                        "0,00",
-                        "0,00"
-                    ],
-                    'Fermentador': [
-                        f"{results['fermentador']['volume']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['sacarose_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['ureia_consumida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['acucares_fermentaveis']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['biomassa_produzida']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['volume_insumos']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['volume_agua']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['percentual_aeracao']:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{params_inv['massa_oleo_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['oleo_efetivo']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['oleo_consumido']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['oleo_residual']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['ethanol']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['fermentador']['hcl']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-
-                    ]
-                })
+    else:
+        st.header("Fronteira de Pareto")
+        painel_pareto()
 
-                # Configure o DataFrame para mostrar o parâmetro como índice para melhor visualização
-                df = df.set_index('Parâmetro')
-                st.dataframe(df, use_container_width=True, height=400)
-
-                # st.info(f"Informações adicionais:\n"
-                # f"- Água mínima necessária para reações: {results['agua_minima_reacao']:.2f} kg\n"
-                # f"- Espaço disponível para aeração: {results['percentual_aeracao']:.1f}%\n"
-                # f"- Espaço mínimo recomendado: 15.0%")
-
-                # st.info(f"Informações adicionais:\n"
-                # f"- Água gerada durante as reações: {results['agua_gerada']:,.2f} kg\n"
-                # f"- Espaço para aeração no fermentador: {results['fermentador']['percentual_aeracao']:,.1f}%\n"
-                # f"- Espaço mínimo recomendado: 15.0%\n"
-                # f"- Percentual de meio no fermentador: {100 - results['fermentador']['percentual_aeracao']:,.1f}%")
-
-                # Adiciona a tabela de água e sais necessários
-                st.subheader("Água e Sais Minerais Necessários")
-                insumos_df = pd.DataFrame({
-                    'Parâmetro': ['Água (L)', 'Sais Minerais (kg)'],
-                    'Frasco': [
-                        f"{results['agua_necessaria']['frasco']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['sais_necessarios']['frasco']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    ],
-                    'Seed': [
-                        f"{results['agua_necessaria']['seed']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['sais_necessarios']['seed']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    ],
-                    'Fermentador': [
-                        f"{results['agua_necessaria']['fermentador']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['sais_necessarios']['fermentador']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    ],
-                    'Total': [
-                        f"{results['agua_necessaria']['total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-                        f"{results['sais_necessarios']['total']:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                    ]
-                })
-                insumos_df = insumos_df.set_index('Parâmetro')
-                st.dataframe(insumos_df, use_container_width=True)
+    painel_desempenho()
 
 if __name__ == "__main__":
     main()
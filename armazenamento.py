@@ -0,0 +1,225 @@
+import ast
+import json
+import operator
+import os
+import sys
+
+import numpy as np
+
+from lote import MascaraCompacta, achatar_entradas, achatar_resultados, calcular_processo_lote
+
+# Armazenamento de resultados fora da memória: um diretório com um arquivo binário por coluna
+# (as colunas achatadas de achatar_entradas/achatar_resultados) e um schema.json com os tipos.
+# A escrita anexa bloco a bloco direto no disco; a leitura usa np.memmap, então fatias e
+# filtros só tocam as linhas e colunas consultadas.
+# No modo compacto os floats são gravados em float32 e os booleanos como bits (tipo 'bits').
+
+ARQUIVO_SCHEMA = 'schema.json'
+TAMANHO_BLOCO_CONSULTA = 1_000_000
+
+
+def _tipo_armazenado(dtype, compacto):
+    if compacto and dtype == bool:
+        return 'bits'
+    if compacto and dtype.kind == 'f':
+        return np.dtype(np.float32).str
+    return dtype.str
+
+
+class EscritorResultados:
+    def __init__(self, diretorio, compacto=False):
+        self.diretorio = diretorio
+        self.compacto = compacto
+        self.linhas = 0
+        self._tipos = None
+        self._arquivos = {}
+        self._resto = {}  # bits que ainda não completam um byte, por coluna 'bits'
+        os.makedirs(diretorio, exist_ok=True)
+        if os.path.exists(os.path.join(diretorio, ARQUIVO_SCHEMA)):
+            raise FileExistsError(f"Já existe um armazenamento em {diretorio!r}.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def anexar(self, colunas):
+        # colunas: {nome: array 1-D}, todas do mesmo tamanho; o primeiro bloco define o schema
+        colunas = {k: np.asarray(v) for k, v in colunas.items()}
+        n = len(next(iter(colunas.values())))
+        if self._tipos is None:
+            self._tipos = {k: _tipo_armazenado(v.dtype, self.compacto) for k, v in colunas.items()}
+            self._resto = {k: np.empty(0, dtype=bool) for k, tipo in self._tipos.items() if tipo == 'bits'}
+            with open(os.path.join(self.diretorio, ARQUIVO_SCHEMA), 'w', encoding='utf-8') as arquivo:
+                json.dump({'colunas': self._tipos}, arquivo, indent=1)
+            self._arquivos = {k: open(os.path.join(self.diretorio, f'{k}.bin'), 'wb') for k in self._tipos}
+        elif colunas.keys() != self._tipos.keys():
+            raise ValueError("O bloco não tem as mesmas colunas do armazenamento.")
+
+        for nome, valor in colunas.items():
+            if len(valor) != n:
+                raise ValueError(f"Coluna {nome!r} com {len(valor)} linhas; esperado {n}.")
+            if self._tipos[nome] == 'bits':
+                valor = np.concatenate([self._resto[nome], valor.astype(bool, copy=False)])
+                completos = len(valor) // 8 * 8
+                np.packbits(valor[:completos]).tofile(self._arquivos[nome])
+                self._resto[nome] = valor[completos:]
+            else:
+                np.ascontiguousarray(valor, dtype=self._tipos[nome]).tofile(self._arquivos[nome])
+        self.linhas += n
+
+    def fechar(self):
+        for nome, resto in self._resto.items():
+            if len(resto):
+                np.packbits(resto).tofile(self._arquivos[nome])
+        self._resto = {}
+        for arquivo in self._arquivos.values():
+            arquivo.close()
+        self._arquivos = {}
+
+
+class LeitorResultados:
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, ARQUIVO_SCHEMA), encoding='utf-8') as arquivo:
+            self.tipos = {k: (v if v == 'bits' else np.dtype(v)) for k, v in json.load(arquivo)['colunas'].items()}
+        # Linhas completas em todas as colunas (um bloco interrompido no meio é ignorado)
+        self.linhas = min(
+            os.path.getsize(self._caminho(nome)) * 8 if tipo == 'bits'
+            else os.path.getsize(self._caminho(nome)) // tipo.itemsize
+            for nome, tipo in self.tipos.items()
+        )
+        self._mapas = {}
+
+    def __len__(self):
+        return self.linhas
+
+    @property
+    def colunas(self):
+        return list(self.tipos)
+
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, f'{nome}.bin')
+
+    def resolver(self, nome):
+        # Aceita o nome completo ('fermentador_limitante') ou o campo, se não for ambíguo ('limitante')
+        if nome in self.tipos:
+            return nome
+        candidatos = [c for c in self.tipos if c.endswith(f'_{nome}')]
+        if len(candidatos) != 1:
+            raise KeyError(
+                f"Coluna {nome!r} " + ("ambígua: " + ", ".join(candidatos) if candidatos else "não encontrada.")
+            )
+        return candidatos[0]
+
+    def coluna(self, nome):
+        nome = self.resolver(nome)
+        if nome not in self._mapas:
+            if self.linhas == 0:
+                return np.empty(0, dtype=self._dtype(nome))
+            if self.tipos[nome] == 'bits':
+                # Fatias desempacotam só os bytes necessários
+                bits = np.memmap(self._caminho(nome), dtype=np.uint8, mode='r')
+                self._mapas[nome] = MascaraCompacta.de_bits(bits, self.linhas)
+            else:
+                self._mapas[nome] = np.memmap(self._caminho(nome), dtype=self.tipos[nome], mode='r', shape=(self.linhas,))
+        return self._mapas[nome]
+
+    def _dtype(self, nome):
+        return np.dtype(bool) if self.tipos[nome] == 'bits' else self.tipos[nome]
+
+    def fatia(self, inicio=0, fim=None, colunas=None):
+        colunas = self.colunas if colunas is None else [self.resolver(c) for c in colunas]
+        return {c: np.array(self.coluna(c)[inicio:fim]) for c in colunas}
+
+    def iterar_consulta(self, expressao, colunas=None, tamanho_bloco=TAMANHO_BLOCO_CONSULTA):
+        # Gera, bloco a bloco, {'linha': índices, coluna: valores} das linhas que satisfazem a expressão
+        arvore = ast.parse(expressao, mode='eval').body
+        colunas = self.colunas if colunas is None else [self.resolver(c) for c in colunas]
+        for inicio in range(0, self.linhas, tamanho_bloco):
+            fim = min(inicio + tamanho_bloco, self.linhas)
+            mascara = np.broadcast_to(_avaliar(arvore, lambda nome: self.coluna(nome)[inicio:fim]), (fim - inicio,))
+            selecionadas = np.flatnonzero(mascara)
+            if selecionadas.size:
+                bloco = {'linha': selecionadas + inicio}
+                bloco.update({c: self.coluna(c)[inicio:fim][selecionadas] for c in colunas})
+                yield bloco
+
+    def consultar(self, expressao, colunas=None, tamanho_bloco=TAMANHO_BLOCO_CONSULTA):
+        # Como iterar_consulta, mas concatena o resultado (que precisa caber na memória)
+        blocos = list(self.iterar_consulta(expressao, colunas, tamanho_bloco))
+        nomes = ['linha'] + (self.colunas if colunas is None else [self.resolver(c) for c in colunas])
+        if not blocos:
+            return {n: np.empty(0, dtype=np.int64 if n == 'linha' else self._dtype(n)) for n in nomes}
+        return {n: np.concatenate([b[n] for b in blocos]) for n in nomes}
+
+    def contar(self, expressao, tamanho_bloco=TAMANHO_BLOCO_CONSULTA):
+        return sum(len(b['linha']) for b in self.iterar_consulta(expressao, [], tamanho_bloco))
+
+
+# Expressões de filtro: comparações, and/or/not e aritmética sobre colunas e constantes,
+# avaliadas de forma vetorizada (sem eval)
+_OPERADORES = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.Pow: operator.pow, ast.Mod: operator.mod,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+}
+
+
+def _avaliar(no, coluna):
+    if isinstance(no, ast.BoolOp):
+        valores = [_avaliar(v, coluna) for v in no.values]
+        combinar = np.logical_and if isinstance(no.op, ast.And) else np.logical_or
+        resultado = valores[0]
+        for valor in valores[1:]:
+            resultado = combinar(resultado, valor)
+        return resultado
+    if isinstance(no, ast.UnaryOp):
+        valor = _avaliar(no.operand, coluna)
+        if isinstance(no.op, (ast.Not, ast.Invert)):
+            return np.logical_not(valor)
+        if isinstance(no.op, ast.USub):
+            return -valor
+        return valor
+    if isinstance(no, ast.Compare):
+        resultado = True
+        esquerda = _avaliar(no.left, coluna)
+        for op, comparador in zip(no.ops, no.comparators):
+            if type(op) not in _OPERADORES:
+                raise ValueError(f"Comparação não suportada: {ast.unparse(no)!r}")
+            direita = _avaliar(comparador, coluna)
+            resultado = np.logical_and(resultado, _OPERADORES[type(op)](esquerda, direita))
+            esquerda = direita
+        return resultado
+    if isinstance(no, ast.BinOp) and type(no.op) in _OPERADORES:
+        return _OPERADORES[type(no.op)](_avaliar(no.left, coluna), _avaliar(no.right, coluna))
+    if isinstance(no, ast.Name):
+        return coluna(no.id)
+    if isinstance(no, ast.Constant) and isinstance(no.value, (bool, int, float)):
+        return no.value
+    raise ValueError(f"Expressão de filtro não suportada: {ast.unparse(no)!r}")
+
+
+def gravar_varredura(diretorio, blocos, compacto=False):
+    # Avalia blocos (params, composicao_oleo) de exportacao.dividir_em_blocos e grava entradas e resultados
+    with EscritorResultados(diretorio, compacto) as escritor:
+        for params, composicao_oleo in blocos:
+            results = calcular_processo_lote(params, composicao_oleo, compacto=compacto)
+            escritor.anexar({**achatar_entradas(params, composicao_oleo), **achatar_resultados(results)})
+    return escritor.linhas
+
+
+if __name__ == "__main__":
+    # Uso: python armazenamento.py <diretório> "limitante == False and conc_soforolipideo > 60" [colunas...]
+    leitor = LeitorResultados(sys.argv[1])
+    expressao, colunas = sys.argv[2], sys.argv[3:]
+    print(f"{leitor.contar(expressao):,} de {len(leitor):,} linhas satisfazem o filtro")
+    if colunas:
+        # Primeiras linhas encontradas
+        bloco = next(leitor.iterar_consulta(expressao, colunas), None)
+        for i in range(min(20, 0 if bloco is None else len(bloco['linha']))):
+            print({k: v[i].item() for k, v in bloco.items()})
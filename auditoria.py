@@ -0,0 +1,146 @@
+import sys
+
+import numpy as np
+
+from SF_calculator import MM
+from lote import ETAPAS
+
+# Auditoria do balanço de massa: verifica, linha a linha e de forma vetorizada,
+# invariantes que a variação aleatória e os limites mínimos de calcular_processo
+# podem quebrar. Aceita as colunas '<etapa>_<campo>' de achatar_resultados
+# (dicionário de arrays ou DataFrame).
+
+# Átomos de C e N por mol de cada espécie
+# Biomassa: CH₁.₈O₀.₅N₀.₂ | Ureia: CH₄N₂O | Soforolipídeo: C₃₂H₅₄O₁₃ | Ácido oleico: C₁₈H₃₄O₂
+CARBONO = {'glicose': 6, 'ureia': 1, 'biomassa': 1, 'acidoOleico': 18, 'soforolipideo': 32}
+NITROGENIO = {'ureia': 2, 'biomassa': 0.2}
+
+# 1 mol sacarose (342 g) -> 1 mol glicose (180 g) + 1 mol frutose (180 g)
+RAZAO_HIDROLISE = (MM['glicose'] + MM['frutose']) / MM['sacarose']
+
+
+def _mols(massa_kg, especie):
+    return massa_kg / (MM[especie] / 1000)
+
+
+def desvios_balanco(colunas):
+    # Retorna {invariante: (desvio, referencia, unidade)}; desvio > 0 indica quebra do invariante
+    def c(nome):
+        return np.asarray(colunas[nome], dtype=float)
+
+    desvios = {}
+    for etapa in ETAPAS:
+        acucares = c(f'{etapa}_acucares_fermentaveis')
+        ureia = c(f'{etapa}_ureia_consumida')
+        biomassa = c(f'{etapa}_biomassa_produzida')
+
+        # Hidrólise: açúcares fermentáveis = sacarose × 360/342
+        esperado = c(f'{etapa}_sacarose_consumida') * RAZAO_HIDROLISE
+        desvios[f'hidrolise_{etapa}'] = (np.abs(acucares - esperado), esperado, 'kg')
+
+        # Carbono: produtos não podem conter mais carbono que os substratos (o resto vira CO₂)
+        carbono_substratos = _mols(acucares, 'glicose') * CARBONO['glicose'] + _mols(ureia, 'ureia') * CARBONO['ureia']
+        carbono_produtos = _mols(biomassa, 'biomassa') * CARBONO['biomassa']
+        if etapa == 'fermentador':
+            carbono_substratos = carbono_substratos + _mols(c('fermentador_oleo_consumido'), 'acidoOleico') * CARBONO['acidoOleico']
+            carbono_produtos = carbono_produtos + _mols(c('fermentador_soforolipideo_produzido'), 'soforolipideo') * CARBONO['soforolipideo']
+        desvios[f'carbono_{etapa}'] = (np.maximum(0.0, carbono_produtos - carbono_substratos), carbono_substratos, 'mol C')
+
+        # Nitrogênio: todo o N da biomassa produzida vem da ureia
+        nitrogenio_ureia = _mols(ureia, 'ureia') * NITROGENIO['ureia']
+        nitrogenio_biomassa = _mols(biomassa, 'biomassa') * NITROGENIO['biomassa']
+        desvios[f'nitrogenio_{etapa}'] = (np.maximum(0.0, nitrogenio_biomassa - nitrogenio_ureia), nitrogenio_ureia, 'mol N')
+
+    # Divisão dos açúcares do fermentador entre biomassa e soforolipídeo
+    acucares_ferm = c('fermentador_acucares_fermentaveis')
+    soma = c('fermentador_acucares_biomassa') + c('fermentador_acucares_soforo')
+    desvios['divisao_acucares'] = (np.abs(soma - acucares_ferm), acucares_ferm, 'kg')
+
+    # Óleo: consumido <= efetivo <= inicial
+    oleo_efetivo = c('fermentador_oleo_efetivo')
+    oleo_inicial = c('fermentador_oleo_inicial')
+    oleo_consumido = c('fermentador_oleo_consumido')
+    desvios['oleo_consumido'] = (np.maximum(0.0, oleo_consumido - oleo_efetivo), oleo_efetivo, 'kg')
+    desvios['oleo_efetivo'] = (np.maximum(0.0, oleo_efetivo - oleo_inicial), oleo_inicial, 'kg')
+
+    # Soforolipídeo: 1 mol de ácido oleico por mol de soforolipídeo
+    mols_soforo = _mols(c('fermentador_soforolipideo_produzido'), 'soforolipideo')
+    mols_oleico = _mols(oleo_consumido, 'acidoOleico')
+    desvios['soforo_oleo'] = (np.maximum(0.0, mols_soforo - mols_oleico), mols_oleico, 'mol')
+
+    # Água gerada: 14 mol H₂O/mol soforolipídeo + 0.5 mol H₂O/mol biomassa
+    mols_biomassa = _mols(c('fermentador_biomassa_total'), 'biomassa')
+    agua_esperada = (mols_soforo * 14 + mols_biomassa * 0.5) * 18 / 1000
+    desvios['agua_gerada'] = (np.abs(c('agua_gerada') - agua_esperada), agua_esperada, 'kg')
+
+    # Downstream (quando calculado): soforolipídeo produzido = recuperado + perdas das unidades
+    if 'downstream_soforolipideo_final' in colunas:
+        produzido = c('fermentador_soforolipideo_produzido')
+        saidas = c('downstream_soforolipideo_final') + sum(
+            c(f'downstream_perda_{unidade}') for unidade in ('separacao', 'extracao', 'purga', 'secagem')
+        )
+        desvios['downstream'] = (np.abs(saidas - produzido), produzido, 'kg')
+
+    return desvios
+
+
+def linhas_violadas(desvios, tol_rel=1e-6, tol_abs=1e-9):
+    # Máscara booleana por invariante: desvio acima de tol_abs + tol_rel × |referência|
+    return {
+        nome: desvio > tol_abs + tol_rel * np.abs(referencia)
+        for nome, (desvio, referencia, _) in desvios.items()
+    }
+
+
+def auditar_balanco(colunas, tol_rel=1e-6, tol_abs=1e-9):
+    # Resumo por invariante: nº de linhas violadas, maior desvio (absoluto e relativo) e onde ocorre
+    import pandas as pd
+
+    desvios = desvios_balanco(colunas)
+    violadas = linhas_violadas(desvios, tol_rel, tol_abs)
+    linhas = []
+    for nome, (desvio, referencia, unidade) in desvios.items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relativo = np.where(referencia != 0, desvio / np.abs(referencia), np.where(desvio > 0, np.inf, 0.0))
+        pior = int(np.argmax(desvio)) if desvio.size else -1
+        linhas.append({
+            'invariante': nome,
+            'unidade': unidade,
+            'violacoes': int(np.count_nonzero(violadas[nome])),
+            'fracao_violada': float(np.mean(violadas[nome])) if desvio.size else 0.0,
+            'desvio_max': float(desvio[pior]) if desvio.size else 0.0,
+            'desvio_medio': float(np.mean(desvio)) if desvio.size else 0.0,
+            'desvio_rel_max': float(np.max(relativo)) if desvio.size else 0.0,
+            'pior_linha': pior,
+        })
+    return pd.DataFrame(linhas).set_index('invariante')
+
+
+def _ler_tabelas(caminho):
+    # Lê as tabelas 'etapas', 'agua_sais' e 'reagentes' de um pacote gerado por exportacao.exportar_lote
+    import io
+    import zipfile
+
+    import pandas as pd
+
+    colunas = {}
+    with zipfile.ZipFile(caminho) as pacote:
+        for nome in pacote.namelist():
+            if not nome.startswith(('etapas.', 'agua_sais.', 'reagentes.')):
+                continue
+            with pacote.open(nome) as arquivo:
+                if nome.endswith('.parquet'):
+                    tabela = pd.read_parquet(io.BytesIO(arquivo.read()))
+                else:
+                    tabela = pd.read_csv(arquivo)
+            colunas.update({k: tabela[k].to_numpy() for k in tabela.columns})
+    return colunas
+
+
+if __name__ == "__main__":
+    # Uso: python auditoria.py resultados.zip
+    import pandas as pd
+
+    resumo = auditar_balanco(_ler_tabelas(sys.argv[1]))
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(resumo)
@@ -0,0 +1,100 @@
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from lote import (
+    CAMPOS_OLEO,
+    ERRO_ABSOLUTO_COMPACTO,
+    ERRO_RELATIVO_COMPACTO,
+    achatar_resultados,
+    calcular_processo_lote,
+    compactar_colunas,
+)
+
+# Compara o modo compacto (float32 + bits) com o cálculo em float64: tempo, memória de pico,
+# tamanho dos resultados e o erro de cada coluna em relação ao limite documentado em lote.py.
+# Uso: python benchmark_compacto.py [número de cenários]
+
+# Receita de referência dos benchmarks dos módulos (python ciclos.py, downstream.py, pareto.py):
+# cada um varia sobre ela as entradas que mede
+PARAMETROS_PADRAO = {
+    'volume_frasco': 1.0, 'volume_seed': 500.0, 'volume_fermentador': 5000.0, 'porcentagem_aeracao': 20.0,
+    'porcentagem_agua': 0.6, 'prop_glicose_biomassa': 0.2, 'hcl_per_l': 2.0, 'rend_biomassa': 0.678,
+    'rend_soforolipideo': 0.722, 'ferment_time': 168.0, 'prop_inoculo_frasco': 0.01, 'seed_time': 24.0,
+    'prop_inoculo_seed': 0.1, 'ethanol_per_kg': 2.0, 'massa_sacarose_total': 500.0, 'massa_ureia_total': 25.0,
+    'massa_oleo_total': 200.0,
+}
+COMPOSICAO_PADRAO = (25.0, 55.0, 10.0, 7.0, 3.0, 20.0, 10.0)
+
+FAIXAS = {
+    'volume_frasco': (0.5, 10), 'volume_seed': (50, 2000), 'volume_fermentador': (500, 20000),
+    'massa_sacarose_total': (50, 3000), 'massa_ureia_total': (2, 150), 'massa_oleo_total': (10, 2000),
+    'porcentagem_aeracao': (15, 40), 'porcentagem_agua': (0.4, 0.85), 'prop_glicose_biomassa': (0.05, 0.5),
+    'rend_biomassa': (0.3, 0.8), 'rend_soforolipideo': (0.3, 0.9), 'ferment_time': (72, 240),
+    'seed_time': (12, 48), 'prop_inoculo_frasco': (0.005, 0.05), 'prop_inoculo_seed': (0.05, 0.2),
+    'hcl_per_l': (1, 3), 'ethanol_per_kg': (1, 3),
+}
+
+
+def varredura(n, semente=0):
+    rng = np.random.default_rng(semente)
+    params = {k: rng.uniform(a, b, n) for k, (a, b) in FAIXAS.items()}
+    acidos = rng.dirichlet(np.ones(5), n).T * 100
+    metabolizacao = rng.uniform(0, 40, (2, n))
+    return params, [*acidos, *metabolizacao]
+
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    tempo = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, tempo, pico
+
+
+def main(n):
+    params, composicao_oleo = varredura(n)
+    assert len(composicao_oleo) == len(CAMPOS_OLEO)
+
+    ref, tempo64, pico64 = medir(lambda: achatar_resultados(calcular_processo_lote(params, composicao_oleo)))
+    cmp, tempo32, pico32 = medir(lambda: compactar_colunas(
+        achatar_resultados(calcular_processo_lote(params, composicao_oleo, compacto=True))
+    ))
+    bytes64 = sum(v.nbytes for v in ref.values())
+    bytes32 = sum(v.nbytes for v in cmp.values())
+
+    print(f"{n:,} cenários")
+    print(f"{'':<22}{'float64':>12}{'compacto':>12}{'razão':>8}")
+    print(f"{'tempo (s)':<22}{tempo64:>12.3f}{tempo32:>12.3f}{tempo32 / tempo64:>8.2f}")
+    print(f"{'pico de memória (MB)':<22}{pico64 / 1e6:>12.1f}{pico32 / 1e6:>12.1f}{pico32 / pico64:>8.2f}")
+    print(f"{'resultados (MB)':<22}{bytes64 / 1e6:>12.1f}{bytes32 / 1e6:>12.1f}{bytes32 / bytes64:>8.2f}")
+
+    print(f"\nErro (limite: {ERRO_RELATIVO_COMPACTO:g} relativo + {ERRO_ABSOLUTO_COMPACTO:g} absoluto)")
+    dentro = True
+    erros = []
+    for nome, valor in ref.items():
+        compacto = np.asarray(cmp[nome])
+        if valor.dtype == bool:
+            divergentes = int(np.count_nonzero(valor != compacto))
+            if divergentes:
+                erros.append((np.inf, nome, f"{divergentes} booleanos divergentes (valor no limite)"))
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            erro = np.abs(compacto.astype(np.float64) - valor)
+            relativo = np.where(valor != 0, erro / np.abs(valor), 0.0)
+        fora = erro > ERRO_RELATIVO_COMPACTO * np.abs(valor) + ERRO_ABSOLUTO_COMPACTO
+        dentro &= not fora.any()
+        texto = f"rel. máx. {np.nanmax(relativo):.2e}  abs. máx. {erro.max():.2e}"
+        erros.append((np.nanmax(relativo), nome, texto + (f"  FORA: {int(fora.sum())}" if fora.any() else "")))
+    for _, nome, texto in sorted(erros, key=lambda e: e[0], reverse=True)[:10]:
+        print(f"  {nome:<40}{texto}")
+    print("Todas as colunas dentro do limite." if dentro else "Há colunas fora do limite!")
+    return dentro
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000) else 1)
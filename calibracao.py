@@ -0,0 +1,254 @@
+import argparse
+import functools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lote import CAMPOS_OLEO, calcular_processo_lote
+
+# Calibração de rend_biomassa, rend_soforolipideo, mLinoleic e mLinolenic a partir do histórico
+# de bateladas (entradas + concentrações medidas), por mínimos quadrados.
+#
+# O modelo de processo é avaliado uma única vez por batelada para obter as grandezas que não
+# dependem dos parâmetros calibrados (glicose destinada ao soforolipídeo, óleo necessário, massas
+# de cada ácido graxo, biomassa por unidade de rendimento). Com elas a concentração prevista é
+#     conc = rend_soforolipideo * min(G, G * efetivo / necessario) * 1000 / volume_fermentador
+#     efetivo = oleico + mLinoleic/100 * linoleico + mLinolenic/100 * linolenico
+# (o mesmo ramo limitante de calc_soforolipideo), e o ajuste é um Levenberg-Marquardt com
+# jacobiano analítico, vetorizado sobre todas as reamostragens bootstrap de uma vez.
+
+ARQUIVO_CALIBRACAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parametros_calibrados.json')
+
+# Colunas medidas no CSV do histórico
+MEDIDA_SOFOROLIPIDEO = 'conc_soforolipideo_medida'  # g/L no fermentador
+MEDIDA_BIOMASSA = 'conc_biomassa_medida'  # g/L no fermentador (opcional)
+
+COLUNAS_OBRIGATORIAS = (
+    'volume_frasco', 'volume_seed', 'volume_fermentador',
+    'massa_sacarose_total', 'massa_ureia_total', 'massa_oleo_total',
+    'pOleic', 'pLinoleic', 'pLinolenic', MEDIDA_SOFOROLIPIDEO,
+)
+# Parâmetros que não afetam as concentrações medidas ou têm valor usual na planta
+PADROES = {
+    'prop_glicose_biomassa': 0.20, 'prop_inoculo_frasco': 0.01, 'prop_inoculo_seed': 0.10,
+    'porcentagem_agua': 0.60, 'porcentagem_aeracao': 20.0, 'ferment_time': 168.0, 'seed_time': 24.0,
+    'hcl_per_l': 2.0, 'ethanol_per_kg': 2.0,
+}
+INICIAL = {'rend_biomassa': 0.678, 'rend_soforolipideo': 0.722, 'mLinoleic': 20.0, 'mLinolenic': 10.0}
+LIMITES_METABOLIZACAO = (0.0, 100.0)  # %
+# A metabolização do linoleico e do linolênico só afeta bateladas limitadas por óleo: com menos
+# que isso no histórico ela não é identificável e fica fora dos parâmetros calibrados
+MINIMO_LIMITADAS_POR_OLEO = 2
+METABOLIZACAO = ('mLinoleic', 'mLinolenic')
+
+
+def ler_historico(caminho):
+    import pandas as pd
+
+    tabela = pd.read_csv(caminho)
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in tabela.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no histórico: {', '.join(faltando)}")
+    tabela = tabela.dropna(subset=list(COLUNAS_OBRIGATORIAS))
+    return {c: tabela[c].to_numpy(dtype=float) for c in tabela.columns if tabela[c].dtype.kind in 'fiu'}
+
+
+def _entradas(historico, rend_biomassa, rend_soforolipideo, mLinoleic, mLinolenic):
+    # params/composicao_oleo de calcular_processo_lote para as bateladas do histórico
+    n = len(historico[MEDIDA_SOFOROLIPIDEO])
+    params = {k: historico.get(k, np.full(n, v)) for k, v in PADROES.items()}
+    params.update({c: historico[c] for c in COLUNAS_OBRIGATORIAS[:6]})
+    params.update(rend_biomassa=rend_biomassa, rend_soforolipideo=rend_soforolipideo)
+    composicao = [historico.get(c, np.zeros(n)) for c in CAMPOS_OLEO[:5]] + [mLinoleic, mLinolenic]
+    return params, composicao
+
+
+def grandezas_modelo(historico):
+    # Avalia o modelo com rendimentos unitários e metabolização nula: o que sobra é linear nos parâmetros
+    ferm = calcular_processo_lote(*_entradas(historico, 1.0, 1.0, 0.0, 0.0))['fermentador']
+
+    oleo = historico['massa_oleo_total']
+    return {
+        'glicose': np.asarray(ferm['acucares_soforo'], dtype=float),
+        'necessario': np.asarray(ferm['oleo_necessario'], dtype=float),
+        'oleico': historico['pOleic'] / 100 * oleo,
+        'linoleico': historico['pLinoleic'] / 100 * oleo,
+        'linolenico': historico['pLinolenic'] / 100 * oleo,
+        'escala': 1000 / historico['volume_fermentador'],
+        # Biomassa final com rend_biomassa = 1 (proporcional ao rendimento, longe dos limites mínimos)
+        'biomassa': np.asarray(ferm['conc_biomassa'], dtype=float),
+    }
+
+
+def _previsao(g, rend, mL, mLn, derivadas=True):
+    # rend, mL, mLn: (B, 1); retorna concentração prevista e derivadas (B, N)
+    efetivo = g['oleico'] + mL / 100 * g['linoleico'] + mLn / 100 * g['linolenico']
+    limitante = efetivo < g['necessario']
+    base = np.where(limitante, g['glicose'] * efetivo / g['necessario'], g['glicose']) * g['escala']
+    if not derivadas:
+        return rend * base
+    derivada = np.where(limitante, g['glicose'] / g['necessario'] * g['escala'], 0.0) / 100
+    return rend * base, base, rend * derivada * g['linoleico'], rend * derivada * g['linolenico']
+
+
+def ajustar_soforolipideo(g, medida, pesos, max_iter=200, tol=1e-10):
+    # Levenberg-Marquardt em (rend_soforolipideo, mLinoleic, mLinolenic) para cada linha de `pesos` (B, N)
+    b = pesos.shape[0]
+    theta = np.tile([INICIAL['rend_soforolipideo'], INICIAL['mLinoleic'], INICIAL['mLinolenic']], (b, 1))
+    amortecimento = np.full(b, 1e-3)
+    convergido = np.zeros(b, dtype=bool)
+
+    def custo(theta):
+        prev = _previsao(g, theta[:, :1], theta[:, 1:2], theta[:, 2:3], derivadas=False)
+        return np.einsum('bn,bn->b', pesos, (prev - medida) ** 2)
+
+    atual = custo(theta)
+    for _ in range(max_iter):
+        prev, *jac = _previsao(g, theta[:, :1], theta[:, 1:2], theta[:, 2:3])
+        J = np.stack(jac, axis=-1)  # (B, N, 3)
+        Jp = (J * pesos[..., None]).transpose(0, 2, 1)
+        JtJ = Jp @ J
+        gradiente = (Jp @ (prev - medida)[..., None])[..., 0]
+        diagonal = np.einsum('bii->bi', JtJ)
+        sistema = JtJ + (amortecimento[:, None] * diagonal + 1e-12)[:, :, None] * np.eye(3)
+        passo = -np.linalg.solve(sistema, gradiente[..., None])[..., 0]
+
+        candidato = theta + passo
+        candidato[:, 0] = np.maximum(candidato[:, 0], 0.0)
+        candidato[:, 1:] = np.clip(candidato[:, 1:], *LIMITES_METABOLIZACAO)
+        novo = custo(candidato)
+        melhorou = novo < atual
+        theta = np.where(melhorou[:, None], candidato, theta)
+        convergido |= melhorou & (atual - novo <= tol * atual) | (amortecimento > 1e10)
+        atual = np.where(melhorou, novo, atual)
+        amortecimento = np.where(melhorou, amortecimento / 3, amortecimento * 10)
+        if convergido.all():
+            break
+    return theta
+
+
+def ajustar_biomassa(g, medida, pesos):
+    # Mínimos quadrados em forma fechada: conc_biomassa = rend_biomassa * biomassa
+    valido = ~np.isnan(medida)
+    x = np.where(valido, g['biomassa'], 0.0)
+    y = np.where(valido, medida, 0.0)
+    return (pesos @ (x * y)) / (pesos @ (x * x))
+
+
+def _ajustar(g, medidas, pesos):
+    theta = ajustar_soforolipideo(g, medidas['soforolipideo'], pesos)
+    ajuste = {
+        'rend_soforolipideo': theta[:, 0],
+        'mLinoleic': theta[:, 1],
+        'mLinolenic': theta[:, 2],
+    }
+    if medidas.get('biomassa') is not None:
+        ajuste['rend_biomassa'] = ajustar_biomassa(g, medidas['biomassa'], pesos)
+    return ajuste
+
+
+def _ajustar_reamostragens(g, medidas, semente, inicio, quantidade):
+    # Pesos bootstrap = contagens de uma reamostragem com reposição (multinomial)
+    n = len(medidas['soforolipideo'])
+    rng = np.random.default_rng([semente, inicio])
+    pesos = rng.multinomial(n, np.full(n, 1 / n), size=quantidade).astype(float)
+    return _ajustar(g, medidas, pesos)
+
+
+def calibrar(historico, reamostragens=1000, nivel=0.95, processos=None, semente=0, tamanho_bloco=100):
+    g = grandezas_modelo(historico)
+    medidas = {
+        'soforolipideo': historico[MEDIDA_SOFOROLIPIDEO],
+        'biomassa': historico.get(MEDIDA_BIOMASSA),
+    }
+    n = len(medidas['soforolipideo'])
+    estimativa = {k: float(v[0]) for k, v in _ajustar(g, medidas, np.ones((1, n))).items()}
+
+    # Bootstrap em blocos de reamostragens, distribuídos entre processos
+    blocos = [(inicio, min(tamanho_bloco, reamostragens - inicio)) for inicio in range(0, reamostragens, tamanho_bloco)]
+    processos = processos or os.cpu_count() or 1
+    if processos > 1 and len(blocos) > 1:
+        with ProcessPoolExecutor(processos) as executor:
+            partes = list(executor.map(_ajustar_reamostragens, *zip(*[(g, medidas, semente, i, q) for i, q in blocos])))
+    else:
+        partes = [_ajustar_reamostragens(g, medidas, semente, i, q) for i, q in blocos]
+    amostras = {k: np.concatenate([p[k] for p in partes]) for k in estimativa}
+
+    cauda = (1 - nivel) / 2 * 100
+    intervalos = {k: [float(x) for x in np.percentile(v, [cauda, 100 - cauda])] for k, v in amostras.items()}
+
+    # Conferência com o modelo de processo completo nos parâmetros calibrados
+    params, composicao = _entradas(
+        historico, estimativa.get('rend_biomassa', INICIAL['rend_biomassa']), estimativa['rend_soforolipideo'],
+        estimativa['mLinoleic'], estimativa['mLinolenic'],
+    )
+    previsto = np.asarray(calcular_processo_lote(params, composicao)['fermentador']['conc_soforolipideo'])
+    residuo = previsto - medidas['soforolipideo']
+    limitadas = int(np.count_nonzero(
+        g['oleico'] + estimativa['mLinoleic'] / 100 * g['linoleico'] + estimativa['mLinolenic'] / 100 * g['linolenico']
+        < g['necessario']
+    ))
+
+    # Sem bateladas limitadas por óleo o gradiente da metabolização é nulo e o ajuste devolve o
+    # valor inicial, que não deve ser gravado como calibrado
+    nao_identificados = []
+    if limitadas < MINIMO_LIMITADAS_POR_OLEO:
+        for nome in METABOLIZACAO:
+            estimativa.pop(nome)
+            intervalos[nome] = [float('nan'), float('nan')]
+            nao_identificados.append(nome)
+
+    return {
+        'parametros': estimativa,
+        'intervalos': intervalos,
+        'nivel_confianca': nivel,
+        'reamostragens': reamostragens,
+        'bateladas': n,
+        'rmse_conc_soforolipideo': float(np.sqrt(np.mean(residuo ** 2))),
+        'bateladas_limitadas_por_oleo': limitadas,
+        'nao_identificados': nao_identificados,
+    }
+
+
+def salvar_calibracao(calibracao, caminho=ARQUIVO_CALIBRACAO):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(calibracao, arquivo, indent=2, ensure_ascii=False)
+
+
+@functools.lru_cache(maxsize=4)
+def _ler_calibracao(caminho, modificacao):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo).get('parametros', {})
+
+
+def carregar_calibracao(caminho=ARQUIVO_CALIBRACAO):
+    # Parâmetros calibrados ({} se a calibração ainda não foi feita); relido quando o arquivo muda
+    try:
+        modificacao = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return {}
+    return _ler_calibracao(caminho, modificacao)
+
+
+if __name__ == "__main__":
+    # Uso: python calibracao.py historico.csv [--reamostragens 1000] [--saida parametros_calibrados.json]
+    parser = argparse.ArgumentParser(description="Calibra rendimentos e metabolização do óleo com o histórico de bateladas.")
+    parser.add_argument('historico')
+    parser.add_argument('--reamostragens', type=int, default=1000)
+    parser.add_argument('--processos', type=int, default=None)
+    parser.add_argument('--saida', default=ARQUIVO_CALIBRACAO)
+    args = parser.parse_args()
+
+    calibracao = calibrar(ler_historico(args.historico), args.reamostragens, processos=args.processos)
+    salvar_calibracao(calibracao, args.saida)
+    for nome, valor in calibracao['parametros'].items():
+        baixo, alto = calibracao['intervalos'][nome]
+        print(f"{nome:<20}{valor:>10.4f}   IC {calibracao['nivel_confianca']:.0%}: [{baixo:.4f}, {alto:.4f}]")
+    print(f"RMSE conc. soforolipídeo: {calibracao['rmse_conc_soforolipideo']:.3f} g/L "
+          f"({calibracao['bateladas']} bateladas, {calibracao['bateladas_limitadas_por_oleo']} limitadas por óleo)")
+    for nome in calibracao['nao_identificados']:
+        print(f"Aviso: {nome} não calibrado ({calibracao['bateladas_limitadas_por_oleo']} bateladas limitadas por óleo; "
+              f"mínimo {MINIMO_LIMITADAS_POR_OLEO}). O valor atual do app é mantido.")
+    print(f"Parâmetros gravados em {args.saida}")
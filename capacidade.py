@@ -0,0 +1,80 @@
+import numpy as np
+
+from lote import ETAPAS, calcular_processo_lote
+
+# Capacidade máxima de uma frota de reatores existente (o problema oposto ao de
+# calcular_biorreatores_inverso): com os volumes fixos, qual a maior produção de
+# soforolipídeo por batelada e com qual receita?
+#
+# A receita é escalada pela massa total de sacarose `s`. A ureia mantém a proporção
+# ureia/sacarose dos parâmetros e o óleo é o necessário para que não seja limitante
+# (óleo a mais só ocupa volume; a menos limita a produção). A viabilidade
+# (meio dentro do volume e aeração acima do mínimo em todas as etapas) só piora com `s`,
+# então a maior `s` viável é encontrada por bisseção, simultaneamente para toda a frota.
+
+AERACAO_MINIMA = 15.0  # %
+DENSIDADE_SACAROSE = 1.56  # kg/L
+
+
+def combinacoes_frota(frascos, seeds, fermentadores):
+    # Todas as combinações de volumes do catálogo, como arrays 1-D
+    f, s, F = np.meshgrid(
+        np.asarray(frascos, dtype=float), np.asarray(seeds, dtype=float), np.asarray(fermentadores, dtype=float),
+        indexing='ij'
+    )
+    return {'volume_frasco': f.ravel(), 'volume_seed': s.ravel(), 'volume_fermentador': F.ravel()}
+
+
+def _receita(massa_sacarose, params, composicao_oleo, razao_ureia):
+    # Parâmetros para uma massa de sacarose, com o óleo exatamente no necessário
+    p = dict(params, massa_sacarose_total=massa_sacarose, massa_ureia_total=massa_sacarose * razao_ureia,
+             massa_oleo_total=1.0)
+    sondagem = calcular_processo_lote(p, composicao_oleo)['fermentador']
+    efetividade = sondagem['oleo_efetivo']  # óleo metabolizável por kg de óleo
+    if np.any(efetividade <= 0):
+        raise ValueError("O óleo informado não tem ácidos graxos metabolizáveis; não há receita de óleo possível.")
+    p['massa_oleo_total'] = sondagem['oleo_necessario'] / efetividade
+    return p
+
+
+def _viavel(results, aeracao_minima):
+    viavel = True
+    for etapa in ETAPAS:
+        r = results[etapa]
+        viavel = viavel & ~r['volume_excedido'] & (r['percentual_aeracao'] >= aeracao_minima)
+    return viavel
+
+
+def capacidade_maxima(volumes, params, composicao_oleo, tol=1e-6, max_iter=100):
+    # volumes: {'volume_frasco', 'volume_seed', 'volume_fermentador'} (escalares ou arrays da frota).
+    # Retorna (params da receita ótima, results) como arrays, um elemento por combinação.
+    params = dict(params, **{k: np.asarray(v, dtype=float) for k, v in volumes.items()})
+    params.pop('usar_proporcoes_fixas', None)
+    # Sem sacarose nos parâmetros não há proporção a manter: a receita vai sem ureia
+    sacarose = np.asarray(params['massa_sacarose_total'], dtype=float)
+    razao_ureia = np.divide(params['massa_ureia_total'], sacarose, out=np.zeros(np.shape(sacarose)), where=sacarose > 0)
+    aeracao_minima = np.maximum(AERACAO_MINIMA, params.get('porcentagem_aeracao', 20.0))
+
+    volume_total = params['volume_frasco'] + params['volume_seed'] + params['volume_fermentador']
+    forma = np.shape(volume_total)
+    # Limites: nada de sacarose é sempre viável; sacarose pura ocupando todos os reatores nunca é
+    baixo = np.zeros(forma)
+    alto = np.broadcast_to(volume_total * DENSIDADE_SACAROSE, forma).copy()
+
+    for _ in range(max_iter):
+        meio = (baixo + alto) / 2
+        viavel = _viavel(calcular_processo_lote(_receita(meio, params, composicao_oleo, razao_ureia), composicao_oleo),
+                         aeracao_minima)
+        baixo = np.where(viavel, meio, baixo)
+        alto = np.where(viavel, alto, meio)
+        if np.all(alto - baixo <= tol * np.maximum(alto, 1.0)):
+            break
+
+    receita = _receita(baixo, params, composicao_oleo, razao_ureia)
+    return receita, calcular_processo_lote(receita, composicao_oleo)
+
+
+def etapa_limitante(results):
+    # Etapa com a menor folga de aeração na receita ótima (a que impede aumentar a produção)
+    folgas = np.stack([np.asarray(results[etapa]['percentual_aeracao'], dtype=float) for etapa in ETAPAS])
+    return np.asarray(ETAPAS)[np.argmin(folgas, axis=0)]
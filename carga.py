@@ -0,0 +1,216 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Teste de carga: várias sessões simuladas do app rodando ao mesmo tempo, dirigidas pelo framework
+# de testes do Streamlit (AppTest). O AppTest usa um Runtime global e não pode rodar em várias
+# threads, então cada sessão é um processo: os processos disputam a CPU como as sessões do
+# servidor, e CPU e memória saem medidos por sessão. Os caches (st.cache_data) não são
+# compartilhados entre processos, então a capacidade medida é uma estimativa conservadora.
+# Cada sessão abre o app, altera entradas e aciona calc1/calc2 (trocando de seção); cada execução é anexada a um
+# histórico JSONL para comparar a capacidade entre versões.
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_APP = os.path.join(DIRETORIO, 'SF_calculator.py')
+ARQUIVO_HISTORICO = os.path.join(DIRETORIO, 'historico_carga.jsonl')
+PERCENTIS = (50, 90, 95, 99)
+TEMPO_LIMITE = 120  # s por reexecução
+
+
+def memoria_processo():
+    # RSS atual do processo (MB); sem /proc, o pico informado pelo sistema
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError):
+        return memoria_pico()
+
+
+def memoria_pico():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1e6 if sys.platform == 'darwin' else pico / 1e3
+
+
+def tempo_cpu():
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    return uso.ru_utime + uso.ru_stime
+
+
+def sessao(indice, iteracoes, semente, largada):
+    # Roteiro de uma sessão (executado num processo próprio); retorna as medidas
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng([semente, indice])
+    medidas = []
+    memoria_base = memoria_processo()
+    largada.wait()  # todas as sessões começam juntas
+    cpu_inicial = tempo_cpu()
+
+    def executar(acao, funcao):
+        inicio = time.perf_counter()
+        at = funcao()
+        medidas.append({'acao': acao, 'ms': (time.perf_counter() - inicio) * 1000})
+        if at.exception:
+            raise RuntimeError(f"{acao}: {at.exception[0].value}")
+        return at
+
+    erro = None
+    aplicacao = []
+    try:
+        at = executar('abertura', lambda: AppTest.from_file(ARQUIVO_APP, default_timeout=TEMPO_LIMITE).run())
+        for _ in range(iteracoes):
+            # Cálculo direto: altera volume e sacarose e calcula
+            executar('secao', lambda: at.radio(key='secao').set_value("Cálculo Direto").run())
+            executar('entrada_direto', lambda: at.number_input(key='vferm1').set_value(float(rng.uniform(3000, 8000))).run())
+            executar('entrada_direto', lambda: at.number_input(key='cs1').set_value(float(rng.uniform(60, 140))).run())
+            executar('calc1', lambda: at.button(key='calc1').click().run())
+            # Cálculo inverso: altera a meta e calcula
+            executar('secao', lambda: at.radio(key='secao').set_value("Cálculo Inverso").run())
+            executar('entrada_inverso', lambda: at.number_input(key='sd2').set_value(float(rng.uniform(150, 600))).run())
+            executar('calc2', lambda: at.button(key='calc2').click().run())
+        aplicacao = [t['ms'] for t in at.session_state['tempos_execucao'] if t['painel'] == 'Aplicação']
+    except Exception as excecao:  # a sessão falha sozinha; as demais continuam
+        erro = f"{type(excecao).__name__}: {excecao}"
+
+    return {
+        'medidas': medidas,
+        'aplicacao_ms': aplicacao,
+        'cpu_s': tempo_cpu() - cpu_inicial,
+        'memoria_base_mb': memoria_base,
+        'memoria_pico_mb': memoria_pico(),
+        'erro': erro,
+    }
+
+
+def executar_carga(sessoes=4, iteracoes=3, semente=0):
+    with multiprocessing.Manager() as gerente:
+        largada = gerente.Barrier(sessoes + 1)
+        with ProcessPoolExecutor(sessoes, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futuros = [executor.submit(sessao, i, iteracoes, semente, largada) for i in range(sessoes)]
+            largada.wait()
+            inicio = time.perf_counter()
+            grupo = [f.result() for f in futuros]
+            duracao = time.perf_counter() - inicio
+
+    medidas = pd.DataFrame([m for s in grupo for m in s['medidas']], columns=['acao', 'ms'])
+    latencias = {}
+    grupos = [('todas', medidas['ms'])] + list(medidas.groupby('acao')['ms']) if len(medidas) else []
+    for acao, tempos in grupos:
+        valores = np.percentile(tempos, PERCENTIS)
+        latencias[acao] = {f'p{p}': float(v) for p, v in zip(PERCENTIS, valores)}
+        latencias[acao].update(n=int(len(tempos)), max=float(tempos.max()))
+    aplicacao = [ms for s in grupo for ms in s['aplicacao_ms']]
+
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versao': versao_codigo(),
+        'sessoes': sessoes,
+        'iteracoes': iteracoes,
+        'nucleos': os.cpu_count(),
+        'duracao_s': duracao,
+        'reexecucoes_por_s': len(medidas) / duracao if duracao else 0.0,
+        'latencia_ms': latencias,
+        'aplicacao_ms': {f'p{p}': float(v) for p, v in zip(PERCENTIS, np.percentile(aplicacao, PERCENTIS))} if aplicacao else {},
+        'cpu_s_por_sessao': float(np.mean([s['cpu_s'] for s in grupo])),
+        'memoria_mb': {
+            # Processo de uma sessão: após importar o framework e no pico; o acréscimo é o custo da sessão
+            'base': float(np.mean([s['memoria_base_mb'] for s in grupo])),
+            'pico': float(np.max([s['memoria_pico_mb'] for s in grupo])),
+            'por_sessao': float(np.mean([s['memoria_pico_mb'] - s['memoria_base_mb'] for s in grupo])),
+        },
+        'erros': [s['erro'] for s in grupo if s['erro']],
+    }
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def registrar(resultado, caminho=ARQUIVO_HISTORICO):
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def ler_historico(caminho=ARQUIVO_HISTORICO):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding='utf-8') as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def relatorio(historico):
+    # Uma linha por execução: capacidade (reexecuções/s), latências, CPU e memória por sessão
+    linhas = []
+    for r in historico:
+        todas = r['latencia_ms'].get('todas', {})
+        linhas.append({
+            'data': r['data'],
+            'versão': r['versao'],
+            'sessões': r['sessoes'],
+            'reexec./s': r['reexecucoes_por_s'],
+            'p50 (ms)': todas.get('p50'),
+            'p95 (ms)': todas.get('p95'),
+            'p99 (ms)': todas.get('p99'),
+            'calc1 p95': r['latencia_ms'].get('calc1', {}).get('p95'),
+            'calc2 p95': r['latencia_ms'].get('calc2', {}).get('p95'),
+            'CPU/sessão (s)': r['cpu_s_por_sessao'],
+            'MB/sessão': r['memoria_mb']['por_sessao'],
+            'erros': len(r['erros']),
+        })
+    return pd.DataFrame(linhas)
+
+
+def imprimir_resultado(resultado):
+    print(f"{resultado['sessoes']} sessões x {resultado['iteracoes']} iterações em {resultado['duracao_s']:.1f} s "
+          f"({resultado['reexecucoes_por_s']:.1f} reexecuções/s, {resultado['nucleos']} núcleo(s))")
+    tabela = pd.DataFrame(resultado['latencia_ms']).T[['n', *[f'p{p}' for p in PERCENTIS], 'max']]
+    print("\nLatência por ação (ms, tempo de parede visto pela sessão)")
+    print(tabela.round(1).to_string())
+    if resultado['aplicacao_ms']:
+        print("Execução do script no servidor (ms): "
+              + ", ".join(f"{k} {v:.1f}" for k, v in resultado['aplicacao_ms'].items()))
+    memoria = resultado['memoria_mb']
+    print(f"\nCPU por sessão: {resultado['cpu_s_por_sessao']:.2f} s")
+    print(f"Memória por sessão: {memoria['por_sessao']:.1f} MB acima da base de {memoria['base']:.0f} MB "
+          f"(pico de um processo: {memoria['pico']:.0f} MB)")
+    for erro in resultado['erros']:
+        print(f"ERRO: {erro}")
+
+
+if __name__ == "__main__":
+    # Uso: python carga.py [--sessoes 8] [--iteracoes 3] [--sem-historico]
+    #      python carga.py --relatorio   (só mostra o histórico)
+    parser = argparse.ArgumentParser(description="Teste de carga do app com sessões simuladas.")
+    parser.add_argument('--sessoes', type=int, default=4)
+    parser.add_argument('--iteracoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--historico', default=ARQUIVO_HISTORICO)
+    parser.add_argument('--sem-historico', action='store_true')
+    parser.add_argument('--relatorio', action='store_true')
+    args = parser.parse_args()
+
+    if not args.relatorio:
+        resultado = executar_carga(args.sessoes, args.iteracoes, args.semente)
+        imprimir_resultado(resultado)
+        if not args.sem_historico:
+            registrar(resultado, args.historico)
+    historico = ler_historico(args.historico)
+    if historico:
+        print("\nHistórico")
+        print(relatorio(historico).tail(20).round(1).to_string(index=False))
+    sys.exit(1 if not args.relatorio and resultado['erros'] else 0)
@@ -0,0 +1,111 @@
+import csv
+import functools
+import os
+
+import numpy as np
+
+from lote import ETAPAS
+
+# Catálogo de vasos de fornecedores: troca os volumes calculados no dimensionamento inverso
+# pelo menor vaso existente que comporte cada etapa. O índice de cada etapa é ordenado por
+# volume nominal e consultado por busca binária (np.searchsorted), vetorizada sobre lotes de consultas.
+
+ARQUIVO_CATALOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogo_reatores.csv')
+
+AERACAO_MINIMA = 15.0  # %
+
+
+class CatalogoReatores:
+    def __init__(self, sku, etapa, volume_nominal, volume_util):
+        self.sku = np.asarray(sku, dtype=str)
+        self.etapa = np.asarray(etapa, dtype=str)
+        self.volume_nominal = np.asarray(volume_nominal, dtype=float)
+        self.volume_util = np.asarray(volume_util, dtype=float)
+
+        self._indices = {}
+        for nome in ETAPAS:
+            linhas = np.flatnonzero(self.etapa == nome)
+            # Por volume nominal; entre vasos de mesmo nominal, o de maior volume útil primeiro
+            ordem = linhas[np.lexsort((-self.volume_util[linhas], self.volume_nominal[linhas]))]
+            util = self.volume_util[ordem]
+            # Maior volume útil disponível de cada posição em diante
+            maior_util = np.maximum.accumulate(util[::-1])[::-1]
+            self._indices[nome] = (ordem, self.volume_nominal[ordem], util, maior_util)
+
+    @classmethod
+    def de_csv(cls, caminho):
+        # Colunas: sku, etapa (frasco/seed/fermentador), volume_nominal (L), volume_util (L)
+        with open(caminho, newline='', encoding='utf-8') as arquivo:
+            linhas = list(csv.DictReader(arquivo))
+        return cls(
+            [linha['sku'] for linha in linhas],
+            [linha['etapa'] for linha in linhas],
+            [float(linha['volume_nominal']) for linha in linhas],
+            [float(linha['volume_util']) for linha in linhas],
+        )
+
+    def __len__(self):
+        return len(self.sku)
+
+    def ajustar(self, etapa, volume_minimo, volume_meio=0.0, aeracao_minima=AERACAO_MINIMA):
+        # Índice no catálogo do menor vaso com volume nominal >= volume_minimo em que o meio cabe no
+        # volume útil e deixa ao menos `aeracao_minima` % do volume nominal livre; -1 se nenhum serve
+        ordem, nominal, util, maior_util = self._indices[etapa]
+        volume_minimo, volume_meio = np.broadcast_arrays(
+            np.asarray(volume_minimo, dtype=float), np.asarray(volume_meio, dtype=float)
+        )
+        if len(ordem) == 0:
+            return np.full(volume_minimo.shape, -1)
+
+        # O espaço de aeração é um mínimo para o volume nominal: nominal >= meio / (1 - aeração)
+        alvo = np.maximum(volume_minimo, volume_meio / (1 - aeracao_minima / 100))
+        pos = np.searchsorted(nominal, alvo, side='left')
+        ultimo = len(nominal) - 1
+        sem_vaso = (pos > ultimo) | (maior_util[np.minimum(pos, ultimo)] < volume_meio)
+
+        # Revalida o volume útil; só avança quem não coube (maior_util garante que há um vaso adiante)
+        pendente = ~sem_vaso & (util[np.minimum(pos, ultimo)] < volume_meio)
+        while pendente.any():
+            pos = np.where(pendente, pos + 1, pos)
+            pendente &= util[np.minimum(pos, ultimo)] < volume_meio
+        return np.where(sem_vaso, -1, ordem[np.minimum(pos, ultimo)])
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_catalogo(caminho=ARQUIVO_CATALOGO):
+    return CatalogoReatores.de_csv(caminho)
+
+
+def ajustar_ao_catalogo(params_inv, composicao_oleo_inv, catalogo, processo, max_tentativas=10):
+    # Substitui os volumes calculados por vasos do catálogo e revalida a aeração com o modelo.
+    # Com proporções fixas o meio de cada etapa não depende do volume do vaso, então o cálculo
+    # com os volumes originais já informa o meio que cada vaso precisa comportar.
+    params_inv = dict(params_inv)
+    aeracao_minima = max(AERACAO_MINIMA, params_inv.get('porcentagem_aeracao', AERACAO_MINIMA))
+    meio = {etapa: r['volume_meio'] for etapa, r in processo(params_inv, composicao_oleo_inv).items() if etapa in ETAPAS}
+    volume_minimo = {etapa: params_inv[f'volume_{etapa}'] for etapa in ETAPAS}
+
+    for _ in range(max_tentativas):
+        for etapa in ETAPAS:
+            i = int(catalogo.ajustar(etapa, volume_minimo[etapa], meio[etapa], aeracao_minima))
+            if i < 0:
+                raise ValueError(
+                    f"Nenhum vaso do catálogo comporta a etapa '{etapa}' "
+                    f"({meio[etapa]:,.2f} L de meio com {aeracao_minima:.1f}% de aeração)."
+                )
+            params_inv[f'volume_{etapa}'] = float(catalogo.volume_nominal[i])
+            params_inv[f'sku_{etapa}'] = str(catalogo.sku[i])
+            params_inv[f'volume_util_{etapa}'] = float(catalogo.volume_util[i])
+
+        results = processo(params_inv, composicao_oleo_inv)
+        reprovadas = [etapa for etapa in ETAPAS if results[etapa]['percentual_aeracao'] < aeracao_minima]
+        if not reprovadas:
+            break
+        # Revalidação: a etapa sem aeração suficiente passa para o próximo vaso maior
+        for etapa in reprovadas:
+            volume_minimo[etapa] = np.nextafter(params_inv[f'volume_{etapa}'], np.inf)
+    else:
+        raise ValueError("Não foi possível ajustar os vasos do catálogo mantendo a aeração mínima.")
+
+    params_inv['concentracao_resultante'] = params_inv['massa_soforolipideo_alvo'] * 1000 / params_inv['volume_fermentador']
+    return params_inv, results
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from lote import CAMPOS_OLEO, calcular_processo_lote, resultados_escalares
+
+# Espaço de trabalho de cenários: receitas (params + composicao_oleo) salvas com um nome e
+# avaliadas todas juntas numa única chamada de calcular_processo_lote (sem variação aleatória).
+# Os resultados ficam em cache por receita: só cenários novos ou editados entram no cálculo.
+
+# Indicadores comparados entre cenários: (etapa ou grupo, campo) -> rótulo
+INDICADORES = {
+    ('fermentador', 'soforolipideo_produzido'): 'Soforolipídeo Produzido (kg)',
+    ('fermentador', 'conc_soforolipideo'): 'Concentração de Soforolipídeo (g/L)',
+    ('fermentador', 'produtividade'): 'Produtividade (g/L/h)',
+    ('fermentador', 'biomassa_total'): 'Biomassa Total (kg)',
+    ('fermentador', 'oleo_consumido'): 'Óleo Consumido (kg)',
+    ('fermentador', 'oleo_residual'): 'Óleo Residual (kg)',
+    ('fermentador', 'percentual_efetividade'): 'Efetividade do Óleo (%)',
+    ('fermentador', 'percentual_oleo'): 'Óleo Necessário Atendido (%)',
+    ('fermentador', 'percentual_aeracao'): 'Aeração no Fermentador (%)',
+    ('fermentador', 'ethanol'): 'Etanol (L)',
+    ('fermentador', 'hcl'): 'HCl (L)',
+    ('agua_necessaria', 'total'): 'Água Total (L)',
+    ('sais_necessarios', 'total'): 'Sais Minerais Totais (kg)',
+}
+
+
+def chave_cenario(params, composicao_oleo):
+    # Identifica a receita (e não o nome): cenários clonados e não editados reaproveitam o resultado
+    return tuple(sorted(params.items())), tuple(composicao_oleo)
+
+
+def _indexar(results, i):
+    # Valores do lote inteiro (como as iterações do downstream) valem para todos os cenários
+    return {
+        k: (_indexar(v, i) if isinstance(v, dict) else v if np.ndim(v) == 0 else v[i]) for k, v in results.items()
+    }
+
+
+def avaliar_cenarios(cenarios, cache=None):
+    # cenarios: {nome: (params, composicao_oleo)} com valores escalares; retorna {nome: results}
+    cache = {} if cache is None else cache
+    pendentes = {}
+    for params, composicao_oleo in cenarios.values():
+        chave = chave_cenario(params, composicao_oleo)
+        if chave not in cache:
+            pendentes.setdefault(chave, (params, composicao_oleo))
+
+    # Os interruptores (usar_downstream) valem para o lote inteiro: um lote por combinação deles
+    grupos = {}
+    for chave, (params, composicao_oleo) in pendentes.items():
+        interruptores = tuple((k, v) for k, v in sorted(params.items()) if isinstance(v, bool))
+        grupos.setdefault(interruptores, {})[chave] = (params, composicao_oleo)
+
+    for interruptores, grupo in grupos.items():
+        receitas = list(grupo.values())
+        params_lote = {
+            k: np.array([p[k] for p, _ in receitas], dtype=float) for k in receitas[0][0] if k not in dict(interruptores)
+        }
+        params_lote.update(interruptores)
+        composicao_lote = [np.array([c[i] for _, c in receitas], dtype=float) for i in range(len(CAMPOS_OLEO))]
+        results = calcular_processo_lote(params_lote, composicao_lote)
+        for i, chave in enumerate(grupo):
+            cache[chave] = resultados_escalares(_indexar(results, i))
+
+    return {nome: cache[chave_cenario(*receita)] for nome, receita in cenarios.items()}
+
+
+def tabela_entradas(cenarios):
+    # Uma linha por cenário: parâmetros e composição do óleo (formato editável)
+    linhas = {
+        nome: {**params, **dict(zip(CAMPOS_OLEO, composicao_oleo))}
+        for nome, (params, composicao_oleo) in cenarios.items()
+    }
+    return pd.DataFrame.from_dict(linhas, orient='index')
+
+
+def _parametro(valor):
+    # Interruptores (usar_downstream) voltam do editor como bool ou como texto; células apagadas
+    # voltam como None ou NaN e são rejeitadas
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, str) and valor in ('True', 'False'):
+        return valor == 'True'
+    numero = float(valor)
+    if not np.isfinite(numero):
+        raise ValueError(valor)
+    return numero
+
+
+def cenarios_da_tabela(tabela):
+    # Inverso de tabela_entradas; ValueError com as células vazias ou inválidas
+    cenarios = {}
+    invalidas = []
+    for nome, linha in tabela.iterrows():
+        valores = {}
+        for coluna, valor in linha.items():
+            try:
+                valores[coluna] = _parametro(valor)
+            except (TypeError, ValueError):
+                invalidas.append(f"{nome} / {coluna}")
+        params = {k: v for k, v in valores.items() if k not in CAMPOS_OLEO}
+        cenarios[nome] = (params, [valores.get(campo) for campo in CAMPOS_OLEO])
+    if invalidas:
+        raise ValueError(f"Células vazias ou inválidas na tabela de cenários: {'; '.join(invalidas)}.")
+    return cenarios
+
+
+def comparar_cenarios(resultados, base):
+    # Indicadores (linhas) por cenário (colunas), com diferença absoluta e percentual ao cenário base
+    valores = pd.DataFrame({
+        nome: {rotulo: float(results[grupo][campo]) for (grupo, campo), rotulo in INDICADORES.items()}
+        for nome, results in resultados.items()
+    })
+    delta = valores.sub(valores[base], axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta_pct = delta.div(valores[base].abs(), axis=0) * 100
+    return valores, delta, delta_pct.replace([np.inf, -np.inf], np.nan)
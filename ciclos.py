@@ -0,0 +1,185 @@
+import sys
+
+import numpy as np
+
+from lote import calcular_processo_lote, forma_lote, limitar_por_oleo, oleo_efetivo_lote
+from SF_calculator import calc_biomassa, calcular_volume_etapa, hidrolise_sacarose
+
+# Bateladas repetidas (retirada e reposição) no fermentador. O primeiro ciclo é o lote de
+# calcular_processo_lote (sem variação aleatória), inoculado pelo seed. Ao fim de cada ciclo uma
+# fração do caldo é retirada e o volume é completado com a receita de reposição; a parte que fica
+# leva para o ciclo seguinte a biomassa, o óleo residual (com o que ainda resta de metabolizável),
+# o açúcar não consumido por falta de óleo e o soforolipídeo ainda não colhido. O açúcar
+# remanescente soma-se ao da reposição e é dividido entre biomassa e soforolipídeo como no lote.
+# Todas as campanhas (parâmetros como arrays, com broadcasting) avançam juntas: cada ciclo é um
+# passo da recorrência sobre os arrays, e os resultados por ciclo ganham um último eixo de
+# tamanho n_ciclos. No último ciclo o caldo inteiro é colhido.
+
+# Parâmetro: (padrão, rótulo)
+PARAMETROS_CICLOS = {
+    'n_ciclos': (5, 'Número de Ciclos'),
+    'fracao_retirada': (0.5, 'Fração do Caldo Retirada por Ciclo'),
+}
+# Receita de reposição (kg por ciclo); sem ela, a carga inicial do fermentador proporcional à retirada
+RECEITA_REPOSICAO = ('sacarose_reposicao', 'ureia_reposicao', 'oleo_reposicao')
+AERACAO_MINIMA = 15.0  # %
+
+
+def receita_reposicao(params, fracao_retirada):
+    # Sacarose, ureia e óleo (kg) adicionados a cada reposição
+    total_volume = params['volume_frasco'] + params['volume_seed'] + params['volume_fermentador']
+    prop_ferm = params['volume_fermentador'] / total_volume
+    proporcional = (
+        params['massa_sacarose_total'] * prop_ferm * fracao_retirada,
+        params['massa_ureia_total'] * prop_ferm * fracao_retirada,
+        params['massa_oleo_total'] * fracao_retirada,
+    )
+    return tuple(
+        np.asarray(params[nome] if params.get(nome) is not None else padrao, dtype=float)
+        for nome, padrao in zip(RECEITA_REPOSICAO, proporcional)
+    )
+
+
+def calcular_ciclos(params, composicao_oleo, composicao_reposicao=None):
+    # params: os de calcular_processo_lote mais n_ciclos (inteiro), fracao_retirada (0 a 1] e,
+    # opcionalmente, a receita de reposição (RECEITA_REPOSICAO). composicao_reposicao: óleo da
+    # reposição (padrão: o mesmo da carga inicial).
+    # Retorna {'lote_inicial': results do primeiro ciclo, 'ciclos': {campo: array (..., n_ciclos)},
+    # 'campanha': {indicador: array}}
+    n_ciclos = int(params.get('n_ciclos', PARAMETROS_CICLOS['n_ciclos'][0]))
+    fracao = np.asarray(params.get('fracao_retirada', PARAMETROS_CICLOS['fracao_retirada'][0]), dtype=float)
+    if n_ciclos < 1:
+        raise ValueError("O número de ciclos deve ser ao menos 1.")
+    if np.any((fracao <= 0) | (fracao > 1)):
+        raise ValueError("A fração retirada deve estar entre 0 (exclusive) e 1.")
+    composicao_reposicao = composicao_oleo if composicao_reposicao is None else composicao_reposicao
+
+    p = {k: (v if isinstance(v, (bool, str)) or v is None else np.asarray(v, dtype=float)) for k, v in params.items()}
+    lote_inicial = calcular_processo_lote(params, composicao_oleo)
+    ferm = lote_inicial['fermentador']
+    forma = np.broadcast_shapes(forma_lote(params, composicao_oleo), fracao.shape)
+
+    # Reposição: açúcar, óleo metabolizável e volume de meio adicionados a cada ciclo
+    sacarose, ureia, oleo = receita_reposicao(p, fracao)
+    glicose_reposicao = hidrolise_sacarose(sacarose * 1000)
+    efetivo_reposicao = oleo_efetivo_lote(oleo, composicao_reposicao)
+    volume_insumos, _ = calcular_volume_etapa(sacarose, ureia, oleo, p['volume_fermentador'])
+    volume_reposicao = volume_insumos / (1 - p.get('porcentagem_agua', 0.60))
+    prop_biomassa = p['prop_glicose_biomassa']
+    fica = 1 - fracao
+
+    campos = (
+        'biomassa_inicial', 'biomassa_produzida', 'biomassa_total', 'acucares_fermentaveis', 'acucar_residual',
+        'oleo_inicial', 'oleo_efetivo', 'oleo_necessario', 'oleo_consumido', 'oleo_residual', 'limitante',
+        'percentual_oleo', 'soforolipideo_produzido', 'soforolipideo_caldo', 'soforolipideo_colhido', 'volume_meio',
+    )
+    ciclos = {campo: np.empty((n_ciclos,) + forma, dtype=bool if campo == 'limitante' else float) for campo in campos}
+
+    # Ciclo 1: o lote; o açúcar residual é a glicose do soforolipídeo que ficou sem óleo
+    estado = {
+        'biomassa_inicial': ferm['biomassa_inicial'],
+        'biomassa_produzida': ferm['biomassa_produzida'],
+        'biomassa_total': ferm['biomassa_total'],
+        'acucares_fermentaveis': ferm['acucares_fermentaveis'],
+        'acucar_residual': ferm['acucares_soforo'] * (1 - ferm['percentual_oleo'] / 100),
+        'oleo_inicial': ferm['oleo_inicial'],
+        'oleo_efetivo': ferm['oleo_efetivo'],
+        'oleo_necessario': ferm['oleo_necessario'],
+        'oleo_consumido': ferm['oleo_consumido'],
+        'oleo_residual': ferm['oleo_residual'],
+        'limitante': ferm['limitante'],
+        'percentual_oleo': ferm['percentual_oleo'],
+        'soforolipideo_produzido': ferm['soforolipideo_produzido'],
+        'soforolipideo_caldo': ferm['soforolipideo_produzido'],
+        'volume_meio': ferm['volume_meio'],
+    }
+    for k in range(n_ciclos):
+        if k > 0:
+            # Retirada ao fim do ciclo anterior e reposição
+            acucares = fica * estado['acucar_residual'] + glicose_reposicao
+            glicose_soforo = acucares * (1 - prop_biomassa)
+            biomassa_produzida = calc_biomassa(acucares * prop_biomassa, p['rend_biomassa'])
+            oleo_efetivo = fica * (estado['oleo_efetivo'] - estado['oleo_consumido']) + efetivo_reposicao
+            soforo = limitar_por_oleo(glicose_soforo, oleo_efetivo, p['rend_soforolipideo'])
+            oleo_inicial = fica * estado['oleo_residual'] + oleo
+            estado = {
+                'biomassa_inicial': fica * estado['biomassa_total'],
+                'biomassa_produzida': biomassa_produzida,
+                'biomassa_total': fica * estado['biomassa_total'] + biomassa_produzida,
+                'acucares_fermentaveis': acucares,
+                'acucar_residual': glicose_soforo * (1 - soforo['percentual_oleo'] / 100),
+                'oleo_inicial': oleo_inicial,
+                'oleo_efetivo': oleo_efetivo,
+                'oleo_necessario': soforo['oleo_necessario'],
+                'oleo_consumido': soforo['oleo_consumido'],
+                'oleo_residual': oleo_inicial - soforo['oleo_consumido'],
+                'limitante': soforo['limitante'],
+                'percentual_oleo': soforo['percentual_oleo'],
+                'soforolipideo_produzido': soforo['massa'],
+                'soforolipideo_caldo': fica * estado['soforolipideo_caldo'] + soforo['massa'],
+                'volume_meio': fica * estado['volume_meio'] + volume_reposicao,
+            }
+        # No último ciclo colhe-se o caldo inteiro
+        colhido = estado['soforolipideo_caldo'] * (fracao if k < n_ciclos - 1 else 1.0)
+        for campo, valor in estado.items():
+            ciclos[campo][k] = valor
+        ciclos['soforolipideo_colhido'][k] = colhido
+
+    # Ciclos no último eixo (os passos acima escrevem cada ciclo num bloco contíguo)
+    ciclos = {campo: np.moveaxis(valor, 0, -1) for campo, valor in ciclos.items()}
+
+    volume_fermentador = np.asarray(p['volume_fermentador'])[..., np.newaxis]
+    porcentagem_aeracao = np.asarray(p.get('porcentagem_aeracao', 20.0))[..., np.newaxis]
+    horas = np.asarray(p['ferment_time'])[..., np.newaxis] * np.arange(1, n_ciclos + 1)
+    acumulado = np.cumsum(ciclos['soforolipideo_colhido'], axis=-1)
+    ciclos['soforolipideo_acumulado'] = acumulado
+    ciclos['conc_soforolipideo'] = ciclos['soforolipideo_caldo'] * 1000 / volume_fermentador
+    ciclos['produtividade_acumulada'] = acumulado / (volume_fermentador * horas) * 1000
+    ciclos['percentual_aeracao'] = (volume_fermentador - ciclos['volume_meio']) / volume_fermentador * 100
+    ciclos['aeracao_suficiente'] = ciclos['percentual_aeracao'] >= AERACAO_MINIMA
+    ciclos['volume_excedido'] = ciclos['volume_meio'] > volume_fermentador * (1 - porcentagem_aeracao / 100)
+
+    limitante = ciclos['limitante']
+    campanha = {
+        'soforolipideo_total': acumulado[..., -1],
+        'produtividade': ciclos['produtividade_acumulada'][..., -1],
+        'ciclos_limitados': limitante.sum(axis=-1),
+        # Primeiro ciclo (1 a n) com óleo limitante; 0 se nenhum
+        'primeiro_ciclo_limitado': np.where(limitante.any(axis=-1), limitante.argmax(axis=-1) + 1, 0),
+        'aeracao_minima': ciclos['percentual_aeracao'].min(axis=-1),
+        'viavel': (ciclos['aeracao_suficiente'] & ~ciclos['volume_excedido']).all(axis=-1),
+        'oleo_residual_final': ciclos['oleo_residual'][..., -1],
+        'acucar_residual_final': ciclos['acucar_residual'][..., -1],
+    }
+    return {'lote_inicial': lote_inicial, 'ciclos': ciclos, 'campanha': campanha}
+
+
+if __name__ == "__main__":
+    # Uso: python ciclos.py [campanhas] [ciclos]
+    # Varre a fração retirada e o óleo da reposição e mede o tempo da recorrência
+    import time
+
+    from benchmark_compacto import COMPOSICAO_PADRAO, PARAMETROS_PADRAO
+
+    campanhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_ciclos = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = np.random.default_rng(0)
+    params = dict(
+        PARAMETROS_PADRAO, massa_sacarose_total=550.1, massa_ureia_total=27.5, n_ciclos=n_ciclos,
+        fracao_retirada=rng.uniform(0.2, 0.9, campanhas), oleo_reposicao=rng.uniform(20, 400, campanhas),
+    )
+    composicao_oleo = list(COMPOSICAO_PADRAO)
+
+    inicio = time.perf_counter()
+    resultado = calcular_ciclos(params, composicao_oleo)
+    tempo = time.perf_counter() - inicio
+
+    campanha = resultado['campanha']
+    print(f"{campanhas:,} campanhas x {n_ciclos} ciclos em {tempo:.2f} s "
+          f"({tempo / (campanhas * n_ciclos) * 1e9:.0f} ns por campanha-ciclo)")
+    print(f"viáveis (aeração): {campanha['viavel'].mean():.1%}; "
+          f"com óleo limitante em algum ciclo: {(campanha['ciclos_limitados'] > 0).mean():.1%}")
+    for campo in ('soforolipideo_total', 'produtividade', 'oleo_residual_final', 'acucar_residual_final'):
+        valores = campanha[campo]
+        print(f"{campo:<24} média {valores.mean():10.3f}  p5 {np.percentile(valores, 5):10.3f}  "
+              f"p95 {np.percentile(valores, 95):10.3f}")
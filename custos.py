@@ -0,0 +1,82 @@
+import csv
+import functools
+import os
+
+import numpy as np
+
+from downstream import consumo_reagentes
+from lote import ETAPAS
+
+# Custos por batelada: matérias-primas, utilidades por hora de reator e depreciação dos
+# reatores pelo volume. Aceita os resultados de calcular_processo (escalares) ou de
+# calcular_processo_lote (arrays): todo o custeio são operações elemento a elemento.
+
+ARQUIVO_PRECOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'precos.csv')
+
+ROTULOS_CUSTOS = {
+    'sacarose': 'Sacarose',
+    'ureia': 'Ureia',
+    'oleo': 'Óleo',
+    'sais': 'Sais Minerais',
+    'agua': 'Água',
+    'etanol': 'Etanol',
+    'hcl': 'HCl',
+    'utilidades': 'Utilidades',
+    'depreciacao': 'Depreciação',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_precos(caminho=ARQUIVO_PRECOS):
+    # Lida uma única vez por arquivo; o dicionário retornado é compartilhado e não deve ser alterado
+    with open(caminho, newline='', encoding='utf-8') as arquivo:
+        return {linha['item']: float(linha['valor']) for linha in csv.DictReader(arquivo)}
+
+
+def horas_reator(params, precos):
+    # Tempo de ocupação de cada reator por batelada (h)
+    return {
+        'frasco': precos['horas_frasco'],
+        'seed': params['seed_time'],
+        'fermentador': params['ferment_time'],
+    }
+
+
+def custo_lote(params, results, precos=None):
+    # Retorna {item: custo (R$)} mais 'total' e 'por_kg' (R$/kg de soforolipídeo)
+    precos = carregar_precos() if precos is None else precos
+    horas = horas_reator(params, precos)
+    etanol, hcl = consumo_reagentes(results)
+
+    def total(campo):
+        return sum(np.asarray(results[etapa][campo], dtype=float) for etapa in ETAPAS)
+
+    custos = {
+        'sacarose': total('sacarose_consumida') * precos['sacarose'],
+        'ureia': total('ureia_consumida') * precos['ureia'],
+        'oleo': np.asarray(results['fermentador']['oleo_inicial'], dtype=float) * precos['oleo'],
+        'sais': np.asarray(results['sais_necessarios']['total'], dtype=float) * precos['sais'],
+        'agua': np.asarray(results['agua_necessaria']['total'], dtype=float) * precos['agua'],
+        'etanol': np.asarray(etanol, dtype=float) * precos['etanol'],
+        'hcl': np.asarray(hcl, dtype=float) * precos['hcl'],
+    }
+
+    volumes = {etapa: np.asarray(params[f'volume_{etapa}'], dtype=float) for etapa in ETAPAS}
+    # Utilidades proporcionais ao volume do reator (m³) e ao tempo de ocupação
+    custos['utilidades'] = sum(volumes[etapa] / 1000 * horas[etapa] for etapa in ETAPAS) * precos['utilidades']
+    # Depreciação linear por hora: custo de aquisição pela regra de escala (V/V_ref)^expoente
+    custos['depreciacao'] = sum(
+        precos['capex_referencia'] * (volumes[etapa] / precos['volume_referencia']) ** precos['expoente_escala']
+        / precos['vida_util'] * horas[etapa]
+        for etapa in ETAPAS
+    )
+
+    custos['total'] = sum(custos[item] for item in ROTULOS_CUSTOS)
+    # Por kg produzido ou, com o downstream calculado, por kg recuperado
+    soforolipideo = np.asarray(
+        results['downstream']['soforolipideo_final'] if 'downstream' in results
+        else results['fermentador']['soforolipideo_produzido'], dtype=float
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        custos['por_kg'] = np.where(soforolipideo > 0, custos['total'] / soforolipideo, np.nan)
+    return custos
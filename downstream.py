@@ -0,0 +1,223 @@
+import sys
+
+import numpy as np
+
+# Downstream por batelada: separação do caldo, extração com etanol (recuperado por evaporação e
+# reciclado), acidificação com HCl (licor ácido parcialmente recirculado para a extração) e
+# secagem. Cada unidade tem uma eficiência de recuperação; as correntes de reciclo (soforolipídeo
+# e HCl no licor, etanol recuperado) são a operação em regime de bateladas repetidas, obtida por
+# iteração de ponto fixo (Wegstein) vetorizada sobre os cenários: só os cenários ainda não
+# convergidos são reavaliados a cada iteração.
+# Com a separação completa (rec_separacao = 1), sem recuperação de etanol (rec_etanol = 0) e sem
+# recirculação do licor (reciclo_licor = 0), o etanol e o HCl de reposição coincidem com
+# results['fermentador']['ethanol'] e ['hcl']; com rec_etanol = 1 a reposição de etanol é zero.
+
+# Parâmetro: (padrão, rótulo)
+PARAMETROS_DOWNSTREAM = {
+    'rec_separacao': (0.95, 'Recuperação na Separação'),
+    'remocao_oleo': (0.90, 'Remoção do Óleo Residual'),
+    'rec_extracao': (0.92, 'Recuperação na Extração'),
+    'rec_etanol': (0.85, 'Recuperação do Etanol'),
+    'perda_acidificacao': (0.08, 'Soforolipídeo Dissolvido no Licor Ácido'),
+    'reciclo_licor': (0.70, 'Licor Ácido Recirculado'),
+    'hcl_livre': (0.30, 'HCl Livre no Licor'),
+    'rec_secagem': (0.98, 'Recuperação na Secagem'),
+    'umidade_final': (0.05, 'Umidade do Produto'),
+}
+# Correntes de reciclo (variáveis de corte do ponto fixo)
+RECICLOS = ('soforolipideo_reciclado', 'etanol_recuperado', 'hcl_reciclado')
+
+TOLERANCIA = 1e-10
+MAX_ITERACOES = 200
+LIMITES_WEGSTEIN = (-5.0, 0.0)
+
+
+def parametros_downstream(params):
+    # Eficiências informadas em params (escalares ou arrays) ou os padrões
+    return {nome: params.get(nome, padrao) for nome, (padrao, _) in PARAMETROS_DOWNSTREAM.items()}
+
+
+def consumo_reagentes(results):
+    # Etanol (L) e HCl (L) comprados por batelada: a reposição do downstream quando calculado,
+    # senão a demanda bruta do fermentador
+    if 'downstream' in results:
+        return results['downstream']['etanol_reposicao'], results['downstream']['hcl_reposicao']
+    return results['fermentador']['ethanol'], results['fermentador']['hcl']
+
+
+def _reciclos(p, reciclo):
+    # Novos valores das correntes de reciclo (só o necessário para a iteração)
+    sl_extracao = p['rec_separacao'] * p['soforolipideo'] + reciclo[0]
+    sl_licor = p['perda_acidificacao'] * p['rec_extracao'] * sl_extracao
+    return np.stack(np.broadcast_arrays(
+        p['reciclo_licor'] * sl_licor,
+        p['rec_etanol'] * p['ethanol_per_kg'] * sl_extracao,
+        p['reciclo_licor'] * p['hcl_livre'] * p['hcl_per_l'] * p['oleo_inicial'],
+    ))
+
+
+def _balanco(p, reciclo):
+    # Uma passada pelas unidades com as correntes de reciclo dadas; retorna todas as correntes
+    # e os novos valores dos reciclos (o que _reciclos calcula)
+    sl_reciclado, etanol_recuperado, hcl_reciclado = reciclo
+
+    # Separação: fase pesada com o soforolipídeo; o óleo não removido segue como impureza
+    sl_separado = p['rec_separacao'] * p['soforolipideo']
+    oleo_removido = p['remocao_oleo'] * p['oleo_residual']
+    oleo_arrastado = p['oleo_residual'] - oleo_removido
+
+    # Extração: etanol proporcional ao soforolipídeo alimentado (inclui o reciclado)
+    sl_extracao = sl_separado + sl_reciclado
+    etanol_demanda = p['ethanol_per_kg'] * sl_extracao
+    etanol_reposicao = np.maximum(etanol_demanda - etanol_recuperado, 0.0)
+    sl_extraido = p['rec_extracao'] * sl_extracao
+
+    # Acidificação: parte do soforolipídeo fica dissolvida no licor, recirculado em parte
+    hcl_demanda = p['hcl_per_l'] * p['oleo_inicial']
+    hcl_reposicao = np.maximum(hcl_demanda - hcl_reciclado, 0.0)
+    sl_licor = p['perda_acidificacao'] * sl_extraido
+    sl_precipitado = sl_extraido - sl_licor
+
+    # Secagem
+    sl_final = p['rec_secagem'] * sl_precipitado
+    oleo_produto = p['rec_secagem'] * oleo_arrastado
+    produto_seco = (sl_final + oleo_produto) / (1 - p['umidade_final'])
+
+    correntes = {
+        'soforolipideo_separado': sl_separado,
+        'oleo_removido': oleo_removido,
+        'oleo_arrastado': oleo_arrastado,
+        'soforolipideo_extracao': sl_extracao,
+        'soforolipideo_extraido': sl_extraido,
+        'etanol_demanda': etanol_demanda,
+        'etanol_recuperado': etanol_recuperado,
+        'etanol_reposicao': etanol_reposicao,
+        'hcl_demanda': hcl_demanda,
+        'hcl_reciclado': hcl_reciclado,
+        'hcl_reposicao': hcl_reposicao,
+        'soforolipideo_licor': sl_licor,
+        'soforolipideo_reciclado': sl_reciclado,
+        'soforolipideo_precipitado': sl_precipitado,
+        'soforolipideo_final': sl_final,
+        'produto_seco': produto_seco,
+        # Perdas de soforolipídeo por unidade (em regime: produzido = final + perdas)
+        'perda_separacao': p['soforolipideo'] - sl_separado,
+        'perda_extracao': sl_extracao - sl_extraido,
+        'perda_purga': sl_licor * (1 - p['reciclo_licor']),
+        'perda_secagem': sl_precipitado - sl_final,
+    }
+    return correntes, _reciclos(p, reciclo)
+
+
+def resolver_ponto_fixo(mapa, x0, tol=TOLERANCIA, max_iteracoes=MAX_ITERACOES):
+    # Resolve x = mapa(x, indices) para x (k, n): cada coluna é um cenário independente.
+    # Substituição sucessiva acelerada por Wegstein (q limitado a LIMITES_WEGSTEIN) em cada
+    # componente; mapa recebe só as colunas ativas e os índices delas (slice(None) enquanto
+    # todas estão ativas, evitando cópias). Retorna (x, convergido (n,), iterações)
+    x = np.array(x0, dtype=float)
+    convergido = np.zeros(x.shape[1], dtype=bool)
+    ativos = slice(None)
+    x_anterior = g_anterior = None
+    iteracao = 0
+    while iteracao < max_iteracoes:
+        iteracao += 1
+        xa = x[:, ativos]
+        g = mapa(xa, ativos)
+        if x_anterior is None:
+            proximo = g
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                s = (g - g_anterior) / (xa - x_anterior)
+                q = np.clip(s / (s - 1), *LIMITES_WEGSTEIN)
+            q = np.where(np.isfinite(q), q, 0.0)
+            proximo = q * xa + (1 - q) * g
+        fim = np.all(np.abs(g - xa) <= tol * (1 + np.abs(g)), axis=0)
+        if isinstance(ativos, slice):
+            x = np.where(fim, g, proximo)  # novo array: xa continua com a iteração anterior
+        else:
+            x[:, ativos] = np.where(fim, g, proximo)
+        if fim.all():
+            convergido[ativos] = True
+            break
+        if fim.any():
+            # Só os que continuam são reavaliados
+            indices = np.arange(x.shape[1])[ativos]
+            convergido[indices[fim]] = True
+            ativos = indices[~fim]
+            x_anterior, g_anterior = xa[:, ~fim], g[:, ~fim]
+        else:
+            x_anterior, g_anterior = xa, g
+    return x, convergido, iteracao
+
+
+def calcular_downstream(params, results, tol=TOLERANCIA, max_iteracoes=MAX_ITERACOES):
+    # Balanço do downstream em regime; aceita resultados escalares (calcular_processo) ou em lote
+    # (calcular_processo_lote). Retorna {corrente: valor} com a forma dos cenários, mais
+    # 'rendimento' (soforolipídeo final / produzido), 'pureza', 'convergido' e 'iteracoes'
+    ferm = results['fermentador']
+    entradas = {
+        **parametros_downstream(params),
+        'ethanol_per_kg': params['ethanol_per_kg'],
+        'hcl_per_l': params['hcl_per_l'],
+        'soforolipideo': ferm['soforolipideo_produzido'],
+        'oleo_residual': ferm['oleo_residual'],
+        'oleo_inicial': ferm['oleo_inicial'],
+    }
+    entradas = {k: np.asarray(v, dtype=float) for k, v in entradas.items()}
+    forma = np.broadcast_shapes(*(v.shape for v in entradas.values()))
+    n = int(np.prod(forma))
+    # Parâmetros que variam por cenário são achatados; os escalares seguem como estão
+    planos = {k: (np.broadcast_to(v, forma).reshape(-1) if v.size > 1 else v.reshape(())) for k, v in entradas.items()}
+
+    def mapa(x, indices):
+        if isinstance(indices, slice):
+            return _reciclos(planos, x)
+        return _reciclos({k: (v[indices] if v.ndim else v) for k, v in planos.items()}, x)
+
+    reciclo, convergido, iteracoes = resolver_ponto_fixo(mapa, np.zeros((len(RECICLOS), n)), tol, max_iteracoes)
+    correntes, _ = _balanco(planos, reciclo)
+
+    resultado = {k: np.broadcast_to(v, (n,)).reshape(forma) for k, v in correntes.items()}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado['rendimento'] = np.where(
+            resultado['soforolipideo_final'] > 0,
+            resultado['soforolipideo_final'] / np.broadcast_to(entradas['soforolipideo'], forma), 0.0
+        )
+        resultado['pureza'] = np.where(
+            resultado['produto_seco'] > 0, resultado['soforolipideo_final'] / resultado['produto_seco'], 0.0
+        )
+    resultado['convergido'] = convergido.reshape(forma)
+    resultado['iteracoes'] = iteracoes
+    return resultado
+
+
+if __name__ == "__main__":
+    # Uso: python downstream.py [número de cenários]
+    # Varre as eficiências em torno dos padrões e mede o custo do downstream em relação ao lote
+    import time
+
+    from benchmark_compacto import COMPOSICAO_PADRAO, PARAMETROS_PADRAO
+    from lote import calcular_processo_lote
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    params = dict(
+        PARAMETROS_PADRAO, massa_sacarose_total=rng.uniform(200, 1000, n), massa_oleo_total=rng.uniform(50, 500, n),
+    )
+    for nome, (padrao, _) in PARAMETROS_DOWNSTREAM.items():
+        params[nome] = np.clip(padrao * rng.uniform(0.8, 1.2, n), 0.0, 0.99)
+    composicao_oleo = list(COMPOSICAO_PADRAO)
+
+    inicio = time.perf_counter()
+    results = calcular_processo_lote(params, composicao_oleo)
+    tempo_lote = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    downstream = calcular_downstream(params, results)
+    tempo_downstream = time.perf_counter() - inicio
+
+    print(f"{n:,} cenários: lote {tempo_lote:.2f} s, downstream {tempo_downstream:.2f} s "
+          f"({downstream['iteracoes']} iterações, {downstream['convergido'].mean():.2%} convergidos)")
+    for campo in ('rendimento', 'pureza', 'etanol_reposicao', 'hcl_reposicao'):
+        valores = downstream[campo]
+        print(f"{campo:<20} média {valores.mean():10.3f}  p5 {np.percentile(valores, 5):10.3f}  "
+              f"p95 {np.percentile(valores, 95):10.3f}")
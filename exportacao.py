@@ -0,0 +1,190 @@
+import io
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+from lote import CAMPOS_OLEO, ETAPAS, achatar_entradas, achatar_resultados, calcular_processo_lote
+
+# Exportação de resultados numéricos (sem formatação) em CSV, Parquet e Excel.
+# Cada exportação gera quatro tabelas: entradas, resultados por etapa, água e sais, reagentes.
+# Os cenários são processados em blocos, então a memória usada não depende do tamanho do lote.
+
+TABELAS = {
+    'entradas': 'Entradas',
+    'etapas': 'Resultados por Etapa',
+    'agua_sais': 'Água e Sais',
+    'reagentes': 'Reagentes',
+}
+
+FORMATOS = {
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('zip', 'application/zip'),
+    'parquet': ('zip', 'application/zip'),
+}
+
+TAMANHO_BLOCO = 100_000
+LIMITE_LINHAS_EXCEL = 1_048_575  # 1.048.576 linhas por planilha, menos o cabeçalho
+
+
+def tabelas_exportacao(params, composicao_oleo, results, inicio=0):
+    # Separa as colunas achatadas de um bloco de cenários nas quatro tabelas exportadas
+    entradas = achatar_entradas(params, composicao_oleo)
+    colunas = achatar_resultados(results)
+    n = len(next(iter(colunas.values())))
+    cenario = np.arange(inicio, inicio + n)
+
+    reagentes = {'cenario': cenario}
+    for etapa in ETAPAS:
+        reagentes[f'sacarose_{etapa}'] = colunas[f'{etapa}_sacarose_consumida']
+        reagentes[f'ureia_{etapa}'] = colunas[f'{etapa}_ureia_consumida']
+    reagentes['oleo_fermentador'] = colunas['fermentador_oleo_inicial']
+    reagentes['etanol'] = colunas['fermentador_ethanol']
+    reagentes['hcl'] = colunas['fermentador_hcl']
+    reagentes.update({k: v for k, v in colunas.items() if k.startswith('downstream_')})
+
+    agua_sais = {'cenario': cenario}
+    agua_sais.update({k: v for k, v in colunas.items() if k.startswith(('agua_', 'sais_'))})
+
+    etapas = {'cenario': cenario}
+    etapas.update({k: v for k, v in colunas.items() if k.startswith(ETAPAS)})
+    etapas['porcentagem_aeracao_desejada'] = colunas['porcentagem_aeracao_desejada']
+
+    return {
+        'entradas': {'cenario': cenario, **entradas},
+        'etapas': etapas,
+        'agua_sais': agua_sais,
+        'reagentes': reagentes,
+    }
+
+
+def _tabelas_por_bloco(blocos):
+    # Cada bloco é (params, composicao_oleo) ou (params, composicao_oleo, results);
+    # sem results, o bloco é avaliado com calcular_processo_lote
+    total = 0
+    for bloco in blocos:
+        params, composicao_oleo = bloco[0], bloco[1]
+        results = bloco[2] if len(bloco) > 2 else calcular_processo_lote(params, composicao_oleo)
+        tabelas = tabelas_exportacao(params, composicao_oleo, results, total)
+        total += len(tabelas['entradas']['cenario'])
+        yield tabelas
+
+
+def dividir_em_blocos(params, composicao_oleo, tamanho=TAMANHO_BLOCO):
+    # Gera (params, composicao_oleo) com no máximo `tamanho` cenários cada
+    entradas = achatar_entradas(params, composicao_oleo)
+    n = len(next(iter(entradas.values())))
+    for inicio in range(0, n, tamanho):
+        fatia = slice(inicio, inicio + tamanho)
+        params_bloco = {k: (v if isinstance(v, (bool, str)) else entradas[k][fatia]) for k, v in params.items()}
+        composicao_bloco = [entradas[campo][fatia] for campo in CAMPOS_OLEO]
+        yield params_bloco, composicao_bloco
+
+
+class _EscritorCSV:
+    def __init__(self, arquivo):
+        import pandas as pd
+        self._pd = pd
+        self._arquivo = io.TextIOWrapper(arquivo, encoding='utf-8', newline='', write_through=True)
+        self._cabecalho = True
+
+    def escrever(self, colunas):
+        self._pd.DataFrame(colunas).to_csv(self._arquivo, index=False, header=self._cabecalho)
+        self._cabecalho = False
+
+    def fechar(self):
+        self._arquivo.flush()
+        self._arquivo.detach()
+
+
+class _EscritorParquet:
+    def __init__(self, arquivo):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._pq = pq
+        self._arquivo = arquivo
+        self._escritor = None
+
+    def escrever(self, colunas):
+        tabela = self._pa.table({k: np.ascontiguousarray(v) for k, v in colunas.items()})
+        if self._escritor is None:
+            self._escritor = self._pq.ParquetWriter(self._arquivo, tabela.schema)
+        self._escritor.write_table(tabela)
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+def _exportar_pacote(blocos, destino, formato):
+    # CSV/Parquet: um arquivo temporário por tabela, reunidos num .zip ao final
+    extensao = 'csv' if formato == 'csv' else 'parquet'
+    classe = _EscritorCSV if formato == 'csv' else _EscritorParquet
+    temporarios = {nome: tempfile.TemporaryFile() for nome in TABELAS}
+    try:
+        escritores = {nome: classe(temporarios[nome]) for nome in TABELAS}
+        total = 0
+        for tabelas in _tabelas_por_bloco(blocos):
+            for nome, colunas in tabelas.items():
+                escritores[nome].escrever(colunas)
+            total += len(tabelas['entradas']['cenario'])
+        for escritor in escritores.values():
+            escritor.fechar()
+
+        # Parquet já é comprimido; o CSV se beneficia da compressão do zip
+        compressao = zipfile.ZIP_DEFLATED if formato == 'csv' else zipfile.ZIP_STORED
+        with zipfile.ZipFile(destino, 'w', compression=compressao) as pacote:
+            for nome, temporario in temporarios.items():
+                temporario.seek(0)
+                with pacote.open(f'{nome}.{extensao}', 'w', force_zip64=True) as entrada:
+                    shutil.copyfileobj(temporario, entrada, 1024 * 1024)
+    finally:
+        for temporario in temporarios.values():
+            temporario.close()
+    return total
+
+
+def _exportar_excel(blocos, destino):
+    try:
+        from openpyxl import Workbook
+    except ImportError as erro:
+        raise ImportError("A exportação para Excel requer o pacote 'openpyxl'.") from erro
+
+    # Modo write_only: as linhas vão direto para o arquivo, sem manter a planilha em memória
+    livro = Workbook(write_only=True)
+    planilhas = {nome: livro.create_sheet(titulo) for nome, titulo in TABELAS.items()}
+    total = 0
+    for tabelas in _tabelas_por_bloco(blocos):
+        n = len(tabelas['entradas']['cenario'])
+        if total + n > LIMITE_LINHAS_EXCEL:
+            raise ValueError(
+                f"O Excel suporta no máximo {LIMITE_LINHAS_EXCEL:,} cenários por planilha; use CSV ou Parquet."
+            )
+        for nome, colunas in tabelas.items():
+            planilha = planilhas[nome]
+            if total == 0:
+                planilha.append(list(colunas))
+            for linha in zip(*(np.asarray(v).tolist() for v in colunas.values())):
+                planilha.append(linha)
+        total += n
+    livro.save(destino)
+    return total
+
+
+def exportar_lote(blocos, destino, formato='parquet'):
+    # `blocos` é um iterável de (params, composicao_oleo[, results]) com arrays, p.ex. dividir_em_blocos(...)
+    # `destino` pode ser um caminho ou um arquivo binário aberto. Retorna o número de cenários.
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r}")
+    if formato == 'xlsx':
+        return _exportar_excel(blocos, destino)
+    return _exportar_pacote(blocos, destino, formato)
+
+
+def exportar_resultado(params, composicao_oleo, results, formato='xlsx'):
+    # Exporta um único cálculo para um buffer em memória (usado pelos botões de download)
+    buffer = io.BytesIO()
+    exportar_lote([(params, composicao_oleo, results)], buffer, formato)
+    return buffer.getvalue()
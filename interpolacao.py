@@ -0,0 +1,454 @@
+import argparse
+import datetime
+import functools
+import itertools
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from calibracao import carregar_calibracao
+from lote import ETAPAS, calcular_processo_lote, resultados_escalares
+from termico import PARAMETROS_TERMICOS
+
+# Tabelas de interpolação pré-calculadas: o modelo determinístico é avaliado uma vez (fora do app)
+# numa grade uniforme sobre as entradas principais e gravado em disco; a consulta é uma interpolação
+# multilinear nos 2^d vértices da célula, lida por np.memmap (só as células consultadas são tocadas).
+#   direto: conc. de sacarose (g/L do volume total), conc. de óleo (g/L do fermentador),
+#           volume do fermentador (L) e efetividade do óleo, com as demais entradas fixas
+#   inverso: meta de soforolipídeo (kg) e efetividade do óleo
+# O modelo só depende da composição do óleo pela efetividade (oleico + linoleico e linolênico
+# metabolizados), então uma composição de oleico puro com a mesma efetividade a representa.
+# Cada célula guarda um limite de erro: para cada eixo, o dobro do maior desvio entre o modelo e a
+# reta nos pontos médios das arestas da célula nesse eixo, somado sobre os eixos, mais o
+# arredondamento do float32. O desvio no meio da aresta já é o erro máximo de uma função quadrática;
+# o dobro cobre também degraus (arredondamento dos vasos) e quinas que cruzam a aresta. Células
+# cujos vértices estão em regimes diferentes (limitação por óleo, vaso ampliado pelo resfriamento)
+# ficam com limite infinito, assim como as com vértice rejeitado pelo dimensionamento. Consultas
+# nessas células, fora da grade ou com entradas fixas diferentes das da tabela caem no cálculo exato.
+# No inverso, o arredondamento do seed e do frasco entra nas proporções e deixa pequenos degraus em
+# todas as direções: lá o limite é uma estimativa (a validação de `python interpolacao.py` informa
+# a fração das consultas dentro dele).
+
+DIRETORIO_TABELAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tabelas_interpolacao')
+ARQUIVO_TABELA = 'tabela.json'
+
+# Eixo: (início, fim, pontos)
+EIXOS_DIRETO = {
+    'conc_sacarose': (10.0, 300.0, 30),
+    'conc_oleo': (0.0, 150.0, 31),
+    'volume_fermentador': (500.0, 20000.0, 40),
+    'efetividade': (0.1, 1.0, 19),
+}
+EIXOS_INVERSO = {
+    'massa_soforolipideo_alvo': (10.0, 2000.0, 200),
+    'efetividade': (0.1, 1.0, 19),
+}
+
+# Saídas tabeladas: '<etapa>_<campo>' dos resultados ou chave de params_inv
+SAIDAS_DIRETO = (
+    'fermentador_soforolipideo_produzido', 'fermentador_conc_soforolipideo', 'fermentador_produtividade',
+    'fermentador_biomassa_total', 'fermentador_oleo_consumido', 'fermentador_oleo_residual',
+    'fermentador_percentual_oleo', 'fermentador_volume_meio', 'fermentador_percentual_aeracao',
+)
+SAIDAS_INVERSO = (
+    'volume_fermentador', 'volume_seed', 'volume_frasco', 'massa_sacarose_total', 'massa_ureia_total',
+    'massa_oleo_total', 'concentracao_resultante',
+)
+ROTULOS_SAIDAS = {
+    'fermentador_soforolipideo_produzido': 'Soforolipídeo Produzido (kg)',
+    'fermentador_conc_soforolipideo': 'Concentração de Soforolipídeo (g/L)',
+    'fermentador_produtividade': 'Produtividade (g/L·h)',
+    'fermentador_biomassa_total': 'Biomassa no Fermentador (kg)',
+    'fermentador_oleo_consumido': 'Óleo Consumido (kg)',
+    'fermentador_oleo_residual': 'Óleo Residual (kg)',
+    'fermentador_percentual_oleo': 'Demanda de Óleo Atendida (%)',
+    'fermentador_volume_meio': 'Volume do Meio no Fermentador (L)',
+    'fermentador_percentual_aeracao': 'Aeração no Fermentador (%)',
+    'volume_fermentador': 'Volume do Fermentador (L)',
+    'volume_seed': 'Volume do Seed (L)',
+    'volume_frasco': 'Volume do Frasco (L)',
+    'massa_sacarose_total': 'Sacarose (kg)',
+    'massa_ureia_total': 'Ureia (kg)',
+    'massa_oleo_total': 'Óleo (kg)',
+    'concentracao_resultante': 'Concentração Resultante (g/L)',
+}
+# Entradas sem efeito nas saídas tabeladas, exigidas pelo modelo
+NEUTROS = {'ethanol_per_kg': 2.0, 'hcl_per_l': 2.0}
+
+
+def base_direto():
+    # Entradas fixas da tabela direta: os valores iniciais do app (rendimentos calibrados, se houver)
+    calibrados = carregar_calibracao()
+    return {
+        'volume_frasco': 1.0, 'volume_seed': 500.0, 'porcentagem_aeracao': 20.0, 'porcentagem_agua': 0.6,
+        'conc_ureia': 5.0, 'prop_glicose_biomassa': 0.2,
+        'rend_biomassa': round(float(calibrados.get('rend_biomassa', 0.678)), 3),
+        'rend_soforolipideo': round(float(calibrados.get('rend_soforolipideo', 0.722)), 3),
+        'ferment_time': 168.0, 'prop_inoculo_frasco': 0.01, 'prop_inoculo_seed': 0.1,
+    }
+
+
+def base_inverso():
+    calibrados = carregar_calibracao()
+    return {
+        'porcentagem_agua': 0.6, 'espaco_aeracao': 15.0, 'prop_glicose_biomassa': 0.2,
+        'rend_biomassa': round(float(calibrados.get('rend_biomassa', 0.678)), 3),
+        'rend_soforolipideo': round(float(calibrados.get('rend_soforolipideo', 0.722)), 3),
+        'ferment_time': 168.0, 'seed_time': 24.0, 'prop_inoculo_frasco': 0.01, 'prop_inoculo_seed': 0.1,
+        'fator_seguranca': 10.0, 'ampliar_resfriamento': True,
+        **{nome: padrao for nome, (padrao, _) in PARAMETROS_TERMICOS.items()},
+    }
+
+
+def efetividade_oleo(composicao_oleo):
+    # Fração do óleo metabolizável (mesma conta de calc_soforolipideo)
+    return (
+        composicao_oleo[0] / 100
+        + composicao_oleo[1] / 100 * composicao_oleo[5] / 100
+        + composicao_oleo[3] / 100 * composicao_oleo[6] / 100
+    )
+
+
+def _composicao(efetividade):
+    return [np.asarray(efetividade, dtype=float) * 100, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+def _saida(nome, results, params=None):
+    if params is not None and nome in params:
+        return params[nome]
+    etapa, campo = nome.split('_', 1)
+    return results[etapa][campo]
+
+
+def _avaliar_direto(base, conc_sacarose, conc_oleo, volume_fermentador, efetividade):
+    total = base['volume_frasco'] + base['volume_seed'] + volume_fermentador
+    params = {nome: valor for nome, valor in base.items() if nome != 'conc_ureia'}
+    params.update(NEUTROS)
+    params.update(
+        volume_fermentador=volume_fermentador,
+        massa_sacarose_total=conc_sacarose * total / 1000,
+        massa_ureia_total=base['conc_ureia'] * total / 1000,
+        massa_oleo_total=conc_oleo * volume_fermentador / 1000,
+    )
+    results = calcular_processo_lote(params, _composicao(efetividade))
+    return [_saida(nome, results) for nome in SAIDAS_DIRETO], results['fermentador']['limitante']
+
+
+def _processo_deterministico(params, composicao_oleo):
+    return resultados_escalares(calcular_processo_lote(params, composicao_oleo))
+
+
+def _avaliar_inverso(base, massa_soforolipideo_alvo, efetividade):
+    # O dimensionamento inverso é escalar (arredondamentos e ampliação térmica): um ponto por vez.
+    # Metas rejeitadas pelo resfriamento ficam NaN; o regime indica os vasos ampliados e a correção
+    # da aeração.
+    from SF_calculator import calcular_resultados_inverso
+
+    alvos, efetividades = np.broadcast_arrays(massa_soforolipideo_alvo, efetividade)
+    saidas = np.full(alvos.shape + (len(SAIDAS_INVERSO),), np.nan)
+    regime = np.zeros(alvos.shape, dtype=int)
+    for indice in np.ndindex(alvos.shape):
+        try:
+            params_inv, results = calcular_resultados_inverso(
+                float(alvos[indice]), {**base, **NEUTROS}, _composicao(float(efetividades[indice])),
+                processo=_processo_deterministico,
+            )
+        except ValueError:
+            continue
+        saidas[indice] = [_saida(nome, results, params_inv) for nome in SAIDAS_INVERSO]
+        regime[indice] = sum(2 ** i for i, etapa in enumerate(ETAPAS) if f'volume_original_{etapa}' in params_inv)
+        # Correção da aeração em calcular_biorreatores_inverso (fermentador pelo meio da etapa)
+        fermentador = params_inv.get('volume_original_fermentador', params_inv['volume_fermentador'])
+        if not math.isclose(fermentador, params_inv['volume_meio_total'] / (1 - params_inv['aeracao_desejada'] / 100)):
+            regime[indice] += 2 ** len(ETAPAS)
+    return list(np.moveaxis(saidas, -1, 0)), regime
+
+
+def _pares(valores, eixo):
+    # Vizinhos consecutivos ao longo de um eixo: (a[..., :-1, ...], a[..., 1:, ...])
+    antes = [slice(None)] * valores.ndim
+    depois = [slice(None)] * valores.ndim
+    antes[eixo], depois[eixo] = slice(None, -1), slice(1, None)
+    return valores[tuple(antes)], valores[tuple(depois)]
+
+
+def construir_tabela(diretorio, tipo, eixos, avaliar, base, saidas):
+    # Avalia `avaliar(base, *malha)` -> (uma lista de arrays por saída, regime inteiro) nos nós e
+    # nos pontos médios das arestas e grava valores, limites de erro por célula e a descrição
+    inicio = time.perf_counter()
+    grades = [np.linspace(a, b, int(n)) for a, b, n in eixos.values()]
+
+    def avaliar_grade(coordenadas):
+        malha = np.meshgrid(*coordenadas, indexing='ij', sparse=True)
+        forma = tuple(len(c) for c in coordenadas)
+        valores, regime = avaliar(base, *malha)
+        valores = np.stack([np.broadcast_to(np.asarray(v, dtype=float), forma) for v in valores], axis=-1)
+        return valores, np.broadcast_to(regime, forma)
+
+    valores, regime = avaliar_grade(grades)
+    erros = np.zeros(tuple(len(g) - 1 for g in grades) + (len(saidas),))
+    for eixo, grade in enumerate(grades):
+        meios = (grade[:-1] + grade[1:]) / 2
+        exatos, _ = avaliar_grade(grades[:eixo] + [meios] + grades[eixo + 1:])
+        desvio = np.abs(exatos - sum(_pares(valores, eixo)) / 2)
+        # Maior desvio entre as arestas da célula paralelas ao eixo
+        for outro in range(len(grades)):
+            if outro != eixo:
+                desvio = np.maximum(*_pares(desvio, outro))
+        erros += 2 * desvio
+
+    # Arredondamento do float32: até meio ulp do maior vértice da célula
+    maior = np.abs(valores)
+    for eixo in range(len(grades)):
+        maior = np.maximum(*_pares(maior, eixo))
+    erros += maior * np.finfo(np.float32).eps / 2
+
+    # Mudança de regime dentro da célula: sem limite garantido
+    menor_regime = maior_regime = regime
+    for eixo in range(len(grades)):
+        menor_regime = np.minimum(*_pares(menor_regime, eixo))
+        maior_regime = np.maximum(*_pares(maior_regime, eixo))
+    erros[menor_regime != maior_regime] = np.inf
+
+    os.makedirs(diretorio, exist_ok=True)
+    valores.astype(np.float32).tofile(os.path.join(diretorio, 'valores.bin'))
+    # Arredondado para cima, para o limite continuar valendo em float32
+    np.nextafter(erros.astype(np.float32), np.float32(np.inf)).tofile(os.path.join(diretorio, 'erros.bin'))
+    descricao = {
+        'tipo': tipo,
+        'eixos': {nome: [float(a), float(b), int(n)] for nome, (a, b, n) in eixos.items()},
+        'saidas': list(saidas),
+        'base': base,
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'tempo_construcao_s': time.perf_counter() - inicio,
+    }
+    with open(os.path.join(diretorio, ARQUIVO_TABELA), 'w', encoding='utf-8') as arquivo:
+        json.dump(descricao, arquivo, indent=1, ensure_ascii=False)
+    return TabelaInterpolacao(diretorio)
+
+
+def construir_direto(diretorio=os.path.join(DIRETORIO_TABELAS, 'direto'), eixos=EIXOS_DIRETO, base=None):
+    return construir_tabela(
+        diretorio, 'direto', eixos, _avaliar_direto, base_direto() if base is None else base, SAIDAS_DIRETO
+    )
+
+
+def construir_inverso(diretorio=os.path.join(DIRETORIO_TABELAS, 'inverso'), eixos=EIXOS_INVERSO, base=None):
+    return construir_tabela(
+        diretorio, 'inverso', eixos, _avaliar_inverso, base_inverso() if base is None else base, SAIDAS_INVERSO
+    )
+
+
+class TabelaInterpolacao:
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, ARQUIVO_TABELA), encoding='utf-8') as arquivo:
+            descricao = json.load(arquivo)
+        self.tipo = descricao['tipo']
+        self.eixos = {nome: tuple(eixo) for nome, eixo in descricao['eixos'].items()}
+        self.saidas = tuple(descricao['saidas'])
+        self.base = descricao['base']
+        self.data = descricao['data']
+        # Em listas de floats: a consulta de um ponto é aritmética em Python, sem arrays temporários
+        self._inicio = [float(a) for a, _, _ in self.eixos.values()]
+        self._passo = [(b - a) / (n - 1) for a, b, n in self.eixos.values()]
+        self._pontos = [int(n) for _, _, n in self.eixos.values()]
+        forma = tuple(self._pontos)
+        self.valores = np.memmap(
+            os.path.join(diretorio, 'valores.bin'), dtype=np.float32, mode='r', shape=forma + (len(self.saidas),)
+        )
+        self.erros = np.memmap(
+            os.path.join(diretorio, 'erros.bin'), dtype=np.float32, mode='r',
+            shape=tuple(n - 1 for n in forma) + (len(self.saidas),)
+        )
+        # Vistas ndarray dos mesmos mapas: fatiar um np.memmap custa alguns µs a mais por consulta
+        self._valores = self.valores.view(np.ndarray)
+        self._erros = self.erros.view(np.ndarray)
+
+    def consultar(self, ponto):
+        # ponto: uma coordenada por eixo. Retorna (valores, erros), arrays (saídas,), ou None fora da
+        # grade ou numa célula sem valor (meta rejeitada no dimensionamento)
+        indices, fracoes = [], []
+        for x, inicio, passo, pontos in zip(ponto, self._inicio, self._passo, self._pontos):
+            t = (x - inicio) / passo
+            if not 0.0 <= t <= pontos - 1:  # também rejeita NaN
+                return None
+            i = min(int(t), pontos - 2)
+            indices.append(i)
+            fracoes.append(t - i)
+        # Pesos dos 2^d vértices na ordem do bloco (primeiro eixo mais significativo)
+        pesos = [1.0]
+        for f in fracoes:
+            pesos = [p * g for p in pesos for g in (1.0 - f, f)]
+        bloco = self._valores[tuple(slice(i, i + 2) for i in indices)]
+        valores = np.dot(pesos, bloco.reshape(len(pesos), -1))
+        erros = self._erros[tuple(indices)].astype(float)
+        if not math.isfinite(valores.sum() + erros.sum()):
+            return None
+        return valores, erros
+
+    def consultar_lote(self, pontos):
+        # pontos (n, eixos) -> valores (n, saídas), erros (n, saídas) e dentro (n,); NaN fora da grade
+        pontos = np.asarray(pontos, dtype=float)
+        t = (pontos - self._inicio) / self._passo
+        ultimo = np.asarray(self._pontos) - 1
+        with np.errstate(invalid='ignore'):
+            dentro = np.all((t >= 0) & (t <= ultimo), axis=1)
+        indices = np.clip(np.floor(np.nan_to_num(t)).astype(np.intp), 0, ultimo - 1)
+        fracoes = t - indices
+        valores = np.zeros((len(pontos), len(self.saidas)))
+        for canto in itertools.product((0, 1), repeat=len(self._pontos)):
+            peso = np.prod(np.where(canto, fracoes, 1 - fracoes), axis=1)
+            valores += peso[:, None] * self.valores[tuple((indices + canto).T)]
+        erros = np.array(self.erros[tuple(indices.T)], dtype=float)
+        dentro &= np.isfinite(valores).all(axis=1) & np.isfinite(erros).all(axis=1)
+        valores[~dentro] = np.nan
+        erros[~dentro] = np.nan
+        return valores, erros, dentro
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_tabela(tipo, diretorio=DIRETORIO_TABELAS):
+    # Tabela gerada por `python interpolacao.py`, ou None se ainda não foi construída
+    caminho = os.path.join(diretorio, tipo)
+    if not os.path.exists(os.path.join(caminho, ARQUIVO_TABELA)):
+        return None
+    return TabelaInterpolacao(caminho)
+
+
+def _confere_base(tabela, valores):
+    # As entradas fixas da tabela coincidem com as da consulta?
+    for nome, fixo in tabela.base.items():
+        valor = valores.get(nome)
+        if valor is None or isinstance(fixo, bool) != isinstance(valor, bool):
+            return False
+        if not math.isclose(float(valor), float(fixo), rel_tol=1e-9, abs_tol=1e-12):
+            return False
+    return True
+
+
+def coordenadas_direto(tabela, params, composicao_oleo):
+    # Ponto da consulta nos eixos da tabela direta, ou None se ela não se aplica a essas entradas
+    if params.get('usar_proporcoes_fixas', False):
+        return None
+    total = params['volume_frasco'] + params['volume_seed'] + params['volume_fermentador']
+    if total <= 0 or params['volume_fermentador'] <= 0:
+        return None
+    if not _confere_base(tabela, {**params, 'conc_ureia': params['massa_ureia_total'] * 1000 / total}):
+        return None
+    return (
+        params['massa_sacarose_total'] * 1000 / total,
+        params['massa_oleo_total'] * 1000 / params['volume_fermentador'],
+        params['volume_fermentador'],
+        efetividade_oleo(composicao_oleo),
+    )
+
+
+def coordenadas_inverso(tabela, massa_soforolipideo_alvo, params_inv, composicao_oleo_inv):
+    if not _confere_base(tabela, {**params_inv, 'ampliar_resfriamento': params_inv.get('ampliar_resfriamento', True)}):
+        return None
+    return massa_soforolipideo_alvo, efetividade_oleo(composicao_oleo_inv)
+
+
+def _resposta(saidas, valores, erros, origem, inicio):
+    return {
+        'origem': origem,
+        'valores': dict(zip(saidas, (float(v) for v in valores))),
+        'erros': dict(zip(saidas, (float(e) for e in erros))),
+        'tempo_us': (time.perf_counter() - inicio) * 1e6,
+    }
+
+
+def responder_direto(params, composicao_oleo, tabela=None, exato=False):
+    # Principais resultados do cálculo direto: interpolados ('origem' = 'tabela', com o limite de
+    # erro de cada saída) ou, fora da tabela ou com exato, pelo modelo determinístico ('exato', erro 0)
+    inicio = time.perf_counter()
+    tabela = None if exato else carregar_tabela('direto') if tabela is None else tabela
+    if tabela is not None:
+        ponto = coordenadas_direto(tabela, params, composicao_oleo)
+        consulta = None if ponto is None else tabela.consultar(ponto)
+        if consulta is not None:
+            return _resposta(tabela.saidas, *consulta, 'tabela', inicio)
+    results = _processo_deterministico({**NEUTROS, **params}, composicao_oleo)
+    valores = [_saida(nome, results) for nome in SAIDAS_DIRETO]
+    return _resposta(SAIDAS_DIRETO, valores, np.zeros(len(valores)), 'exato', inicio)
+
+
+def responder_inverso(massa_soforolipideo_alvo, params_inv, composicao_oleo_inv, catalogo=None, tabela=None, exato=False):
+    # Como responder_direto, para o dimensionamento inverso; com catálogo de vasos sempre exato.
+    # O cálculo exato pode rejeitar a meta (ValueError), como calcular_resultados_inverso
+    from SF_calculator import calcular_resultados_inverso
+
+    inicio = time.perf_counter()
+    tabela = None if exato else carregar_tabela('inverso') if tabela is None else tabela
+    if tabela is not None and catalogo is None:
+        ponto = coordenadas_inverso(tabela, massa_soforolipideo_alvo, params_inv, composicao_oleo_inv)
+        consulta = None if ponto is None else tabela.consultar(ponto)
+        if consulta is not None:
+            return _resposta(tabela.saidas, *consulta, 'tabela', inicio)
+    params_inv, results = calcular_resultados_inverso(
+        massa_soforolipideo_alvo, dict(params_inv), list(composicao_oleo_inv),
+        processo=_processo_deterministico, catalogo=catalogo
+    )
+    valores = [_saida(nome, results, params_inv) for nome in SAIDAS_INVERSO]
+    return _resposta(SAIDAS_INVERSO, valores, np.zeros(len(valores)), 'exato', inicio)
+
+
+def validar(tabela, avaliar, amostras=2000, semente=0):
+    # Compara a interpolação com o modelo em pontos aleatórios da grade: fração respondida pela tabela,
+    # fração das saídas dentro do limite informado, maior erro relativo ao limite e latência média da
+    # consulta de um ponto (µs)
+    rng = np.random.default_rng(semente)
+    pontos = np.column_stack([rng.uniform(a, b, amostras) for a, b, _ in tabela.eixos.values()])
+    valores, erros, dentro = tabela.consultar_lote(pontos)
+    exatos = np.column_stack([np.broadcast_to(np.asarray(v, dtype=float), (amostras,))
+                              for v in avaliar(tabela.base, *pontos.T)[0]])
+    validos = dentro & np.isfinite(exatos).all(axis=1)
+    desvio = np.abs(valores[validos] - exatos[validos])
+    limite = erros[validos]
+
+    inicio = time.perf_counter()
+    for ponto in pontos[:1000].tolist():
+        tabela.consultar(ponto)
+    latencia = (time.perf_counter() - inicio) / min(amostras, 1000) * 1e6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razao = np.where(desvio > 0, desvio / limite, 0.0)
+    return {
+        'pontos': int(validos.sum()),
+        'cobertura': float(np.mean(dentro)),
+        'dentro_do_limite': float(np.mean(desvio <= limite)) if desvio.size else 1.0,
+        'maior_razao_erro_limite': float(np.max(razao)) if razao.size else 0.0,
+        'erro_maximo': dict(zip(tabela.saidas, desvio.max(axis=0).tolist())) if desvio.size else {},
+        'limite_mediano': dict(zip(tabela.saidas, np.median(limite, axis=0).tolist())) if limite.size else {},
+        'latencia_us': latencia,
+    }
+
+
+if __name__ == "__main__":
+    # Uso: python interpolacao.py [--so direto|inverso] [--diretorio tabelas_interpolacao] [--amostras 2000]
+    # Constrói as tabelas (etapa de implantação) e as valida contra o modelo
+    parser = argparse.ArgumentParser(description="Constrói as tabelas de interpolação do app.")
+    parser.add_argument('--so', choices=('direto', 'inverso'))
+    parser.add_argument('--diretorio', default=DIRETORIO_TABELAS)
+    parser.add_argument('--amostras', type=int, default=2000)
+    args = parser.parse_args()
+
+    construtores = {'direto': (construir_direto, _avaliar_direto), 'inverso': (construir_inverso, _avaliar_inverso)}
+    for tipo, (construir, avaliar) in construtores.items():
+        if args.so and tipo != args.so:
+            continue
+        inicio = time.perf_counter()
+        tabela = construir(os.path.join(args.diretorio, tipo))
+        tamanho = (tabela.valores.nbytes + tabela.erros.nbytes) / 1e6
+        print(f"{tipo}: {tabela.valores.shape[:-1]} pontos x {len(tabela.saidas)} saídas, {tamanho:.1f} MB, "
+              f"construída em {time.perf_counter() - inicio:.1f} s")
+        validacao = validar(tabela, avaliar, args.amostras if tipo == 'direto' else args.amostras // 10)
+        print(f"  {validacao['cobertura']:.1%} dos pontos respondidos pela tabela; "
+              f"{validacao['dentro_do_limite']:.2%} das saídas dentro "
+              f"do limite (maior erro/limite {validacao['maior_razao_erro_limite']:.2f}); "
+              f"consulta de um ponto em {validacao['latencia_us']:.1f} µs")
+        for nome, erro in validacao['erro_maximo'].items():
+            print(f"  {nome:<40} erro máx. {erro:12.4g}   limite mediano {validacao['limite_mediano'][nome]:12.4g}")
@@ -0,0 +1,347 @@
+import numpy as np
+
+from downstream import calcular_downstream
+from SF_calculator import (
+    MM,
+    calc_biomassa,
+    calcular_agua_necessaria,
+    calcular_sais_necessarios,
+    calcular_volume_etapa,
+    hidrolise_sacarose,
+)
+
+# Cálculo em lote: mesma modelagem de calcular_processo, mas cada parâmetro pode
+# ser um escalar ou um array NumPy (com broadcasting), avaliando milhões de
+# cenários de uma vez sem laços em Python.
+
+ETAPAS = ('frasco', 'seed', 'fermentador')
+
+# Ordem dos campos em composicao_oleo
+CAMPOS_OLEO = ('pOleic', 'pLinoleic', 'pPalmitic', 'pLinolenic', 'pStearic', 'mLinoleic', 'mLinolenic')
+
+
+def forma_lote(params, composicao_oleo):
+    # Forma resultante do broadcasting de todas as entradas numéricas
+    formas = [np.shape(v) for v in params.values() if not isinstance(v, (bool, str))]
+    formas += [np.shape(c) for c in composicao_oleo]
+    return np.broadcast_shapes(*formas)
+
+
+def oleo_efetivo_lote(oleo_total, composicao_oleo, dtype=float):
+    # Massa de ácido oleico equivalente (oleico mais a parte metabolizada do linoleico e do linolênico)
+    pOleic, pLinoleic, pPalmitic, pLinolenic, pStearic, mLinoleic, mLinolenic = (
+        np.asarray(c, dtype=dtype) for c in composicao_oleo
+    )
+    massa_total = np.asarray(oleo_total, dtype=dtype)
+
+    massOleic = (pOleic / 100) * massa_total
+    massLinoleic = (pLinoleic / 100) * massa_total
+    massLinolenic = (pLinolenic / 100) * massa_total
+    return massOleic + (mLinoleic / 100) * massLinoleic + (mLinolenic / 100) * massLinolenic
+
+
+def limitar_por_oleo(glicose, oleo_efetivo, rendimento):
+    # Mesma regra de calc_soforolipideo, aplicada elemento a elemento, a partir do óleo
+    # metabolizável disponível
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mols_glicose = glicose / (MM['glicose'] / 1000)
+        massa_oleo_necessario = mols_glicose / 4 * (MM['acidoOleico'] / 1000)
+
+        limitante = oleo_efetivo < massa_oleo_necessario
+        percentual_atingido = np.where(limitante, oleo_efetivo / massa_oleo_necessario, 1.0)
+
+    return {
+        'massa': glicose * percentual_atingido * rendimento,
+        'oleo_consumido': np.where(limitante, oleo_efetivo, massa_oleo_necessario),
+        'limitante': limitante,
+        'percentual_oleo': percentual_atingido * 100,
+        'oleo_necessario': massa_oleo_necessario,
+        'oleo_efetivo': oleo_efetivo,
+    }
+
+
+def calc_soforolipideo_lote(glicose, oleo_total, rendimento, composicao_oleo, dtype=float):
+    effectiveOleic = oleo_efetivo_lote(oleo_total, composicao_oleo, dtype)
+    resultado = limitar_por_oleo(glicose, effectiveOleic, rendimento)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado['percentual_efetividade'] = (effectiveOleic / np.asarray(oleo_total, dtype=dtype)) * 100
+    return resultado
+
+
+def calcular_processo_lote(params, composicao_oleo, rng=None, compacto=False):
+    # Sem rng o cálculo é determinístico (variação aleatória nula).
+    # Com rng (np.random.Generator) reproduz a variação aleatória de calcular_processo.
+    # compacto=True calcula em float32 (ver ERRO_RELATIVO_COMPACTO).
+    forma = forma_lote(params, composicao_oleo)
+    dtype = np.float32 if compacto else np.float64
+    p = {k: (v if isinstance(v, (bool, str)) else np.asarray(v, dtype=dtype)) for k, v in params.items()}
+
+    def ruido(minimo, maximo):
+        if rng is None:
+            return 0.0
+        return rng.uniform(minimo, maximo, size=forma).astype(dtype, copy=False)
+
+    volume_frasco = p['volume_frasco']
+    volume_seed = p['volume_seed']
+    volume_fermentador = p['volume_fermentador']
+    total_volume = volume_frasco + volume_seed + volume_fermentador
+
+    if params.get('usar_proporcoes_fixas', False):
+        prop_frasco = p.get('prop_frasco', 0.05)
+        prop_seed = p.get('prop_seed', 0.60)
+        prop_ferm = p.get('prop_ferm', 0.80)
+    else:
+        prop_frasco = volume_frasco / total_volume
+        prop_seed = volume_seed / total_volume
+        prop_ferm = volume_fermentador / total_volume
+
+    massa_sacarose_frasco = p['massa_sacarose_total'] * prop_frasco
+    massa_sacarose_seed = p['massa_sacarose_total'] * prop_seed
+    massa_sacarose_ferm = p['massa_sacarose_total'] * prop_ferm
+
+    massa_ureia_frasco = np.maximum(0.001, p['massa_ureia_total'] * prop_frasco)
+    massa_ureia_seed = p['massa_ureia_total'] * prop_seed
+    massa_ureia_ferm = p['massa_ureia_total'] * prop_ferm
+    massa_oleo_ferm = p['massa_oleo_total']
+
+    vol_frasco_calc, _ = calcular_volume_etapa(massa_sacarose_frasco, massa_ureia_frasco, 0, volume_frasco)
+    vol_seed_calc, _ = calcular_volume_etapa(massa_sacarose_seed, massa_ureia_seed, 0, volume_seed)
+    vol_ferm_calc, _ = calcular_volume_etapa(massa_sacarose_ferm, massa_ureia_ferm, massa_oleo_ferm, volume_fermentador)
+
+    porcentagem_agua_no_meio = p.get('porcentagem_agua', 0.60)
+    porcentagem_insumos_no_meio = 1 - porcentagem_agua_no_meio
+    porcentagem_aeracao = p.get('porcentagem_aeracao', 20) / 100
+
+    volume_meio_frasco = vol_frasco_calc / porcentagem_insumos_no_meio
+    volume_meio_seed = vol_seed_calc / porcentagem_insumos_no_meio
+    volume_meio_ferm = vol_ferm_calc / porcentagem_insumos_no_meio
+
+    percentual_aeracao_frasco = (volume_frasco - volume_meio_frasco) / volume_frasco * 100
+    percentual_aeracao_seed = (volume_seed - volume_meio_seed) / volume_seed * 100
+    percentual_aeracao_ferm = (volume_fermentador - volume_meio_ferm) / volume_fermentador * 100
+    aeracao_minima = 15.0
+
+    frasco_acucares = hidrolise_sacarose(massa_sacarose_frasco * 1000)
+    frasco_biomassa = calc_biomassa(frasco_acucares, p['rend_biomassa'])
+
+    seed_volume_inoculo = volume_seed * p['prop_inoculo_frasco']
+    seed_acucares = hidrolise_sacarose(massa_sacarose_seed * 1000)
+    seed_biomassa_inicial = frasco_biomassa * (seed_volume_inoculo / volume_frasco)
+    seed_biomassa_produzida = calc_biomassa(seed_acucares, p['rend_biomassa'])
+    seed_biomassa = seed_biomassa_inicial + seed_biomassa_produzida
+
+    ferm_volume_inoculo = volume_fermentador * p['prop_inoculo_seed']
+    ferm_acucares = hidrolise_sacarose(massa_sacarose_ferm * 1000)
+    ferm_glicose_biomassa = ferm_acucares * p['prop_glicose_biomassa']
+    ferm_glicose_soforo = ferm_acucares * (1 - p['prop_glicose_biomassa'])
+    ferm_biomassa_inicial = seed_biomassa * (ferm_volume_inoculo / volume_seed)
+    ferm_biomassa_produzida = calc_biomassa(ferm_glicose_biomassa, p['rend_biomassa'])
+
+    # Variação aleatória e limites mínimos, na mesma ordem de calcular_processo
+    frasco_acucares = np.maximum(0.001, frasco_acucares + ruido(-0.005, 0.005))
+    frasco_biomassa = np.maximum(0.001, frasco_biomassa + ruido(-0.005, 0.005))
+    massa_sacarose_frasco = np.maximum(0.001, massa_sacarose_frasco + ruido(-0.005, 0.005))
+    massa_ureia_frasco = np.maximum(0.001, massa_ureia_frasco + ruido(-0.005, 0.005))
+
+    seed_acucares = np.maximum(0.1, seed_acucares + ruido(-5, 5))
+    seed_biomassa_produzida = np.maximum(0.1, seed_biomassa_produzida + ruido(-5, 5))
+    seed_biomassa = seed_biomassa_inicial + seed_biomassa_produzida
+    massa_sacarose_seed = np.maximum(0.1, massa_sacarose_seed + ruido(-5, 5))
+    massa_ureia_seed = np.maximum(0.1, massa_ureia_seed + ruido(-5, 5))
+
+    ferm_acucares = np.maximum(1.0, ferm_acucares + ruido(-5, 5))
+    ferm_glicose_biomassa = np.maximum(0.5, ferm_glicose_biomassa + ruido(-5, 5))
+    ferm_glicose_soforo = np.maximum(0.5, ferm_glicose_soforo + ruido(-5, 5))
+    ferm_biomassa_produzida = np.maximum(1.0, ferm_biomassa_produzida + ruido(-5, 5))
+    ferm_biomassa = ferm_biomassa_inicial + ferm_biomassa_produzida
+    massa_sacarose_ferm = np.maximum(1.0, massa_sacarose_ferm + ruido(-5, 5))
+    massa_ureia_ferm = np.maximum(0.5, massa_ureia_ferm + ruido(-5, 5))
+    soforo_result = calc_soforolipideo_lote(ferm_glicose_soforo, massa_oleo_ferm, p['rend_soforolipideo'], composicao_oleo, dtype)
+
+    mols_soforolipideo = soforo_result['massa'] / (MM['soforolipideo'] / 1000)
+    mols_biomassa = ferm_biomassa / (MM['biomassa'] / 1000)
+    massa_agua_gerada = (mols_soforolipideo * 14 + mols_biomassa * 0.5) * 18 / 1000
+
+    soforolipideo_produzido = soforo_result['massa'] + ruido(2, 5)
+
+    def b(valor):
+        # No modo compacto, valores que só dependem de escalares podem ter sido promovidos a float64
+        valor = np.asarray(valor)
+        if valor.dtype.kind == 'f' and valor.dtype != dtype:
+            valor = valor.astype(dtype)
+        return np.broadcast_to(valor, forma)
+
+    results = {
+        'frasco': {
+            'volume': b(volume_frasco),
+            'sacarose_consumida': b(massa_sacarose_frasco),
+            'ureia_consumida': b(massa_ureia_frasco),
+            'acucares_fermentaveis': b(frasco_acucares),
+            'biomassa_produzida': b(frasco_biomassa),
+            'soforolipideo_produzido': b(dtype(0.0)),
+            'conc_biomassa': b(frasco_biomassa * 1000 / volume_frasco),
+            'volume_excedido': b(volume_meio_frasco > volume_frasco * (1 - porcentagem_aeracao)),
+            'volume_insumos': b(vol_frasco_calc),
+            'volume_agua': b(volume_meio_frasco * porcentagem_agua_no_meio),
+            'volume_meio': b(volume_meio_frasco),
+            'percentual_aeracao': b(percentual_aeracao_frasco),
+            'aeracao_suficiente': b(percentual_aeracao_frasco >= aeracao_minima)
+        },
+        'seed': {
+            'volume': b(volume_seed),
+            'volume_inoculo': b(seed_volume_inoculo),
+            'sacarose_consumida': b(massa_sacarose_seed),
+            'ureia_consumida': b(massa_ureia_seed),
+            'acucares_fermentaveis': b(seed_acucares),
+            'biomassa_inicial': b(seed_biomassa_inicial),
+            'biomassa_produzida': b(seed_biomassa_produzida),
+            'biomassa_total': b(seed_biomassa),
+            'soforolipideo_produzido': b(dtype(0.0)),
+            'conc_biomassa': b(seed_biomassa * 1000 / volume_seed),
+            'volume_excedido': b(volume_meio_seed > volume_seed * (1 - porcentagem_aeracao)),
+            'volume_insumos': b(vol_seed_calc),
+            'volume_agua': b(volume_meio_seed * porcentagem_agua_no_meio),
+            'volume_meio': b(volume_meio_seed),
+            'percentual_aeracao': b(percentual_aeracao_seed),
+            'aeracao_suficiente': b(percentual_aeracao_seed >= aeracao_minima)
+        },
+        'fermentador': {
+            'volume': b(volume_fermentador),
+            'volume_inoculo': b(ferm_volume_inoculo),
+            'sacarose_consumida': b(massa_sacarose_ferm),
+            'ureia_consumida': b(massa_ureia_ferm),
+            'acucares_fermentaveis': b(ferm_acucares),
+            'acucares_biomassa': b(ferm_glicose_biomassa),
+            'acucares_soforo': b(ferm_glicose_soforo),
+            'biomassa_inicial': b(ferm_biomassa_inicial),
+            'biomassa_produzida': b(ferm_biomassa_produzida),
+            'biomassa_total': b(ferm_biomassa),
+            'soforolipideo_produzido': b(soforolipideo_produzido),
+            'conc_biomassa': b(ferm_biomassa * 1000 / volume_fermentador),
+            'conc_soforolipideo': b(soforolipideo_produzido * 1000 / volume_fermentador),
+            'oleo_inicial': b(massa_oleo_ferm),
+            'oleo_consumido': b(soforo_result['oleo_consumido']),
+            'oleo_residual': b(massa_oleo_ferm - soforo_result['oleo_consumido']),
+            'oleo_necessario': b(soforo_result['oleo_necessario']),
+            'oleo_efetivo': b(soforo_result['oleo_efetivo']),
+            'percentual_efetividade': b(soforo_result['percentual_efetividade']),
+            'limitante': b(soforo_result['limitante']),
+            'percentual_oleo': b(soforo_result['percentual_oleo']),
+            'produtividade': b(soforolipideo_produzido / (volume_fermentador * p['ferment_time']) * 1000),
+            'ethanol': b(soforolipideo_produzido * p['ethanol_per_kg']),
+            'hcl': b(massa_oleo_ferm * p['hcl_per_l']),
+            'volume_excedido': b(volume_meio_ferm > volume_fermentador * (1 - porcentagem_aeracao)),
+            'volume_insumos': b(vol_ferm_calc),
+            'volume_agua': b(volume_meio_ferm * porcentagem_agua_no_meio),
+            'volume_meio': b(volume_meio_ferm),
+            'percentual_aeracao': b(percentual_aeracao_ferm),
+            'aeracao_suficiente': b(percentual_aeracao_ferm >= aeracao_minima)
+        },
+        'agua_gerada': b(massa_agua_gerada),
+        'porcentagem_aeracao_desejada': b(porcentagem_aeracao * 100)
+    }
+
+    results['agua_necessaria'] = {k: b(v) for k, v in calcular_agua_necessaria(p, results).items()}
+    results['sais_necessarios'] = {k: b(v) for k, v in calcular_sais_necessarios(p, results).items()}
+    if params.get('usar_downstream', False):
+        downstream = calcular_downstream(p, results)
+        results['downstream'] = {k: (v if k == 'iteracoes' else b(v)) for k, v in downstream.items()}
+    return results
+
+
+def resultados_escalares(results):
+    # Resultados de um único cenário (arrays 0-d) como escalares Python, no formato de calcular_processo
+    return {k: (resultados_escalares(v) if isinstance(v, dict) else np.asarray(v).item()) for k, v in results.items()}
+
+
+def achatar_resultados(results):
+    # Converte o dicionário aninhado de resultados em colunas 1D '<etapa>_<campo>'
+    colunas = {}
+    for etapa in ETAPAS:
+        for campo, valor in results[etapa].items():
+            colunas[f'{etapa}_{campo}'] = np.ravel(valor)
+    for grupo in ('agua_necessaria', 'sais_necessarios'):
+        for etapa, valor in results[grupo].items():
+            colunas[f'{grupo}_{etapa}'] = np.ravel(valor)
+    colunas['agua_gerada'] = np.ravel(results['agua_gerada'])
+    colunas['porcentagem_aeracao_desejada'] = np.ravel(results['porcentagem_aeracao_desejada'])
+    for campo, valor in results.get('downstream', {}).items():
+        if campo != 'iteracoes':
+            colunas[f'downstream_{campo}'] = np.ravel(valor)
+    return colunas
+
+
+def achatar_entradas(params, composicao_oleo):
+    # Colunas 1D com os parâmetros numéricos e a composição do óleo de cada cenário
+    forma = forma_lote(params, composicao_oleo)
+    colunas = {}
+    for chave, valor in params.items():
+        if isinstance(valor, str):
+            continue
+        colunas[chave] = np.ravel(np.broadcast_to(valor, forma))
+    for campo, valor in zip(CAMPOS_OLEO, composicao_oleo):
+        colunas[campo] = np.ravel(np.broadcast_to(np.asarray(valor, dtype=float), forma))
+    return colunas
+
+
+# Modo compacto (calcular_processo_lote(..., compacto=True) + compactar_colunas): floats em
+# float32 e booleanos empacotados em bits, para varreduras grandes. Erro em relação ao
+# cálculo em float64 (benchmark_compacto.py): |x32 - x64| <= ERRO_RELATIVO_COMPACTO * |x64|
+# + ERRO_ABSOLUTO_COMPACTO em todas as colunas. Os indicadores booleanos (limitante,
+# volume_excedido, aeracao_suficiente) só podem divergir quando o valor comparado está a
+# menos desse erro do limite.
+ERRO_RELATIVO_COMPACTO = 1e-5
+ERRO_ABSOLUTO_COMPACTO = 1e-4  # na unidade da coluna (kg, L, %, g/L); cobre cancelamentos perto de zero
+
+
+class MascaraCompacta:
+    # Vetor booleano em bits (np.packbits): 1/8 da memória de um array bool
+    __slots__ = ('bits', 'tamanho')
+
+    def __init__(self, valores):
+        valores = np.ravel(np.asarray(valores, dtype=bool))
+        self.bits = np.packbits(valores)
+        self.tamanho = valores.size
+
+    @classmethod
+    def de_bits(cls, bits, tamanho):
+        # A partir de bits já empacotados (p.ex. um np.memmap), sem copiá-los
+        mascara = cls.__new__(cls)
+        mascara.bits = bits
+        mascara.tamanho = tamanho
+        return mascara
+
+    def __len__(self):
+        return self.tamanho
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def __array__(self, dtype=None, copy=None):
+        valores = np.unpackbits(self.bits, count=self.tamanho).view(bool)
+        return valores if dtype is None else valores.astype(dtype)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(self.tamanho)
+            if passo == 1:
+                # Só desempacota os bytes que cobrem a fatia
+                byte = inicio // 8
+                valores = np.unpackbits(self.bits[byte:-(-fim // 8)]).view(bool)
+                return valores[inicio - byte * 8:fim - byte * 8]
+        return np.asarray(self)[indice]
+
+
+def compactar_colunas(colunas):
+    # Colunas achatadas (achatar_entradas/achatar_resultados) em float32 e MascaraCompacta
+    compactas = {}
+    for nome, valor in colunas.items():
+        valor = np.asarray(valor)
+        if valor.dtype == bool:
+            compactas[nome] = MascaraCompacta(valor)
+        elif valor.dtype.kind == 'f':
+            compactas[nome] = valor.astype(np.float32, copy=False)
+        else:
+            compactas[nome] = valor
+    return compactas
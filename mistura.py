@@ -0,0 +1,185 @@
+import csv
+import functools
+import itertools
+import os
+import sys
+
+import numpy as np
+
+from SF_calculator import MM
+
+# Formulação de misturas de óleos de custo mínimo. Cada óleo tem um perfil de ácidos graxos,
+# preço (R$/kg) e disponibilidade (kg); a efetividade da mistura é linear nas proporções, então
+# os dois modos são programas lineares:
+#   - efetividade alvo: min preço·x  s.a.  Σx = 1,  efetividade·x >= alvo,  0 <= x <= disponibilidade/massa
+#   - meta de soforolipídeo: min preço·m  s.a.  efetividade·m >= oleico necessário,  0 <= m <= disponibilidade
+# Com no máximo duas restrições além dos limites, o ótimo está num vértice com até duas variáveis
+# fora dos limites: os vértices são enumerados e resolvidos em forma fechada, vetorizados sobre
+# um lote de problemas (um por mês de preços, por exemplo).
+
+ARQUIVO_OLEOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'oleos.csv')
+
+# Perfil de cada óleo na ordem dos cinco primeiros campos de CAMPOS_OLEO
+PERFIL_OLEO = ('pOleic', 'pLinoleic', 'pPalmitic', 'pLinolenic', 'pStearic')
+MAX_OLEOS = 8
+TOLERANCIA = 1e-9
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_oleos(caminho=ARQUIVO_OLEOS):
+    # {nome: {'perfil': (5 %), 'preco': R$/kg, 'disponibilidade': kg}}; compartilhado, não alterar
+    with open(caminho, newline='', encoding='utf-8') as arquivo:
+        return {
+            linha['oleo']: {
+                'perfil': tuple(float(linha[c]) for c in PERFIL_OLEO),
+                'preco': float(linha['preco']),
+                'disponibilidade': float(linha['disponibilidade']) if linha['disponibilidade'] else np.inf,
+            }
+            for linha in csv.DictReader(arquivo)
+        }
+
+
+def efetividade_oleos(perfis, mLinoleic, mLinolenic):
+    # Fração do óleo aproveitada como ácido oleico equivalente (mesma regra de calc_soforolipideo)
+    perfis = np.asarray(perfis, dtype=float)
+    return (
+        perfis[..., 0] / 100
+        + (perfis[..., 1] / 100) * (np.asarray(mLinoleic, dtype=float)[..., None] / 100)
+        + (perfis[..., 3] / 100) * (np.asarray(mLinolenic, dtype=float)[..., None] / 100)
+    )
+
+
+def oleico_necessario(massa_soforolipideo, rend_soforolipideo):
+    # Ácido oleico equivalente (kg) para produzir a massa de soforolipídeo sem limitação por óleo
+    glicose = np.asarray(massa_soforolipideo, dtype=float) / np.asarray(rend_soforolipideo, dtype=float)
+    return glicose / (MM['glicose'] / 1000) / 4 * (MM['acidoOleico'] / 1000)
+
+
+@functools.lru_cache(maxsize=None)
+def _vertices(m, soma_unitaria):
+    # Padrões de vértice: (variáveis básicas, máscara das não básicas no limite superior, restrição ativa)
+    padroes = []
+    for ativa in (True, False):
+        r = int(soma_unitaria) + int(ativa)
+        for basicas in itertools.combinations(range(m), r):
+            livres = [j for j in range(m) if j not in basicas]
+            for superiores in itertools.product((False, True), repeat=len(livres)):
+                mascara = np.zeros(m, dtype=bool)
+                mascara[livres] = superiores
+                padroes.append((basicas, mascara, ativa))
+    return padroes
+
+
+def resolver_mistura(efetividade, preco, limite, alvo, soma_unitaria):
+    # min preco·y  s.a.  efetividade·y >= alvo,  [Σy = 1],  0 <= y <= limite
+    # efetividade, preco, limite: (..., m); alvo: (...). Retorna y (..., m) e custo (...), NaN se inviável.
+    efetividade, preco, limite = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (efetividade, preco, limite))
+    )
+    forma = np.broadcast_shapes(efetividade.shape[:-1], np.shape(alvo))
+    m = efetividade.shape[-1]
+    if not 1 <= m <= MAX_OLEOS:
+        raise ValueError(f"Informe de 1 a {MAX_OLEOS} óleos.")
+    e = np.broadcast_to(efetividade, forma + (m,)).reshape(-1, m)
+    c = np.broadcast_to(preco, forma + (m,)).reshape(-1, m)
+    u = np.broadcast_to(limite, forma + (m,)).reshape(-1, m)
+    b = np.broadcast_to(np.asarray(alvo, dtype=float), forma).reshape(-1)
+
+    melhor = np.full(len(b), np.inf)
+    solucao = np.full((len(b), m), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for basicas, superiores, ativa in _vertices(m, soma_unitaria):
+            # Não básicas no limite (um limite infinito não é vértice)
+            y = np.where(superiores, u, 0.0)
+            valido = ~np.isinf(y).any(1)
+            y = np.where(np.isinf(y), 0.0, y)
+            resto_soma = 1 - y.sum(1)
+            resto_alvo = b - (e * y).sum(1)
+            if len(basicas) == 1:
+                j = basicas[0]
+                y[:, j] = resto_soma if soma_unitaria else resto_alvo / e[:, j]
+            elif len(basicas) == 2:
+                # y_i + y_j = resto_soma; e_i y_i + e_j y_j = resto_alvo
+                i, j = basicas
+                det = e[:, j] - e[:, i]
+                valido &= np.abs(det) > TOLERANCIA
+                y[:, i] = (e[:, j] * resto_soma - resto_alvo) / det
+                y[:, j] = (resto_alvo - e[:, i] * resto_soma) / det
+            escala = np.maximum(1.0, np.abs(b))
+            valido &= np.all((y >= -TOLERANCIA * escala[:, None]) & (y <= u + TOLERANCIA * escala[:, None]), axis=1)
+            if not ativa:
+                valido &= (e * y).sum(1) >= b - TOLERANCIA * escala
+            custo = np.where(valido, (c * np.clip(y, 0.0, u)).sum(1), np.inf)
+            melhora = custo < melhor
+            melhor = np.where(melhora, custo, melhor)
+            solucao[melhora] = np.clip(y[melhora], 0.0, u[melhora])
+
+    melhor[np.isinf(melhor)] = np.nan
+    return solucao.reshape(forma + (m,)), melhor.reshape(forma)
+
+
+def _parametros_oleos(oleos, precos, disponibilidade):
+    oleos = carregar_oleos() if oleos is None else oleos
+    nomes = list(oleos)
+    perfis = np.array([oleos[n]['perfil'] for n in nomes])
+    precos = np.array([oleos[n]['preco'] for n in nomes]) if precos is None else np.asarray(precos, dtype=float)
+    disponibilidade = (
+        np.array([oleos[n]['disponibilidade'] for n in nomes]) if disponibilidade is None
+        else np.asarray(disponibilidade, dtype=float)
+    )
+    return nomes, perfis, precos, disponibilidade
+
+
+def mistura_por_efetividade(efetividade_alvo, mLinoleic, mLinolenic, massa_oleo=None, oleos=None, precos=None,
+                            disponibilidade=None):
+    # Proporções (frações mássicas) de menor preço por kg com efetividade >= alvo (fração).
+    # Com massa_oleo (kg), a disponibilidade limita a proporção de cada óleo.
+    # precos e disponibilidade (..., m) substituem os do arquivo e podem ter uma linha por problema.
+    nomes, perfis, precos, disponibilidade = _parametros_oleos(oleos, precos, disponibilidade)
+    limite = np.ones(len(nomes)) if massa_oleo is None else np.minimum(
+        1.0, disponibilidade / np.asarray(massa_oleo, dtype=float)[..., None]
+    )
+    efetividade = efetividade_oleos(perfis, mLinoleic, mLinolenic)
+    fracoes, preco_kg = resolver_mistura(efetividade, precos, limite, efetividade_alvo, soma_unitaria=True)
+    return {'oleos': nomes, 'fracoes': fracoes, 'preco_kg': preco_kg, 'perfil': composicao_mistura(perfis, fracoes)}
+
+
+def mistura_por_meta(massa_soforolipideo, rend_soforolipideo, mLinoleic, mLinolenic, oleos=None, precos=None,
+                     disponibilidade=None):
+    # Massas (kg) de cada óleo de menor custo que fornecem o oleico necessário para a meta
+    nomes, perfis, precos, disponibilidade = _parametros_oleos(oleos, precos, disponibilidade)
+    efetividade = efetividade_oleos(perfis, mLinoleic, mLinolenic)
+    necessario = oleico_necessario(massa_soforolipideo, rend_soforolipideo)
+    massas, custo = resolver_mistura(efetividade, precos, disponibilidade, necessario, soma_unitaria=False)
+    total = massas.sum(-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fracoes = massas / total[..., None]
+    return {
+        'oleos': nomes, 'massas': massas, 'massa_oleo_total': total, 'custo': custo,
+        'oleico_necessario': necessario, 'perfil': composicao_mistura(perfis, fracoes),
+    }
+
+
+def composicao_mistura(perfis, fracoes):
+    # Perfil de ácidos graxos da mistura (..., 5), média ponderada pelas frações mássicas
+    return np.asarray(fracoes, dtype=float) @ np.asarray(perfis, dtype=float)
+
+
+if __name__ == "__main__":
+    # Uso: python mistura.py precos_mensais.csv efetividade_alvo(%) [mLinoleic] [mLinolenic]
+    # O CSV tem uma coluna 'mes' e uma coluna de preço (R$/kg) por óleo de oleos.csv
+    with open(sys.argv[1], newline='', encoding='utf-8') as arquivo:
+        linhas = list(csv.DictReader(arquivo))
+    alvo = float(sys.argv[2]) / 100
+    mLinoleic = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+    mLinolenic = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+
+    oleos = carregar_oleos()
+    precos = np.array([[float(linha[nome]) for nome in oleos] for linha in linhas])
+    resultado = mistura_por_efetividade(alvo, mLinoleic, mLinolenic, precos=precos)
+    print(f"{'mês':<10}" + "".join(f"{nome[:14]:>16}" for nome in oleos) + f"{'R$/kg':>10}")
+    for linha, fracoes, preco in zip(linhas, resultado['fracoes'], resultado['preco_kg']):
+        if np.isnan(preco):
+            print(f"{linha['mes']:<10}inviável")
+            continue
+        print(f"{linha['mes']:<10}" + "".join(f"{f:>16.1%}" for f in fracoes) + f"{preco:>10.2f}")
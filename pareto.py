@@ -0,0 +1,178 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from custos import carregar_precos
+from downstream import consumo_reagentes
+from lote import CAMPOS_OLEO, ETAPAS, calcular_processo_lote
+from sensibilidade import sequencia_sobol
+
+# Fronteira de Pareto de receitas: candidatos de uma sequência de Sobol sobre as faixas das
+# entradas de decisão, avaliados em blocos por calcular_processo_lote. Só os candidatos viáveis
+# (meio cabe no volume com a aeração mínima em todas as etapas) entram na ordenação não dominada,
+# que é acumulada bloco a bloco: a fronteira final é a fronteira da união das fronteiras parciais.
+
+# nome: (rótulo, sentido)
+OBJETIVOS = {
+    'conc_soforolipideo': ('Concentração de Soforolipídeo (g/L)', 'max'),
+    'produtividade': ('Produtividade (g/L/h)', 'max'),
+    'volume_total': ('Volume Total dos Reatores (L)', 'min'),
+    'materias_primas': ('Custo de Matérias-Primas (R$)', 'min'),
+}
+# Consumo de cada matéria-prima, mostrado junto com os objetivos
+CONSUMOS = {
+    'sacarose': 'Sacarose (kg)',
+    'oleo': 'Óleo (kg)',
+    'etanol': 'Etanol (L)',
+    'hcl': 'HCl (L)',
+}
+# Entradas variadas por padrão (decisões da receita)
+DECISAO_PADRAO = (
+    'volume_seed', 'volume_fermentador', 'massa_sacarose_total', 'massa_ureia_total', 'massa_oleo_total',
+    'ferment_time',
+)
+TAMANHO_BLOCO = 1_000_000
+
+
+def objetivos_lote(params, results, precos=None):
+    # Objetivos e consumos de matérias-primas de cada cenário
+    precos = carregar_precos() if precos is None else precos
+    ferm = results['fermentador']
+    etanol, hcl = consumo_reagentes(results)
+    consumos = {
+        'sacarose': sum(np.asarray(results[etapa]['sacarose_consumida'], dtype=float) for etapa in ETAPAS),
+        'oleo': np.asarray(ferm['oleo_inicial'], dtype=float),
+        'etanol': np.asarray(etanol, dtype=float),
+        'hcl': np.asarray(hcl, dtype=float),
+    }
+    return {
+        'conc_soforolipideo': np.asarray(ferm['conc_soforolipideo'], dtype=float),
+        'produtividade': np.asarray(ferm['produtividade'], dtype=float),
+        'volume_total': sum(np.asarray(params[f'volume_{etapa}'], dtype=float) for etapa in ETAPAS),
+        'materias_primas': sum(consumos[item] * precos[item] for item in CONSUMOS),
+        **consumos,
+    }
+
+
+def viaveis(results):
+    return np.logical_and.reduce([
+        ~np.asarray(results[etapa]['volume_excedido']) & np.asarray(results[etapa]['aeracao_suficiente'])
+        for etapa in ETAPAS
+    ])
+
+
+def _pivos(F, quantidade, semente=0):
+    # Minimizadores de somas ponderadas (pesos positivos) dos objetivos normalizados: todos são
+    # não dominados e, bem espalhados pela fronteira, dominam a maior parte dos candidatos
+    minimo, maximo = F.min(0), F.max(0)
+    normalizado = (F - minimo) / np.where(maximo > minimo, maximo - minimo, 1.0)
+    pesos = np.random.default_rng(semente).dirichlet(np.ones(F.shape[1]), quantidade)
+    return F[np.unique(np.argmin(pesos @ normalizado.T, axis=1))]
+
+
+def _dominados_por(F, referencia, tamanho_bloco):
+    dominado = np.zeros(len(F), dtype=bool)
+    for inicio in range(0, len(F), tamanho_bloco):
+        bloco = F[inicio:inicio + tamanho_bloco, None]
+        dominado[inicio:inicio + tamanho_bloco] = (
+            (referencia[None] <= bloco).all(-1) & (referencia[None] < bloco).any(-1)
+        ).any(1)
+    return dominado
+
+
+def nao_dominados(F, tamanho_bloco=1024, pivos=64):
+    # Índices das linhas de F (n x k, todos os objetivos a minimizar) que nenhuma outra domina.
+    # Um pré-filtro descarta o que algum pivô (ponto da fronteira) domina. Em ordem lexicográfica
+    # quem domina vem sempre antes do dominado, então uma única passada sobre os restantes compara
+    # cada bloco com a fronteira já encontrada (e consigo mesmo), sem revisitar pontos.
+    F = np.asarray(F, dtype=float)
+    if len(F) == 0:
+        return np.empty(0, dtype=np.int64)
+    restantes = np.arange(len(F))
+    for pivo in _pivos(F, pivos):
+        # Cada pivô só é comparado com o que sobrou dos anteriores
+        candidatos = F[restantes]
+        restantes = restantes[~((pivo <= candidatos).all(1) & (pivo < candidatos).any(1))]
+    ordem = restantes[np.lexsort(F[restantes].T[::-1])]
+    G = F[ordem]
+    fronteira = G[:0]
+    encontrados = []
+    for inicio in range(0, len(G), tamanho_bloco):
+        bloco = G[inicio:inicio + tamanho_bloco]
+        livre = ~_dominados_por(bloco, fronteira, tamanho_bloco) if len(fronteira) else np.ones(len(bloco), dtype=bool)
+        candidatos = bloco[livre]
+        novos = np.flatnonzero(livre)[~_dominados_por(candidatos, candidatos, tamanho_bloco)]
+        fronteira = np.concatenate([fronteira, bloco[novos]])
+        encontrados.append(novos + inicio)
+    return np.sort(ordem[np.concatenate(encontrados)])
+
+
+def _minimizar(objetivos, nomes):
+    return np.column_stack([objetivos[n] if OBJETIVOS[n][1] == 'min' else -objetivos[n] for n in nomes])
+
+
+def fronteira_pareto(params, composicao_oleo, faixas, n=100_000, objetivos=tuple(OBJETIVOS),
+                     tamanho_bloco=TAMANHO_BLOCO):
+    # faixas: {entrada de params ou CAMPOS_OLEO: (mínimo, máximo)}; demais entradas nos valores de params.
+    # Retorna (DataFrame da fronteira com as entradas variadas, objetivos e consumos; candidatos viáveis)
+    nomes = list(faixas)
+    minimo, maximo = np.array(list(faixas.values()), dtype=float).reshape(-1, 2).T
+    fronteira = None
+    total_viaveis = 0
+    for inicio in range(0, n, tamanho_bloco):
+        quantidade = min(tamanho_bloco, n - inicio)
+        X = minimo + sequencia_sobol(quantidade, len(nomes), inicio=inicio + 1) * (maximo - minimo)
+        colunas = dict(zip(nomes, X.T))
+        params_bloco = {**params, **{k: v for k, v in colunas.items() if k not in CAMPOS_OLEO}}
+        composicao = [colunas.get(c, v) for c, v in zip(CAMPOS_OLEO, composicao_oleo)]
+        results = calcular_processo_lote(params_bloco, composicao)
+
+        valores = objetivos_lote(params_bloco, results)
+        ok = viaveis(results) & np.all([np.isfinite(valores[o]) for o in objetivos], axis=0)
+        ok = np.broadcast_to(ok, (quantidade,))
+        total_viaveis += int(ok.sum())
+        bloco = pd.DataFrame({
+            **{k: v[ok] for k, v in colunas.items()},
+            **{k: np.broadcast_to(v, (quantidade,))[ok] for k, v in valores.items()},
+        })
+        if fronteira is not None:
+            bloco = pd.concat([fronteira, bloco], ignore_index=True)
+        fronteira = bloco.iloc[nao_dominados(_minimizar(bloco, objetivos))].reset_index(drop=True)
+
+    if fronteira is None:
+        fronteira = pd.DataFrame(columns=[*nomes, *OBJETIVOS, *CONSUMOS])
+    ordem = objetivos[0]
+    return fronteira.sort_values(ordem, ascending=OBJETIVOS[ordem][1] == 'min', ignore_index=True), total_viaveis
+
+
+def receita_da_fronteira(params, composicao_oleo, linha):
+    # params/composicao_oleo completos de uma linha da fronteira
+    params = dict(params)
+    composicao_oleo = list(composicao_oleo)
+    for nome, valor in linha.items():
+        if nome in CAMPOS_OLEO:
+            composicao_oleo[CAMPOS_OLEO.index(nome)] = float(valor)
+        elif nome in params:
+            params[nome] = float(valor)
+    return params, composicao_oleo
+
+
+if __name__ == "__main__":
+    # Uso: python pareto.py [número de candidatos]
+    from benchmark_compacto import COMPOSICAO_PADRAO, PARAMETROS_PADRAO
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    params = dict(PARAMETROS_PADRAO)
+    composicao_oleo = list(COMPOSICAO_PADRAO)
+    faixas = {
+        'volume_seed': (250.0, 1000.0), 'volume_fermentador': (2500.0, 10000.0),
+        'massa_sacarose_total': (200.0, 1000.0), 'massa_oleo_total': (50.0, 500.0),
+        'ferment_time': (96.0, 240.0), 'prop_glicose_biomassa': (0.1, 0.4),
+    }
+    inicio = time.perf_counter()
+    fronteira, total_viaveis = fronteira_pareto(params, composicao_oleo, faixas, n)
+    print(f"{n:,} candidatos, {total_viaveis:,} viáveis, {len(fronteira):,} na fronteira "
+          f"em {time.perf_counter() - inicio:.2f} s")
+    print(fronteira.head(20).round(2).to_string())
@@ -0,0 +1,229 @@
+import argparse
+import copy
+import datetime
+import functools
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Partida rápida do app. Os resultados do cenário padrão (as entradas iniciais dos widgets) são
+# calculados uma vez no deploy (python partida.py) e gravados num instantâneo que o app consulta no
+# lugar de recalculá-los a cada sessão. O instantâneo só vale para entradas idênticas às padrão e é
+# descartado se algum arquivo do modelo mudar depois de construído.
+# A medição (--medir) abre o app em processos novos, como a primeira visita após iniciar o
+# servidor, e anexa o tempo de partida e o da primeira interação a um histórico JSONL.
+# Este módulo é importado pelo app na partida: só biblioteca padrão no topo.
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_APP = os.path.join(DIRETORIO, 'SF_calculator.py')
+ARQUIVO_INSTANTANEO = os.path.join(DIRETORIO, 'instantaneo_padrao.pkl')
+ARQUIVO_HISTORICO = os.path.join(DIRETORIO, 'historico_partida.jsonl')
+# Arquivos de que os resultados do instantâneo dependem
+DEPENDENCIAS = (
+    'SF_calculator.py', 'lote.py', 'downstream.py', 'termico.py', 'custos.py', 'catalogo.py',
+    'calibracao.py', 'interpolacao.py', 'precos.csv', 'catalogo_reatores.csv', 'parametros_calibrados.json',
+    os.path.join('tabelas_interpolacao', 'direto', 'tabela.json'),
+    os.path.join('tabelas_interpolacao', 'inverso', 'tabela.json'),
+)
+TEMPO_LIMITE = 120  # s por execução do app
+
+_processo_novo = True
+
+
+def processo_novo():
+    # True só na primeira chamada do processo: a primeira sessão após iniciar o servidor
+    global _processo_novo
+    novo, _processo_novo = _processo_novo, False
+    return novo
+
+
+def assinatura_dependencias():
+    # Data de modificação de cada dependência (None se ausente)
+    assinatura = {}
+    for arquivo in DEPENDENCIAS:
+        try:
+            assinatura[arquivo] = os.stat(os.path.join(DIRETORIO, arquivo)).st_mtime_ns
+        except OSError:
+            assinatura[arquivo] = None
+    return assinatura
+
+
+def entradas_padrao():
+    # Entradas publicadas pelo app na abertura de cada seção (os valores iniciais dos widgets),
+    # lidas executando-o sem servidor
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(ARQUIVO_APP, default_timeout=TEMPO_LIMITE).run()
+    at.radio(key='secao').set_value("Cálculo Inverso").run()
+    if at.exception:
+        raise RuntimeError(f"Falha ao executar o app: {at.exception[0].value}")
+    return {
+        'direto': (at.session_state['params_direto'], at.session_state['composicao_direto']),
+        'inverso': (at.session_state['meta_inverso'], at.session_state['params_inverso'],
+                    at.session_state['composicao_inverso'], at.session_state['catalogo_inverso']),
+    }
+
+
+def construir_instantaneo(caminho=ARQUIVO_INSTANTANEO):
+    # Estimativa de óleo, resultados sem a variação aleatória (os do modo ao vivo) e resposta
+    # instantânea exata do cenário padrão de cada seção
+    from interpolacao import responder_direto, responder_inverso
+    from lote import calcular_processo_lote, resultados_escalares
+    from SF_calculator import calcular_resultados_inverso, catalogo_selecionado, estimativa_oleo
+
+    def deterministico(params, composicao_oleo):
+        return resultados_escalares(calcular_processo_lote(params, composicao_oleo))
+
+    assinatura = assinatura_dependencias()
+    entradas = entradas_padrao()
+    params, composicao_oleo = entradas['direto']
+    meta, params_inv, composicao_oleo_inv, usar_catalogo = entradas['inverso']
+    catalogo = catalogo_selecionado(usar_catalogo)
+    instantaneo = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'assinatura': assinatura,
+        'direto': {
+            'entradas': entradas['direto'],
+            'estimativa': estimativa_oleo(params, composicao_oleo),
+            'resultados': deterministico(params, composicao_oleo),
+            'resposta': responder_direto(params, composicao_oleo, exato=True),
+        },
+        'inverso': {
+            'entradas': entradas['inverso'],
+            'resultados': calcular_resultados_inverso(
+                meta, dict(params_inv), list(composicao_oleo_inv), processo=deterministico, catalogo=catalogo
+            ),
+            'resposta': responder_inverso(meta, params_inv, composicao_oleo_inv, catalogo, exato=True),
+        },
+    }
+    with open(caminho, 'wb') as arquivo:
+        pickle.dump(instantaneo, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    _ler_instantaneo.cache_clear()
+    return instantaneo
+
+
+@functools.lru_cache(maxsize=1)
+def _ler_instantaneo(caminho, modificacao):
+    with open(caminho, 'rb') as arquivo:
+        return pickle.load(arquivo)
+
+
+def carregar_instantaneo(caminho=ARQUIVO_INSTANTANEO):
+    # Instantâneo construído no deploy, ou None se ausente ou desatualizado
+    try:
+        modificacao = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+    instantaneo = _ler_instantaneo(caminho, modificacao)
+    if instantaneo['assinatura'] != assinatura_dependencias():
+        return None
+    return instantaneo
+
+
+def consultar_instantaneo(grupo, entradas, campo, caminho=ARQUIVO_INSTANTANEO):
+    # Cópia do campo pré-calculado ('estimativa', 'resultados' ou 'resposta') do cenário padrão de
+    # grupo ('direto' ou 'inverso'), ou None se as entradas não são as padrão
+    instantaneo = carregar_instantaneo(caminho)
+    if instantaneo is None or campo not in instantaneo[grupo] or instantaneo[grupo]['entradas'] != entradas:
+        return None
+    return copy.deepcopy(instantaneo[grupo][campo])
+
+
+def medir_partida(_):
+    # Executado num processo novo: uma visita que abre o app e altera uma entrada, seguida da
+    # abertura de uma segunda sessão no mesmo processo. Tempos de parede (ms) vistos pela sessão e
+    # os medidos pelo próprio app
+    inicio = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    medidas = {'framework_ms': (time.perf_counter() - inicio) * 1000}
+
+    def executar(nome, funcao):
+        inicio = time.perf_counter()
+        at = funcao()
+        medidas[nome] = (time.perf_counter() - inicio) * 1000
+        if at.exception:
+            raise RuntimeError(f"{nome}: {at.exception[0].value}")
+        return at
+
+    at = executar('abertura_ms', lambda: AppTest.from_file(ARQUIVO_APP, default_timeout=TEMPO_LIMITE).run())
+    medidas['pandas_na_abertura'] = 'pandas' in sys.modules
+    executar('interacao_ms', lambda: at.number_input(key='vferm1').set_value(6000.0).run())
+    executar('abertura_sessao_ms', lambda: AppTest.from_file(ARQUIVO_APP, default_timeout=TEMPO_LIMITE).run())
+    for tempo in at.session_state['tempos_execucao']:
+        if tempo['painel'] in ('Partida (processo novo)', 'Primeira interação'):
+            medidas[tempo['painel']] = tempo['ms']
+    return medidas
+
+
+def medir(repeticoes=5):
+    # Cada repetição num processo novo (spawn), uma de cada vez para não disputarem a CPU
+    from carga import versao_codigo
+
+    contexto = multiprocessing.get_context('spawn')
+    medidas = []
+    with ProcessPoolExecutor(1, mp_context=contexto, max_tasks_per_child=1) as executor:
+        for i in range(repeticoes):
+            medidas.append(executor.submit(medir_partida, i).result())
+
+    def mediana(campo):
+        valores = sorted(m[campo] for m in medidas if campo in m)
+        return valores[len(valores) // 2] if valores else None
+
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versao': versao_codigo(),
+        'repeticoes': repeticoes,
+        'instantaneo': carregar_instantaneo() is not None,
+        'pandas_na_abertura': any(m['pandas_na_abertura'] for m in medidas),
+        # Medianas (ms)
+        'framework_ms': mediana('framework_ms'),
+        'abertura_ms': mediana('abertura_ms'),
+        'partida_app_ms': mediana('Partida (processo novo)'),
+        'interacao_ms': mediana('interacao_ms'),
+        'primeira_interacao_app_ms': mediana('Primeira interação'),
+        'abertura_sessao_ms': mediana('abertura_sessao_ms'),
+    }
+
+
+if __name__ == "__main__":
+    # Uso: python partida.py                       (constrói o instantâneo; rodar no deploy)
+    #      python partida.py --medir [--repeticoes 5] [--sem-historico]
+    #      python partida.py --relatorio           (só mostra o histórico de medições)
+    parser = argparse.ArgumentParser(description="Instantâneo do cenário padrão e medição da partida do app.")
+    parser.add_argument('--medir', action='store_true')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--historico', default=ARQUIVO_HISTORICO)
+    parser.add_argument('--sem-historico', action='store_true')
+    parser.add_argument('--relatorio', action='store_true')
+    args = parser.parse_args()
+
+    if args.relatorio or args.medir:
+        import pandas as pd
+
+        from carga import ler_historico, registrar
+
+        if args.medir:
+            resultado = medir(args.repeticoes)
+            print(f"{resultado['repeticoes']} processos novos (medianas; instantâneo "
+                  f"{'presente' if resultado['instantaneo'] else 'ausente'}, pandas "
+                  f"{'carregado' if resultado['pandas_na_abertura'] else 'não carregado'} na abertura)")
+            print(f"Importação do framework de testes: {resultado['framework_ms']:,.0f} ms")
+            print(f"Abertura (processo novo):          {resultado['abertura_ms']:,.0f} ms "
+                  f"(no app: {resultado['partida_app_ms']:,.0f} ms)")
+            print(f"Primeira interação:                {resultado['interacao_ms']:,.0f} ms "
+                  f"(no app: {resultado['primeira_interacao_app_ms']:,.0f} ms)")
+            print(f"Abertura de outra sessão:          {resultado['abertura_sessao_ms']:,.0f} ms")
+            if not args.sem_historico:
+                registrar(resultado, args.historico)
+        historico = ler_historico(args.historico)
+        if historico:
+            print("\nHistórico")
+            print(pd.DataFrame(historico).drop(columns='repeticoes').tail(20).round(1).to_string(index=False))
+    else:
+        inicio = time.perf_counter()
+        construir_instantaneo()
+        print(f"Instantâneo do cenário padrão gravado em {ARQUIVO_INSTANTANEO} "
+              f"({time.perf_counter() - inicio:.1f} s)")
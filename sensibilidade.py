@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cenarios import INDICADORES
+from downstream import PARAMETROS_DOWNSTREAM
+from lote import CAMPOS_OLEO, calcular_processo_lote
+
+# Análise de sensibilidade global (índices de Sobol) sobre faixas das entradas do cálculo direto.
+# O delineamento de Saltelli usa duas matrizes A e B de uma sequência de Sobol de 2d dimensões e
+# as d matrizes AB_i (A com a coluna i de B): n (d + 2) avaliações do modelo, uma chamada de
+# calcular_processo_lote por matriz. Índices de primeira ordem pelo estimador de Saltelli (2010),
+# totais pelo de Jansen, com intervalos de confiança por bootstrap das linhas.
+
+# Joe & Kuo (new-joe-kuo-6.21201), dimensões 2 em diante: polinômio primitivo (bits, com os
+# termos de grau 0 e máximo) e números de direção iniciais m
+DIRECOES_SOBOL = (
+    (3, (1,)), (7, (1, 3)), (11, (1, 3, 1)), (13, (1, 1, 1)), (19, (1, 1, 3, 3)), (25, (1, 3, 5, 13)),
+    (37, (1, 1, 5, 5, 17)), (41, (1, 1, 5, 5, 5)), (47, (1, 1, 7, 11, 19)), (55, (1, 1, 5, 1, 1)),
+    (59, (1, 1, 1, 3, 11)), (61, (1, 3, 5, 5, 31)), (67, (1, 3, 3, 9, 7, 49)),
+    (91, (1, 1, 1, 15, 21, 21)), (97, (1, 3, 1, 13, 27, 49)), (103, (1, 1, 1, 15, 7, 5)),
+    (109, (1, 3, 1, 15, 13, 25)), (115, (1, 1, 5, 5, 19, 61)), (131, (1, 3, 7, 11, 23, 15, 103)),
+    (137, (1, 3, 7, 13, 13, 15, 69)), (143, (1, 1, 3, 13, 7, 35, 63)), (145, (1, 3, 5, 9, 1, 25, 53)),
+    (157, (1, 3, 1, 13, 9, 35, 107)), (167, (1, 3, 1, 5, 27, 61, 31)),
+    (171, (1, 1, 5, 11, 19, 41, 61)), (185, (1, 3, 5, 3, 3, 13, 69)), (191, (1, 1, 7, 13, 1, 19, 1)),
+    (193, (1, 3, 7, 5, 13, 19, 59)), (203, (1, 1, 3, 9, 25, 29, 41)), (211, (1, 3, 5, 13, 23, 1, 55)),
+    (213, (1, 3, 7, 3, 13, 59, 17)), (229, (1, 3, 1, 3, 5, 53, 69)), (239, (1, 1, 5, 5, 23, 33, 13)),
+    (241, (1, 1, 7, 7, 1, 61, 123)), (247, (1, 1, 7, 9, 13, 61, 49)), (253, (1, 3, 3, 5, 3, 55, 33)),
+    (285, (1, 3, 1, 15, 31, 13, 49, 245)), (299, (1, 3, 5, 15, 31, 59, 63, 97)),
+    (301, (1, 3, 1, 11, 11, 11, 77, 249)), (333, (1, 3, 1, 11, 27, 43, 71, 9)),
+    (351, (1, 1, 7, 15, 21, 11, 81, 45)), (355, (1, 3, 7, 3, 25, 31, 65, 79)),
+    (357, (1, 3, 1, 1, 19, 11, 3, 205)), (361, (1, 1, 5, 9, 19, 21, 29, 157)),
+    (369, (1, 3, 7, 11, 1, 33, 89, 185)), (391, (1, 3, 3, 3, 15, 9, 79, 71)),
+    (397, (1, 3, 7, 11, 15, 39, 119, 27)), (425, (1, 1, 3, 1, 11, 31, 97, 225)),
+    (451, (1, 1, 1, 3, 23, 43, 57, 177)), (463, (1, 3, 7, 7, 17, 17, 37, 71)),
+    (487, (1, 3, 1, 5, 27, 63, 123, 213)), (501, (1, 1, 3, 5, 11, 43, 53, 133)),
+    (529, (1, 3, 5, 5, 29, 17, 47, 173, 479)), (539, (1, 3, 3, 11, 3, 1, 109, 9, 69)),
+    (545, (1, 1, 1, 5, 17, 39, 23, 5, 343)), (557, (1, 3, 1, 5, 25, 15, 31, 103, 499)),
+    (563, (1, 1, 1, 11, 11, 17, 63, 105, 183)), (601, (1, 1, 5, 11, 9, 29, 97, 231, 363)),
+    (607, (1, 1, 5, 15, 19, 45, 41, 7, 383)), (617, (1, 3, 7, 7, 31, 19, 83, 137, 221)),
+    (623, (1, 1, 1, 3, 23, 15, 111, 223, 83)), (631, (1, 1, 5, 13, 31, 15, 55, 25, 161)),
+    (637, (1, 1, 3, 13, 25, 47, 39, 87, 257)),
+)
+BITS_SOBOL = 32
+MAX_ENTRADAS = (len(DIRECOES_SOBOL) + 1) // 2
+
+# Saídas analisadas por padrão: (etapa, campo) de calcular_processo_lote
+SAIDAS_PADRAO = (
+    ('fermentador', 'conc_soforolipideo'),
+    ('fermentador', 'produtividade'),
+    ('fermentador', 'soforolipideo_produzido'),
+    ('fermentador', 'percentual_oleo'),
+)
+
+
+def direcoes_sobol(dimensoes):
+    # Números de direção V[d, k] (inteiros de BITS_SOBOL bits); a primeira dimensão é a de van der Corput
+    if dimensoes > len(DIRECOES_SOBOL) + 1:
+        raise ValueError(f"A sequência de Sobol suporta até {len(DIRECOES_SOBOL) + 1} dimensões.")
+    V = np.zeros((dimensoes, BITS_SOBOL), dtype=np.uint64)
+    V[0] = [1 << (BITS_SOBOL - 1 - k) for k in range(BITS_SOBOL)]
+    for d, (polinomio, m) in enumerate(DIRECOES_SOBOL[:dimensoes - 1], start=1):
+        grau = len(m)
+        coeficientes = polinomio >> 1  # sem o termo de grau 0; o bit de grau máximo é ignorado abaixo
+        v = [m[k] << (BITS_SOBOL - 1 - k) for k in range(grau)]
+        for k in range(grau, BITS_SOBOL):
+            novo = v[k - grau] ^ (v[k - grau] >> grau)
+            for j in range(1, grau):
+                if (coeficientes >> (grau - 1 - j)) & 1:
+                    novo ^= v[k - j]
+            v.append(novo)
+        V[d] = v
+    return V
+
+
+def sequencia_sobol(n, dimensoes, inicio=1):
+    # Pontos inicio..inicio+n-1 da sequência de Sobol em [0, 1)^dimensoes (ordem do código Gray)
+    if inicio + n > 2 ** BITS_SOBOL:
+        raise ValueError("Pontos demais para a sequência de Sobol.")
+    V = direcoes_sobol(dimensoes)
+    indice = np.arange(inicio, inicio + n, dtype=np.uint64)
+    gray = indice ^ (indice >> np.uint64(1))
+    x = np.zeros((n, dimensoes), dtype=np.uint64)
+    for k in range(int(gray.max()).bit_length() if n else 0):
+        ativo = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        x[ativo] ^= V[:, k]
+    return x / float(2 ** BITS_SOBOL)
+
+
+def matrizes_saltelli(faixas, n):
+    # A e B (n x d) escaladas para as faixas {entrada: (mínimo, máximo)}
+    if len(faixas) > MAX_ENTRADAS:
+        raise ValueError(f"A análise suporta até {MAX_ENTRADAS} entradas.")
+    minimo, maximo = np.array(list(faixas.values()), dtype=float).T
+    if np.any(maximo < minimo):
+        raise ValueError("Faixa com máximo menor que o mínimo.")
+    u = sequencia_sobol(n, 2 * len(faixas))
+    d = len(faixas)
+    return minimo + u[:, :d] * (maximo - minimo), minimo + u[:, d:] * (maximo - minimo)
+
+
+def faixas_padrao(params, composicao_oleo, variacao=0.2):
+    # Faixa de ±variacao em torno de cada entrada numérica não nula (composição limitada a 0-100 %,
+    # frações do downstream a 0-1 e só quando o downstream é calculado)
+    faixas = {}
+    for nome, valor in [*params.items(), *zip(CAMPOS_OLEO, composicao_oleo)]:
+        if isinstance(valor, (bool, str)) or not valor:
+            continue
+        if nome in PARAMETROS_DOWNSTREAM and not params.get('usar_downstream', False):
+            continue
+        minimo, maximo = sorted((valor * (1 - variacao), valor * (1 + variacao)))
+        if nome in CAMPOS_OLEO:
+            minimo, maximo = max(minimo, 0.0), min(maximo, 100.0)
+        elif nome in PARAMETROS_DOWNSTREAM:
+            minimo, maximo = max(minimo, 0.0), min(maximo, 1.0)
+        faixas[nome] = (float(minimo), float(maximo))
+    return faixas
+
+
+def _avaliar_matriz(params, composicao_oleo, nomes, X, saidas):
+    # Uma matriz do delineamento numa chamada de calcular_processo_lote; retorna (saídas, n)
+    colunas = dict(zip(nomes, X.T))
+    params = {k: colunas.get(k, v) for k, v in params.items()}
+    params.update({k: v for k, v in colunas.items() if k not in CAMPOS_OLEO})
+    composicao = [colunas.get(c, v) for c, v in zip(CAMPOS_OLEO, composicao_oleo)]
+    results = calcular_processo_lote(params, composicao)
+    n = len(X)
+    return np.stack([np.broadcast_to(np.asarray(results[g][c], dtype=float), (n,)) for g, c in saidas])
+
+
+def indices_sobol(fA, fB, fAB, reamostragens=100, nivel=0.95, semente=0):
+    # fA, fB: (n,); fAB: (d, n). Retorna S1 e ST (d,) e os intervalos (d, 2) por bootstrap das linhas.
+    # Cada reamostragem é um vetor de pesos (contagens multinomiais), então todas as médias
+    # reamostradas saem de um único produto matricial pesos @ termos.
+    n, d = len(fA), len(fAB)
+    termos = np.column_stack([
+        (fB * (fAB - fA)).T,  # numerador de S1 (Saltelli 2010)
+        0.5 * ((fA - fAB) ** 2).T,  # numerador de ST (Jansen)
+        fA + fB, fA ** 2 + fB ** 2,  # variância de A e B juntas
+    ])
+    rng = np.random.default_rng(semente)
+    pesos = np.vstack([np.ones(n), rng.multinomial(n, np.full(n, 1 / n), size=reamostragens)])
+    medias = pesos @ termos / n
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variancia = medias[:, -1:] / 2 - (medias[:, -2:-1] / 2) ** 2
+        s1 = medias[:, :d] / variancia
+        st_ = medias[:, d:2 * d] / variancia
+    cauda = (1 - nivel) / 2 * 100
+    limites = [cauda, 100 - cauda]
+    return s1[0], st_[0], np.nanpercentile(s1[1:], limites, axis=0).T, np.nanpercentile(st_[1:], limites, axis=0).T
+
+
+def analisar_sensibilidade(params, composicao_oleo, faixas, n=2 ** 14, saidas=SAIDAS_PADRAO,
+                           reamostragens=100, nivel=0.95, processos=None):
+    # faixas: {entrada de params ou CAMPOS_OLEO: (mínimo, máximo)}; demais entradas ficam nos valores de params.
+    # Retorna {(etapa, campo): DataFrame indexado pela entrada com S1, ST e os limites dos intervalos}
+    nomes = list(faixas)
+    A, B = matrizes_saltelli(faixas, n)
+    matrizes = [A, B]
+    for i in range(len(nomes)):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        matrizes.append(AB)
+
+    argumentos = [(params, composicao_oleo, nomes, X, saidas) for X in matrizes]
+    processos = processos or os.cpu_count() or 1
+    if processos > 1:
+        with ProcessPoolExecutor(processos) as executor:
+            avaliacoes = list(executor.map(_avaliar_matriz, *zip(*argumentos)))
+    else:
+        avaliacoes = [_avaliar_matriz(*a) for a in argumentos]
+    f = np.stack(avaliacoes, axis=1)  # (saídas, d + 2, n)
+
+    tabelas = {}
+    for saida, valores in zip(saidas, f):
+        s1, st_, ic_s1, ic_st = indices_sobol(valores[0], valores[1], valores[2:], reamostragens, nivel)
+        tabelas[saida] = pd.DataFrame({
+            'S1': s1, 'S1 mín.': ic_s1[:, 0], 'S1 máx.': ic_s1[:, 1],
+            'ST': st_, 'ST mín.': ic_st[:, 0], 'ST máx.': ic_st[:, 1],
+        }, index=pd.Index(nomes, name='Entrada'))
+    return tabelas
+
+
+if __name__ == "__main__":
+    # Uso: python sensibilidade.py [n] [processos] — 20 entradas com as faixas do benchmark_compacto
+    from benchmark_compacto import FAIXAS
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2 ** 15
+    processos = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    faixas = {**FAIXAS, 'pOleic': (20.0, 70.0), 'mLinoleic': (0.0, 40.0), 'mLinolenic': (0.0, 40.0)}
+    params = {k: (a + b) / 2 for k, (a, b) in FAIXAS.items()}
+    composicao_oleo = [45.0, 35.0, 10.0, 7.0, 3.0, 20.0, 10.0]
+
+    inicio = time.perf_counter()
+    tabelas = analisar_sensibilidade(params, composicao_oleo, faixas, n, processos=processos)
+    tempo = time.perf_counter() - inicio
+    print(f"{len(faixas)} entradas, {n * (len(faixas) + 2):,} avaliações em {tempo:.1f} s")
+    for (etapa, campo), tabela in tabelas.items():
+        print(f"\n{INDICADORES.get((etapa, campo), campo)}")
+        print(tabela.sort_values('ST', ascending=False).round(3).to_string())
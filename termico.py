@@ -0,0 +1,202 @@
+import numpy as np
+
+from SF_calculator import MM
+from custos import carregar_precos, horas_reator
+from lote import ETAPAS
+
+# Carga térmica por etapa e capacidade de remoção de calor dos vasos.
+# Calor metabólico pela regra de Thornton (CALOR_POR_O2 por mol de O₂ consumido), com o O₂ do
+# balanço de graus de redução (elétrons disponíveis) entre substratos consumidos e produtos:
+#   O₂ = (Σ γ·n substratos − Σ γ·n produtos) / 4
+# mais a potência de agitação dissipada no meio. O pico segue um perfil logístico de crescimento
+# que vai da biomassa inicial a CONVERSAO_FINAL da final no tempo da etapa.
+# A remoção é U·A·ΔT: camisa na parede molhada e no fundo de um vaso cilíndrico com a razão
+# altura/diâmetro informada, mais a serpentina instalada por m³ de vaso. O frasco fica na
+# incubadora, sem limite de remoção. Tudo elemento a elemento: aceita resultados escalares ou em lote.
+
+# Graus de redução (elétrons por mol; N referido a NH₃, a ureia não contribui)
+# Glicose C₆H₁₂O₆ | Ácido oleico C₁₈H₃₄O₂ | Biomassa CH₁.₈O₀.₅N₀.₂ (por C-mol) | Soforolipídeo C₃₂H₅₄O₁₃
+GRAU_REDUCAO = {'glicose': 24.0, 'acidoOleico': 102.0, 'biomassa': 4.2, 'soforolipideo': 156.0}
+CALOR_POR_O2 = 460.0  # kJ/mol O₂
+CONVERSAO_FINAL = 0.99
+INOCULO_FRASCO = 0.01  # biomassa inicial / final do frasco (inóculo de estoque)
+ETAPAS_RESFRIADAS = ('seed', 'fermentador')
+FATOR_MAXIMO = 4.0  # maior ampliação do vaso tentada no dimensionamento inverso
+PASSOS_AMPLIACAO = 256
+
+# Parâmetro: (padrão, rótulo)
+PARAMETROS_TERMICOS = {
+    'coef_troca': (500.0, 'Coeficiente Global de Troca (W/m²·K)'),
+    'delta_t': (15.0, 'Diferença de Temperatura Meio–Fluido (K)'),
+    'area_serpentina': (1.0, 'Área de Serpentina (m²/m³ de vaso)'),
+    'razao_altura_diametro': (2.0, 'Razão Altura/Diâmetro do Vaso'),
+    'potencia_agitacao': (1.0, 'Potência de Agitação (kW/m³ de meio)'),
+}
+
+
+def parametros_termicos(params):
+    return {nome: params.get(nome, padrao) for nome, (padrao, _) in PARAMETROS_TERMICOS.items()}
+
+
+def _mols(massa_kg, especie):
+    return np.asarray(massa_kg, dtype=float) / (MM[especie] / 1000)
+
+
+def carga_termica(params, results):
+    # {etapa: {'oxigenio' (mol O₂), 'calor_total' (MJ), 'carga_media' (kW), 'carga_pico' (kW)}}
+    termicos = parametros_termicos(params)
+    horas = {etapa: np.asarray(h, dtype=float) for etapa, h in horas_reator(params, carregar_precos()).items()}
+    cargas = {}
+    for etapa in ETAPAS:
+        r = results[etapa]
+        if etapa == 'fermentador':
+            # Só a glicose que o óleo disponível permitiu converter em soforolipídeo
+            glicose = np.asarray(r['acucares_biomassa'], dtype=float) + (
+                np.asarray(r['acucares_soforo'], dtype=float) * np.asarray(r['percentual_oleo'], dtype=float) / 100
+            )
+            eletrons = (
+                GRAU_REDUCAO['glicose'] * _mols(glicose, 'glicose')
+                + GRAU_REDUCAO['acidoOleico'] * _mols(r['oleo_consumido'], 'acidoOleico')
+                - GRAU_REDUCAO['soforolipideo'] * _mols(r['soforolipideo_produzido'], 'soforolipideo')
+            )
+            inicial = np.asarray(r['biomassa_inicial'], dtype=float) / np.asarray(r['biomassa_total'], dtype=float)
+        else:
+            eletrons = GRAU_REDUCAO['glicose'] * _mols(r['acucares_fermentaveis'], 'glicose')
+            inicial = (
+                np.asarray(r['biomassa_inicial'], dtype=float) / np.asarray(r['biomassa_total'], dtype=float)
+                if etapa == 'seed' else INOCULO_FRASCO
+            )
+        eletrons = eletrons - GRAU_REDUCAO['biomassa'] * _mols(r['biomassa_produzida'], 'biomassa')
+        oxigenio = np.maximum(eletrons, 0.0) / 4
+        segundos = horas[etapa] * 3600
+        agitacao = termicos['potencia_agitacao'] * np.asarray(r['volume_meio'], dtype=float) / 1000  # kW
+        calor_metabolico = oxigenio * CALOR_POR_O2 / 1000  # MJ
+
+        # Logístico X(t) = K / (1 + (K/X0 − 1) e^{−μt}) com X(T) = CONVERSAO_FINAL·K: a taxa máxima
+        # é μK/4 na inflexão ou, com inóculo acima de K/2, μX0(1 − X0/K) no início
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inicial = np.clip(np.nan_to_num(inicial, nan=INOCULO_FRASCO), 1e-9, CONVERSAO_FINAL - 1e-9)
+            mu_t = np.log((1 / inicial - 1) * CONVERSAO_FINAL / (1 - CONVERSAO_FINAL))
+            fator_pico = mu_t * np.where(inicial < 0.5, 0.25, inicial * (1 - inicial)) / (CONVERSAO_FINAL - inicial)
+            media_metabolica = np.where(segundos > 0, calor_metabolico * 1000 / segundos, 0.0)  # kW
+        cargas[etapa] = {
+            'oxigenio': oxigenio,
+            'calor_total': calor_metabolico + agitacao * segundos / 1000,
+            'carga_media': media_metabolica + agitacao,
+            'carga_pico': media_metabolica * np.maximum(fator_pico, 1.0) + agitacao,
+        }
+    return cargas
+
+
+def area_troca(volume_vaso, volume_meio, params):
+    # Área de troca (m²) de um vaso de volume_vaso (L) com volume_meio (L) de meio
+    termicos = parametros_termicos(params)
+    vaso = np.asarray(volume_vaso, dtype=float) / 1000
+    meio = np.minimum(np.asarray(volume_meio, dtype=float) / 1000, vaso)
+    diametro = (4 * vaso / (np.pi * termicos['razao_altura_diametro'])) ** (1 / 3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        altura_meio = np.where(diametro > 0, 4 * meio / (np.pi * diametro ** 2), 0.0)
+    camisa = np.pi * diametro * altura_meio + np.pi * diametro ** 2 / 4
+    return camisa + termicos['area_serpentina'] * vaso
+
+
+def capacidade_remocao(volume_vaso, volume_meio, params):
+    # Calor removível pela camisa e serpentina (kW)
+    termicos = parametros_termicos(params)
+    return termicos['coef_troca'] * area_troca(volume_vaso, volume_meio, params) * termicos['delta_t'] / 1000
+
+
+def avaliar_resfriamento(params, results):
+    # carga_termica de cada etapa mais 'capacidade_remocao' (kW), 'folga' (% da capacidade)
+    # e 'resfriamento_suficiente'
+    cargas = carga_termica(params, results)
+    for etapa, carga in cargas.items():
+        if etapa in ETAPAS_RESFRIADAS:
+            capacidade = capacidade_remocao(params[f'volume_{etapa}'], results[etapa]['volume_meio'], params)
+        else:
+            capacidade = np.full(np.shape(carga['carga_pico']), np.inf)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            carga['folga'] = np.where(np.isfinite(capacidade), (1 - carga['carga_pico'] / capacidade) * 100, 100.0)
+        carga['capacidade_remocao'] = capacidade
+        carga['resfriamento_suficiente'] = carga['carga_pico'] <= capacidade
+    return cargas
+
+
+def volume_resfriavel(carga_pico, volume_meio, volume_minimo, params, fator_maximo=FATOR_MAXIMO,
+                      passos=PASSOS_AMPLIACAO):
+    # Menor volume de vaso (L), de volume_minimo até fator_maximo × volume_minimo numa grade
+    # geométrica, cuja capacidade de remoção cobre carga_pico; NaN se nenhum serve
+    fatores = np.geomspace(1.0, fator_maximo, passos)
+    termicos = {k: np.asarray(v, dtype=float)[..., None] for k, v in parametros_termicos(params).items()}
+    volumes = np.asarray(volume_minimo, dtype=float)[..., None] * fatores
+    capacidade = capacidade_remocao(volumes, np.asarray(volume_meio, dtype=float)[..., None], termicos)
+    serve = capacidade >= np.asarray(carga_pico, dtype=float)[..., None]
+    primeiro = np.argmax(serve, axis=-1)
+    volume = np.take_along_axis(volumes, primeiro[..., None], axis=-1)[..., 0]
+    return np.where(serve.any(-1), volume, np.nan)
+
+
+def _vaso_resfriavel(etapa, pico, meio, minimo, maximo, params_inv, catalogo):
+    # Menor vaso entre minimo e maximo (L) que remove pico; com catálogo, o menor vaso do catálogo
+    # a partir dele que também resfrie. Retorna (volume, índice no catálogo ou None); NaN se nenhum
+    volume = float(volume_resfriavel(pico, meio, minimo, params_inv, max(maximo / minimo, 1.0)))
+    if catalogo is None or volume != volume:
+        return volume, None
+    from catalogo import AERACAO_MINIMA
+    aeracao = max(AERACAO_MINIMA, params_inv.get('porcentagem_aeracao', AERACAO_MINIMA))
+    while True:
+        i = int(catalogo.ajustar(etapa, volume, meio, aeracao))
+        if i < 0:
+            return np.nan, None
+        nominal = float(catalogo.volume_nominal[i])
+        if capacidade_remocao(nominal, meio, params_inv) >= pico:
+            return nominal, i
+        volume = np.nextafter(nominal, np.inf)
+
+
+def ajustar_resfriamento(params_inv, composicao_oleo_inv, results, processo, catalogo=None, max_tentativas=10):
+    # Dimensionamento inverso: amplia o vaso das etapas cujo pico de calor supera a remoção
+    # (params_inv['ampliar_resfriamento'], padrão) ou rejeita o dimensionamento com ValueError.
+    # Com proporções fixas o meio não depende do vaso, mas o inóculo (proporcional ao volume)
+    # muda o perfil de crescimento: o processo é recalculado e reavaliado até todas as etapas resfriarem.
+    cargas = avaliar_resfriamento(params_inv, results)
+    reprovadas = [etapa for etapa in ETAPAS_RESFRIADAS if not cargas[etapa]['resfriamento_suficiente']]
+    if not reprovadas:
+        return params_inv, results
+
+    params_inv = dict(params_inv)
+    for _ in range(max_tentativas):
+        for etapa in reprovadas:
+            pico = float(cargas[etapa]['carga_pico'])
+            meio = float(results[etapa]['volume_meio'])
+            atual = float(params_inv[f'volume_{etapa}'])
+            original = params_inv.get(f'volume_original_{etapa}', atual)
+            descricao = (
+                f"O {etapa} não remove o calor gerado: pico de {pico:,.1f} kW, "
+                f"capacidade de {float(cargas[etapa]['capacidade_remocao']):,.1f} kW com {atual:,.0f} L"
+            )
+            if not params_inv.get('ampliar_resfriamento', True):
+                raise ValueError(descricao + ".")
+            volume, i = _vaso_resfriavel(
+                etapa, pico, meio, np.nextafter(atual, np.inf), FATOR_MAXIMO * original, params_inv, catalogo
+            )
+            if volume != volume:
+                raise ValueError(descricao + f"; nenhum vaso até {FATOR_MAXIMO:g}× maior resolve.")
+            if i is not None:
+                params_inv[f'sku_{etapa}'] = str(catalogo.sku[i])
+                params_inv[f'volume_util_{etapa}'] = float(catalogo.volume_util[i])
+            params_inv[f'volume_original_{etapa}'] = original
+            params_inv[f'volume_{etapa}'] = volume
+
+        results = processo(params_inv, composicao_oleo_inv)
+        cargas = avaliar_resfriamento(params_inv, results)
+        reprovadas = [etapa for etapa in ETAPAS_RESFRIADAS if not cargas[etapa]['resfriamento_suficiente']]
+        if not reprovadas:
+            break
+    else:
+        raise ValueError("Não foi possível ampliar os vasos até remover o pico de calor.")
+
+    params_inv['concentracao_resultante'] = (
+        params_inv['massa_soforolipideo_alvo'] * 1000 / params_inv['volume_fermentador']
+    )
+    return params_inv, results